@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISS = object()
+
+# 스레드 안전 LRU 캐시 (선택적 TTL) : 최대 크기를 넘으면 가장 오래 안 쓴 항목부터 제거
+class LRUCache:
+    def __init__(self, maxsize: int, ttl_s: Optional[float] = None):
+        self.maxsize = max(0, int(maxsize))
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._generation = None
+
+    # 값 조회 : 없거나 만료되면 default 반환
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISS)
+            if item is _MISS:
+                self.misses += 1
+                return default
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # 값 저장 : maxsize가 0이면 캐시 비활성
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize == 0:
+            return
+        expires = time.monotonic() + self.ttl_s if self.ttl_s else 0.0
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    # 전체 무효화 (인덱스/모델 재로딩 시)
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    # 데이터 세대(예: 인덱스 재로딩 횟수, 증가만 함)가 새로 올라가면 전체 무효화
+    # 교체 직전에 시작한 요청이 이전 세대로 호출해도 새 세대 캐시를 지우지 않음
+    def sync(self, generation: int) -> None:
+        if self._generation is None or generation > self._generation:
+            with self._lock:
+                if self._generation is None or generation > self._generation:
+                    self._data.clear()
+                    self._generation = generation
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -11,4 +11,35 @@ def settings():
         "openai_model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
         "openai_base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
         "timeout_s": float(os.getenv("OPENAI_TIMEOUT_S", "60")),
+        "openai_max_connections": int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")), # httpx 커넥션 풀 크기
+        "openai_max_keepalive": int(os.getenv("OPENAI_MAX_KEEPALIVE", "10")),
+        "openai_fake": os.getenv("OPENAI_FAKE", "") == "1", # 1이면 실제 API 대신 로컬 가짜 응답 (오프라인 부하 테스트용)
+        "openai_fake_latency_s": float(os.getenv("OPENAI_FAKE_LATENCY_S", "0.5")),
+        "tip_timeout_s": float(os.getenv("TIP_TIMEOUT_S", "20")), # /tip 요청당 제한 시간 (대기 + LLM 호출)
+        "tip_max_concurrency": int(os.getenv("TIP_MAX_CONCURRENCY", "16")), # 동시에 진행할 LLM 호출 수
+        "tip_cache_size": int(os.getenv("TIP_CACHE_SIZE", "5000")), # 반찬별 팁 메모리 캐시 크기 (0이면 비활성)
+        "tip_cache_ttl_s": float(os.getenv("TIP_CACHE_TTL_S", "86400")), # 팁 캐시 유지 시간 (0이면 만료 없음)
+        "tip_cache_path": os.getenv("TIP_CACHE_PATH", ""), # SQLite 디스크 캐시 경로 (비어 있으면 메모리만)
+        "match_cache_size": int(os.getenv("MATCH_CACHE_SIZE", "10000")), # 메뉴 매칭 캐시 크기 (0이면 비활성)
+        "match_cache_ttl_s": float(os.getenv("MATCH_CACHE_TTL_S", "0")), # 0이면 만료 없음
+        "match_k": int(os.getenv("MATCH_K", "1")), # ANN 후보 수 (1이면 top-1 그대로, 2 이상이면 후보를 재정렬)
+        "match_ef": int(os.getenv("MATCH_EF", "50")), # HNSW 검색 폭 (클수록 정확, 느려짐 / match_k보다 작으면 match_k 사용)
+        "match_min_sim": float(os.getenv("MATCH_MIN_SIM", "0")), # ANN 유사도가 이 값 이하인 후보는 매칭 실패 (겹치는 n-gram이 없는 쿼리는 0)
+        "match_reranker": os.getenv("MATCH_RERANKER", "tfidf"), # 후보 재정렬 방식 : tfidf(희소 TF-IDF 정확 코사인) | rapidfuzz | none
+        "recommend_workers": int(os.getenv("RECOMMEND_WORKERS", "2")), # 추천 CPU 작업 전용 스레드 수 (기본 스레드 풀과 분리)
+        "recommend_queue_size": int(os.getenv("RECOMMEND_QUEUE_SIZE", "256")), # 대기 중인 추천 요청 상한 (넘으면 503)
+        "recommend_batch_window_s": float(os.getenv("RECOMMEND_BATCH_WINDOW_S", "0.002")), # 이 시간 안에 들어온 요청은 한 번에 처리 (0이면 대기 없이 쌓인 것만)
+        "recommend_batch_max_items": int(os.getenv("RECOMMEND_BATCH_MAX_ITEMS", "512")), # 배치 하나에 넣을 최대 메뉴 수
+        "response_cache_size": int(os.getenv("RESPONSE_CACHE_SIZE", "1024")), # 추천 응답 캐시 크기 (0이면 비활성)
+        "response_cache_ttl_s": float(os.getenv("RESPONSE_CACHE_TTL_S", "0")),
+        "admin_token": os.getenv("ADMIN_TOKEN", ""), # 비어 있으면 관리자 API 비활성
+        "model_mmap": os.getenv("MODEL_MMAP", "1") == "1", # 1이면 모델/번들 배열을 memmap으로 읽어 워커끼리 물리 메모리 공유
+        "ann_backend": os.getenv("ANN_BACKEND", "hnsw"), # hnsw(워커마다 그래프 복사) | exact(memmap dense 행렬 브루트포스, 워커끼리 공유)
+        "profile_sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")), # 샘플링 프로파일러를 켤 요청 비율 (0~1, 0이면 헤더 요청만)
+        "profile_interval_s": float(os.getenv("PROFILE_INTERVAL_S", "0.005")), # 스택 샘플링 주기
+        "profile_dir": os.getenv("PROFILE_DIR", "/tmp/leftovers-profiles"), # folded stack 파일 저장 위치
+        "name_vectorizer": os.getenv("NAME_VECTORIZER", "tfidf"), # 학습할 이름 벡터화 : tfidf(글자 n-gram 어휘 사전) | hashed(자모 n-gram 해시, 어휘 사전 없음)
+        "concepts_path": os.getenv("CONCEPTS_PATH", "leftovers/domain/recommend/config/concepts.json"), # 컨셉 정의 (가중치/페널티/컷오프) : train이 model_store에 복사해서 같이 로딩
+        "train_jobs": int(os.getenv("TRAIN_JOBS", "-1")), # 컨셉별 모델 병렬 학습 프로세스 수 (-1이면 코어 수, 1이면 순차)
+        "model_watch_interval_s": float(os.getenv("MODEL_WATCH_INTERVAL_S", "0")), # model_store 변경 감지 주기 (0이면 비활성)
     }
\ No newline at end of file
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import re
+import time
+import httpx
+
+# 로컬 가짜 OpenAI 백엔드 (SDK http_client에 끼우는 httpx 트랜스포트) : 네트워크/API 키 없이 /tip 처리량을 측정할 때 사용
+# chat.completions 요청의 "남은 반찬 목록: a, b, ..." 에서 반찬을 꺼내 반찬마다 팁 하나씩 돌려줌 (stream=True면 SSE 조각으로)
+_MENUS_RE = re.compile(r"남은 반찬 목록:\s*(.*)")
+
+
+def _menus_from(messages) -> list[str]:
+    for m in reversed(messages or []):
+        found = _MENUS_RE.search(str(m.get("content", "")))
+        if found:
+            return [x.strip() for x in found.group(1).split(",") if x.strip()]
+    return []
+
+
+def fake_tip_items(menus: list[str]) -> list[dict]:
+    return [{"menu": m, "title": f"{m} 새로 즐기기"[:20], "content": f"{m}을(를) 잘게 썰어 달걀과 함께 부쳐 보세요."} for m in menus]
+
+
+# stream=True 요청 : 응답 JSON을 chunk_chars 글자씩 나눠 latency_s 동안 고르게 흘려보냄 (토큰 생성 흉내, SSE)
+async def _sse_chunks(content: str, model: str, req_id: str, latency_s: float, chunk_chars: int):
+    pieces = [content[i:i + chunk_chars] for i in range(0, len(content), chunk_chars)] or [""]
+    delay = latency_s / len(pieces)
+
+    def event(delta: dict, finish=None) -> bytes:
+        chunk = {
+            "id": req_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+        }
+        return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+
+    yield event({"role": "assistant", "content": ""})
+    for piece in pieces:
+        await asyncio.sleep(delay)
+        yield event({"content": piece})
+    yield event({}, finish="stop")
+    yield b"data: [DONE]\n\n"
+
+
+class FakeOpenAITransport(httpx.AsyncBaseTransport):
+    def __init__(self, latency_s: float = 0.5, chunk_chars: int = 8):
+        self.latency_s = latency_s
+        self.chunk_chars = chunk_chars
+        self.requests = 0
+
+    async def handle_async_request(self, request):
+        self.requests += 1
+        body = json.loads(request.content or b"{}")
+        content = json.dumps({"items": fake_tip_items(_menus_from(body.get("messages")))}, ensure_ascii=False)
+        if body.get("stream"):
+            chunks = _sse_chunks(content, body.get("model", "fake"), f"chatcmpl-fake-{self.requests}", self.latency_s, self.chunk_chars)
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=chunks, request=request)
+
+        await asyncio.sleep(self.latency_s) # LLM 응답 대기 시간 흉내
+        payload = {
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+        return httpx.Response(200, json=payload, request=request)
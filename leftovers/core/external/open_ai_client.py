@@ -1,17 +1,71 @@
-from openai import OpenAI
+import asyncio
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient
 from leftovers.core.config.config import settings # 환경설정 로더 가져오기
 
 _cfg = settings() # settings
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=_cfg["openai_api_key"])
+_sync_client = None
+_async_state = {} # 이벤트 루프 -> (AsyncOpenAI, Semaphore) : httpx 커넥션 풀은 루프에 묶여 있어 루프마다 하나씩
+
+
+# 동기 OpenAI 클라이언트 (처음 사용할 때 초기화)
+def sync_client() -> OpenAI:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = OpenAI(api_key=_cfg["openai_api_key"])
+    return _sync_client
+
+
+# 비동기 OpenAI 클라이언트 : 공유 httpx 커넥션 풀(최대 연결 수 제한) 사용
+def async_client() -> AsyncOpenAI:
+    return _state()[0]
+
+
+# LLM 동시 호출 수 제한용 세마포어
+def llm_semaphore() -> asyncio.Semaphore:
+    return _state()[1]
+
+
+def _state():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        transport = None
+        if _cfg["openai_fake"]:
+            from leftovers.core.external.fake_openai import FakeOpenAITransport
+            transport = FakeOpenAITransport(_cfg["openai_fake_latency_s"])
+        http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=_cfg["openai_max_connections"],
+                max_keepalive_connections=_cfg["openai_max_keepalive"],
+            ),
+            timeout=httpx.Timeout(_cfg["timeout_s"], connect=10.0),
+            transport=transport,
+        )
+        client = AsyncOpenAI(
+            api_key=_cfg["openai_api_key"] or ("fake" if _cfg["openai_fake"] else None),
+            base_url=_cfg["openai_base_url"],
+            http_client=http_client,
+            max_retries=0 if _cfg["openai_fake"] else 2,
+        )
+        state = (client, asyncio.Semaphore(_cfg["tip_max_concurrency"]))
+        _async_state[loop] = state
+    return state
+
+
+# 서버 종료 시 현재 루프의 커넥션 풀 정리
+async def aclose():
+    state = _async_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        await state[0].close()
 
 
 def chat_sync(messages, model=None, **kwargs) :
     model = model or _cfg["openai_model"]
 
     # OpenAI API에 대화 내용 보내기
-    res = client.responses.create(
+    res = sync_client().responses.create(
         model=model, # 사용할 모델
         input=messages, # 대화 내용
         **kwargs # 추가 옵션
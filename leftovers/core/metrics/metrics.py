@@ -0,0 +1,182 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Tuple
+
+# 히스토그램 기본 버킷 (초) : 0.1ms ~ 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_METRICS = [] # 등록 순서대로 /metrics에 출력
+_COLLECTORS = [] # 출력 시점에 값을 읽어오는 함수 (기존 stats() 재사용)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+# 누적 카운터
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield f"{self.name}{_labels(self.labelnames, key)} {_num(v)}"
+
+
+# 히스토그램 (버킷별 개수 + 합계 + 개수) : 버킷 경계 le는 이하(<=)
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {} # 라벨 값 -> [버킷별 개수(+Inf 포함), 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    # with 블록 실행 시간 기록
+    @contextmanager
+    def time(self, **labels):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._series.items()]
+        for key, counts, total, n in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le_label = 'le="%s"' % ("+Inf" if le == float("inf") else repr(le))
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le_label)} {acc}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {repr(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {n}"
+
+
+def counter(name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    c = Counter(name, help, labelnames)
+    _METRICS.append(c)
+    return c
+
+
+def histogram(name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    h = Histogram(name, help, labelnames, buckets)
+    _METRICS.append(h)
+    return h
+
+
+# 출력 시점에 읽는 값 등록 : fn() -> [(이름, "counter"|"gauge", 설명, [(라벨 dict, 값), ...]), ...]
+def collector(fn: Callable[[], Iterable[tuple]]):
+    _COLLECTORS.append(fn)
+    return fn
+
+
+# 캐시 stats() dict -> hits/misses/evictions/expirations 카운터 + size/maxsize 게이지 (cache 라벨로 구분)
+def register_cache(name: str, stats: Callable[[], dict]):
+    def _collect():
+        s = stats()
+        for key in ("hits", "misses", "evictions", "expirations"):
+            if key in s:
+                yield f"leftovers_cache_{key}_total", "counter", f"cache {key}", [({"cache": name}, s[key])]
+        for key in ("size", "maxsize"):
+            if key in s:
+                yield f"leftovers_cache_{key}", "gauge", f"cache {key}", [({"cache": name}, s[key])]
+    collector(_collect)
+
+
+# 요청 처리 단계별 소요 시간 (매칭, 전처리, 예측, 규칙 점수, 정렬, 직렬화 등)
+STAGE_SECONDS = histogram("leftovers_stage_seconds", "Time spent per pipeline stage", ("stage",))
+HTTP_SECONDS = histogram("leftovers_http_request_seconds", "HTTP request latency", ("method", "path", "status"))
+
+
+# 벤치마크용 : 설정되어 있으면 단계별 원시 소요 시간도 모음 (히스토그램 버킷으로는 정확한 백분위수를 못 구함)
+_STAGE_SINK = None
+
+
+# 이미 잰 단계 소요 시간(초) 기록 (큐 대기처럼 with 블록으로 감쌀 수 없는 구간)
+def observe_stage(name: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    sink = _STAGE_SINK
+    if sink is not None:
+        sink.setdefault(name, []).append(seconds)
+
+
+# 단계 하나 시간 측정 : with stage("match"): ...
+@contextmanager
+def stage(name: str):
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - t)
+
+
+# with 블록 동안 stage()별 소요 시간(초) 목록 수집 : with collect_stages() as samples: ... -> {"match": [...], ...}
+@contextmanager
+def collect_stages():
+    global _STAGE_SINK
+    prev, _STAGE_SINK = _STAGE_SINK, {}
+    try:
+        yield _STAGE_SINK
+    finally:
+        _STAGE_SINK = prev
+
+
+# Prometheus 텍스트 포맷으로 전체 출력
+def render() -> str:
+    lines = []
+    for m in _METRICS:
+        lines.extend(m.render())
+
+    # 같은 이름의 collector 값은 HELP/TYPE 한 번만 쓰고 샘플을 모아서 출력
+    grouped = {}
+    for fn in _COLLECTORS:
+        try:
+            for name, kind, help, samples in fn():
+                entry = grouped.setdefault(name, (kind, help, []))
+                entry[2].extend(samples)
+        except Exception: # 통계 하나가 실패해도 나머지는 출력
+            continue
+    for name, (kind, help, samples) in grouped.items():
+        lines.append(f"# HELP {name} {help}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_num(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,35 @@
+import time
+
+from leftovers.core.metrics import metrics, profiler
+
+
+# HTTP 요청 지연시간 히스토그램 (메서드, 라우트 경로, 상태 코드) + 선택적 샘플링 프로파일링
+# BaseHTTPMiddleware 대신 순수 ASGI로 구현 -> 요청마다 추가 태스크/스트림 복사 없음
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        sampler = profiler.start() if profiler.should_profile(headers) else None
+        status = [500] # 예외로 응답이 안 나가면 500
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if sampler is not None: # 저장될 프로파일 id를 응답 헤더로
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", sampler.id.encode())]}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            route = scope.get("route") # 라우트 템플릿 경로 (매칭 안 되면 unmatched -> 라벨 수 폭증 방지)
+            path = getattr(route, "path", "unmatched")
+            metrics.HTTP_SECONDS.observe(time.perf_counter() - started, method=scope["method"], path=path, status=str(status[0]))
+            if sampler is not None:
+                profiler.save(sampler, path)
@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from leftovers.core.config.config import settings
+
+_cfg = settings()
+
+
+# 샘플링 프로파일러 : 켜져 있는 동안 주기적으로 모든 스레드의 스택을 떠서 개수를 셈
+# 결과는 folded stack 형식 ("바깥;...;안쪽 개수") -> flamegraph.pl / speedscope에 그대로 넣으면 플레임 그래프
+class StackSampler:
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.id = uuid.uuid4().hex[:12] # 응답 헤더(X-Profile-Id)와 저장 파일명에 사용
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid))) # 맨 아래는 스레드 이름
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+# 이 요청을 프로파일링할지 : X-Profile: 1 헤더(관리자 토큰 필요) 또는 PROFILE_SAMPLE_RATE 비율로 무작위
+def should_profile(headers: dict) -> bool:
+    if headers.get("x-profile") == "1":
+        token = _cfg["admin_token"]
+        return bool(token) and headers.get("x-admin-token") == token
+    rate = _cfg["profile_sample_rate"]
+    return rate > 0 and random.random() < rate
+
+
+def start() -> StackSampler:
+    return StackSampler(_cfg["profile_interval_s"]).start()
+
+
+# 샘플러 결과를 PROFILE_DIR에 저장 (파일명 : 시각-경로-id.folded)
+# 샘플링 주기보다 짧게 끝난 요청은 빈 파일 (응답 헤더의 id와 파일이 항상 대응되도록)
+def save(sampler: StackSampler, label: str) -> Path:
+    counts = sampler.stop()
+    out = Path(_cfg["profile_dir"])
+    out.mkdir(parents=True, exist_ok=True)
+    safe = "".join(ch if ch.isalnum() else "_" for ch in label).strip("_") or "root"
+    path = out / f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}-{sampler.id}.folded"
+    path.write_text("".join(f"{stack} {n}\n" for stack, n in counts.most_common()), encoding="utf-8")
+    return path
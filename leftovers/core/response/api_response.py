@@ -1,22 +1,36 @@
-from typing import Generic, Optional, TypeVar
-from pydantic.generics import GenericModel
+from functools import lru_cache
+from typing import Any, Generic, Optional, TypeVar
+from pydantic import BaseModel
+from pydantic_core import to_json
+from fastapi.responses import Response
 from datetime import datetime, timezone
 
+try: # 있으면 orjson으로 직렬화 (선택 의존성, 없으면 pydantic_core.to_json)
+    import orjson
+except ImportError:
+    orjson = None
+
 T = TypeVar("T")
 
 # API 응답을 감싸는 공통 래퍼 dto
-class Envelope(GenericModel, Generic[T]):
+class Envelope(BaseModel, Generic[T]):
     isSuccess: bool
     httpStatus: int
     data: Optional[T] = None
     timeStamp: str
 
+# Envelope[tp] 파라미터화 캐시 : response_model 선언 등에서 같은 타입이면 같은 클래스 재사용
+@lru_cache(maxsize=None)
+def envelope(tp) -> type:
+    return Envelope[tp]
+
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 # 성공 응답을 Envelope 형태로 감싸서 반환
+# 내부에서 만든 데이터라 검증 없이 그대로 담음 (호출마다 Envelope[T] 클래스를 만들거나 data를 다시 검증하지 않음)
 def ok(data: T, http_status: int = 200) -> Envelope[T]:
-    return Envelope[T](
+    return Envelope.model_construct(
         isSuccess=True,
         httpStatus=http_status,
         data=data,
@@ -25,9 +39,52 @@ def ok(data: T, http_status: int = 200) -> Envelope[T]:
 
 # 실패 응답을 Envelope 형태로 감싸서 반환
 def fail(http_status: int, data: Optional[dict] = None) -> Envelope[dict]:
-    return Envelope[dict](
+    return Envelope.model_construct(
         isSuccess=False,
         httpStatus=http_status,
         data=data or {},
         timeStamp=now_iso(),
-    )
\ No newline at end of file
+    )
+
+# orjson이 모르는 타입 처리 : pydantic 모델은 dict로, numpy 스칼라/배열은 파이썬 값으로
+def _default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"직렬화할 수 없는 타입: {type(obj).__name__}")
+
+# 응답 JSON 바이트 (공백 없는 UTF-8, NaN/inf는 null)
+# pydantic 모델은 pydantic_core 직렬화가 가장 빠르고 (dict로 바꿨다가 orjson으로 쓰면 두 번 순회), dict/list만 있으면 orjson이 더 빠름
+def dumps(obj: Any, models: bool = False) -> bytes:
+    if orjson is None or models:
+        return to_json(obj)
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _is_model(data: Any) -> bool:
+    return isinstance(data, BaseModel) or (isinstance(data, list) and bool(data) and isinstance(data[0], BaseModel))
+
+# 검증 없이 바로 JSON 바이트로 내보내는 응답 : 라우트에서 반환하면 response_model 재검증/jsonable_encoder를 건너뜀
+# 내부에서 만든(이미 검증된) 데이터에만 사용
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, Envelope):
+            content = {
+                "isSuccess": content.isSuccess,
+                "httpStatus": content.httpStatus,
+                "data": content.data,
+                "timeStamp": content.timeStamp,
+            }
+        data = content.get("data") if isinstance(content, dict) else content
+        return dumps(content, models=_is_model(data))
+
+# ok()를 바로 FastJSONResponse로 (Envelope 모델 생성도 생략)
+def ok_response(data: Any, http_status: int = 200) -> FastJSONResponse:
+    return FastJSONResponse({
+        "isSuccess": True,
+        "httpStatus": http_status,
+        "data": data,
+        "timeStamp": now_iso(),
+    })
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Header, HTTPException
+from typing import Optional
+
+from leftovers.core.config.config import settings
+from leftovers.core.response.api_response import envelope, ok
+from leftovers.domain.recommend.service import loader
+
+import asyncio
+import time
+
+router = APIRouter(prefix="/admin")
+
+# 관리자 토큰 확인 : ADMIN_TOKEN이 없으면 관리자 API 자체를 막음
+def _check_token(token: Optional[str]):
+    expected = settings()["admin_token"]
+    if not expected:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN이 설정되지 않아 관리자 API가 비활성화되어 있습니다.")
+    if token != expected:
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+
+# 모델/인덱스 무중단 재로딩 : 새 스냅샷은 스레드에서 만들고 완성되면 교체
+# 처리 중인 요청은 시작할 때 잡은 이전 스냅샷으로 끝까지 처리됨
+@router.post("/reload", response_model=envelope(dict))
+async def reload(x_admin_token: Optional[str] = Header(None)):
+    _check_token(x_admin_token)
+    if loader.reloading():
+        raise HTTPException(status_code=409, detail="이미 재로딩 중입니다.")
+
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        snap = await loop.run_in_executor(None, loader.load_all)
+    except Exception as e: # 실패하면 기존 스냅샷 유지
+        raise HTTPException(status_code=500, detail=f"재로딩 실패, 기존 모델 유지: {e!r}")
+
+    return ok({
+        "generation": snap.generation,
+        "rows": len(snap.name_list),
+        "took_s": round(time.perf_counter() - started, 3),
+    })
@@ -1,38 +1,103 @@
-from fastapi import APIRouter
-from leftovers.core.response.api_response import Envelope, ok, fail
-from leftovers.domain.recommend.schemas.recommend_request import RecommendReq
-from leftovers.domain.recommend.schemas.recommend_response import RecommendRes
-from leftovers.domain.recommend.service import evaluator, loader
+from fastapi import APIRouter, HTTPException
+from leftovers.core.cache.lru_cache import LRUCache
+from leftovers.core.config.config import settings
+from leftovers.core.metrics import metrics
+from leftovers.core.response.api_response import FastJSONResponse, envelope, fail, ok, ok_response
+from leftovers.domain.recommend.schemas.recommend_request import CatalogReq, RecommendReq, SubstituteReq
+from leftovers.domain.recommend.schemas.recommend_response import CatalogItem, CatalogRes, RecommendRes, SubstituteRes
+from leftovers.domain.recommend.service import batcher, evaluator, loader, matcher
+from leftovers.domain.recommend.service.catalog import top_foods
+from leftovers.domain.recommend.service.food_table import FOOD_COLS
 
-import time
+import asyncio
 
 router = APIRouter(prefix="/menus")
 
-@router.post("/recommend", response_model=Envelope[RecommendRes])
-def recommend(req: RecommendReq):
-    start = time.time()
-    if not loader._DB_ROWS: # DB, 모델이 안 불러와졌으면 500 에러
-        return fail(500, {"message": "DB/모델이 비어있습니다."}).model_dump()
-    if req.concept not in loader.CONCEPTS: # 컨셉명이 올바르지 않으면 400 에러
-        return fail(400, {"message": f"알 수 없는 컨셉: {req.concept}"}).model_dump()
-    
-    after_load = time.time()
+# 추천 응답 캐시 : (세대, 컨셉, 개수, 메뉴 목록) -> RecommendRes / 스냅샷이 바뀌면 비움
+_cfg = settings()
+_RESPONSE_CACHE = LRUCache(_cfg["response_cache_size"], _cfg["response_cache_ttl_s"])
+metrics.register_cache("recommend_response", _RESPONSE_CACHE.stats)
 
-    # 요청 메뉴를 돌면서 evaluate_items 호출
-    items = evaluator.evaluate_items(req.concept, req.items)
+# 성공 응답 직렬화 : 이미 검증된 응답 모델을 바로 JSON 바이트로 (response_model 재검증 생략, 직렬화 시간은 따로 측정)
+def _respond(res) -> FastJSONResponse:
+    with metrics.stage("serialize"):
+        return ok_response(res)
 
-    after_evaluate = time.time()
+@router.post("/recommend", response_model=envelope(RecommendRes))
+async def recommend(req: RecommendReq):
+    snap = loader.current() # 요청 처리 중에 재로딩되어도 이 스냅샷만 사용
+    if snap is None or not len(snap.foods): # DB, 모델이 안 불러와졌으면 500 에러
+        return FastJSONResponse(fail(500, {"message": "DB/모델이 비어있습니다."}), status_code=500)
+    if req.concept not in snap.concept_index: # 컨셉명이 로딩된 컨셉 정의에 없으면 400 에러
+        return FastJSONResponse(fail(400, {"message": f"알 수 없는 컨셉: {req.concept}", "allowed": snap.concepts}), status_code=400)
 
-    ranked = [r for r in items if r.matched_name] # 이름이 매칭되지 않으면 제외
-    ranked.sort(key=lambda r: (r.suitability, r.similarity), reverse=True) # 적합도와 유사도가 높은 순으로 정렬
-    topn = ranked[: max(1, int(req.count))] # 요청한 개수만큼만 반환
-    after_ranked = time.time()
+    # 같은 요청이면 캐시된 결과 반환 (메뉴 순서/중복이 결과에 영향을 주므로 목록 그대로 키로 사용)
+    _RESPONSE_CACHE.sync(snap.generation)
+    key = (snap.generation, req.concept, int(req.count), tuple(req.items))
+    cached = _RESPONSE_CACHE.get(key)
+    if cached is not None:
+        return _respond(cached)
 
-    res = RecommendRes(concept=req.concept, count=len(topn), items=topn)
+    # 매칭/점수 계산은 이벤트 루프 밖 전용 스레드 풀에서 : 짧은 시간 안에 들어온 요청들과 묶어서 한 번에 처리
+    try:
+        items = await batcher.evaluate(req.concept, req.items, snap)
+    except asyncio.QueueFull: # 대기열이 가득 차면 기다리게 하지 않고 바로 거절
+        raise HTTPException(status_code=503, detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.")
 
-    print(f"[DEBUG] 0. start {(start):.3f}s")
-    print(f"[DEBUG] 1. Loader check took {(after_load):.3f}s")
-    print(f"[DEBUG] 2. Evaluation took {(after_evaluate):.3f}s")
-    print(f"[DEBUG] 3. Ranking took {(after_ranked):.3f}s")
+    with metrics.stage("rank"):
+        ranked = [r for r in items if r.matched_name] # 이름이 매칭되지 않으면 제외
+        ranked.sort(key=lambda r: (r.suitability, r.similarity), reverse=True) # 적합도와 유사도가 높은 순으로 정렬
+        topn = ranked[: max(1, int(req.count))] # 요청한 개수만큼만 반환
+        res = RecommendRes(concept=req.concept, count=len(topn), items=topn)
+    _RESPONSE_CACHE.put(key, res)
 
-    return ok(res)
+    return _respond(res)
+
+
+# 전체 DB에서 컨셉 점수 상위 음식 조회 (영양 성분 범위 조건 선택) : 로딩 시 만든 정렬 인덱스만 사용, 요청마다 점수 재계산 없음
+@router.post("/catalog", response_model=envelope(CatalogRes))
+async def catalog(req: CatalogReq):
+    snap = loader.current()
+    if snap is None or not len(snap.foods):
+        return FastJSONResponse(fail(500, {"message": "DB/모델이 비어있습니다."}), status_code=500)
+    if req.concept not in snap.concept_index:
+        return FastJSONResponse(fail(400, {"message": f"알 수 없는 컨셉: {req.concept}", "allowed": snap.concepts}), status_code=400)
+    unknown = sorted((set(req.min) | set(req.max)) - set(FOOD_COLS))
+    if unknown: # 영양 성분 이름이 올바르지 않으면 400 에러
+        return FastJSONResponse(fail(400, {"message": f"알 수 없는 영양 성분: {', '.join(unknown)}", "allowed": FOOD_COLS}), status_code=400)
+
+    with metrics.stage("catalog"):
+        col = snap.concept_index[req.concept]
+        scores = snap.score_table[:, col]
+        bounds = {k: (req.min.get(k), req.max.get(k)) for k in set(req.min) | set(req.max)}
+        rows = top_foods(snap.catalog, snap.foods, scores, col, int(req.count), bounds)
+        items = [
+            CatalogItem(
+                name=snap.foods.names[i],
+                suitability=int(round(float(scores[i]))),
+                nutrition={k: (None if v != v else round(v, 2)) for k, v in zip(FOOD_COLS, snap.foods.cols[:, i].tolist())},
+            )
+            for i in rows.tolist()
+        ]
+        res = CatalogRes(concept=req.concept, count=len(items), items=items)
+    return _respond(res)
+
+
+# 메뉴별 더 건강한 대체 음식 : 영양 성분이 가까운 음식 중 컨셉 적합도가 더 높은 것 (로딩 시 만든 영양 벡터로 전수 거리 계산)
+@router.post("/substitutes", response_model=envelope(SubstituteRes))
+async def substitutes(req: SubstituteReq):
+    snap = loader.current()
+    if snap is None or not len(snap.foods):
+        return FastJSONResponse(fail(500, {"message": "DB/모델이 비어있습니다."}), status_code=500)
+    if req.concept not in snap.concept_index:
+        return FastJSONResponse(fail(400, {"message": f"알 수 없는 컨셉: {req.concept}", "allowed": snap.concepts}), status_code=400)
+
+    # 매칭 + 거리 계산은 추천과 같은 전용 스레드 풀에서
+    items = await batcher.run(evaluator.substitute_items, req.concept, req.items, int(req.k), int(req.min_gain), snap)
+    return _respond(SubstituteRes(concept=req.concept, items=items))
+
+
+# 매칭 통계 (해시 인덱스 적중률, 캐시 hit/miss/eviction)
+@router.get("/stats")
+def stats():
+    return ok({"match": matcher.stats(), "response_cache": _RESPONSE_CACHE.stats(), "batcher": batcher.stats()})
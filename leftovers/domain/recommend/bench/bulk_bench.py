@@ -0,0 +1,43 @@
+# 벌크 점수 계산 처리량 : 워커 수별 items/s, 1워커 대비 배율 (코어 수에 거의 비례해야 정상)
+# 실행 : python -m leftovers.domain.recommend.bench.bulk_bench [--n 50000] [--workers 1 2 4 8]
+import argparse
+import os
+import random
+import time
+
+from leftovers.domain.recommend.service import bulk, loader, matcher
+
+
+# DB 이름 일부는 그대로, 나머지는 끝 글자를 바꿔서 ANN 경로도 타도록
+def _menus(names, n: int, seed: int):
+    rnd = random.Random(seed)
+    for i in range(n):
+        name = rnd.choice(names)
+        yield i, (name if i % 3 == 0 else name[:-1] + str(rnd.randrange(100)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50000)
+    ap.add_argument("--seed", type=int, default=0)
+    cpus = os.cpu_count() or 1
+    ap.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus} & set(range(1, cpus + 1))))
+    ap.add_argument("--chunk-size", type=int, default=bulk.CHUNK_SIZE)
+    args = ap.parse_args()
+
+    snap = loader.load_all()
+    print(f"rows={len(snap.name_list)} menus={args.n} cpus={cpus}")
+
+    base = None
+    for w in args.workers:
+        matcher._CACHE.clear() # fork된 워커가 부모 캐시를 물려받지 않도록
+        t = time.perf_counter()
+        count = sum(1 for _ in bulk.score_stream(_menus(snap.name_list, args.n, args.seed), workers=w, chunk_size=args.chunk_size))
+        el = time.perf_counter() - t
+        rate = count / el
+        base = base or rate
+        print(f"workers={w:<3} {el:7.2f}s  {rate:9.0f} items/s  x{rate / base:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# 전체 DB 컨셉 상위 N개 조회 : 전수 필터 + 정렬(naive) vs 정렬 인덱스(top_foods) 결과 일치 확인 + 지연시간
+# --scale k : 음식 테이블을 k배로 복제해서 행 수가 늘어날 때 지연시간 변화 확인
+# 실행 : python -m leftovers.domain.recommend.bench.catalog_bench [--queries 300] [--scale 1 4 16]
+import argparse
+import random
+import time
+import numpy as np
+
+from leftovers.domain.recommend.service import loader
+from leftovers.domain.recommend.service.catalog import build_catalog_index, top_foods
+from leftovers.domain.recommend.service.food_table import FOOD_COLS, FoodTable
+
+
+def _pct(ts, p):
+    return float(np.percentile(np.asarray(ts) * 1000, p))
+
+
+# 요청마다 전체 행을 거르고 점수로 정렬 (경계는 top_foods와 같이 컬럼 dtype인 float32로 비교)
+def _naive(foods: FoodTable, scores, n, bounds):
+    ok = np.ones(len(foods), dtype=bool)
+    for key, (lo, hi) in bounds.items():
+        v = foods.col(key)
+        if lo is not None:
+            ok &= v >= np.float32(lo)
+        if hi is not None:
+            ok &= v <= np.float32(hi)
+    rows = np.nonzero(ok)[0]
+    return rows[np.lexsort((rows, -scores[rows]))][:n]
+
+
+# 경계값 : 분위수 또는 실제 컬럼 값에 float32 반올림 오차보다 작은 값을 더하거나 뺀 값 (경계값과 같은 행의 포함 여부 확인)
+def _edge(col: np.ndarray, q: float, rnd: random.Random) -> float:
+    if rnd.random() < 0.3:
+        v = float(col[rnd.randrange(len(col))])
+        return v + rnd.choice([-1, 1]) * abs(v) * 1e-9
+    return float(np.quantile(col, q))
+
+
+# 성분 0~3개, 상한/하한은 실제 분포의 분위수에서 (아주 좁은 조건부터 거의 전부 통과하는 조건까지)
+def _queries(foods: FoodTable, n_concepts: int, count: int, seed: int):
+    rnd = random.Random(seed)
+    qs = []
+    for _ in range(count):
+        bounds = {}
+        for key in rnd.sample(FOOD_COLS, rnd.randint(0, 3)):
+            col = foods.col(key)
+            col = col[~np.isnan(col)]
+            lo = _edge(col, rnd.random() * 0.5, rnd) if rnd.random() < 0.3 else None
+            hi = _edge(col, 0.05 + rnd.random() * 0.95, rnd) if lo is None or rnd.random() < 0.5 else None
+            bounds[key] = (lo, hi)
+        qs.append((rnd.randrange(n_concepts), rnd.choice([1, 10, 20, 100]), bounds))
+    return qs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 4, 16])
+    args = ap.parse_args()
+
+    snap = loader.load_all()
+    for k in args.scale:
+        foods = FoodTable(names=snap.foods.names * k, cols=np.ascontiguousarray(np.tile(np.asarray(snap.foods.cols), k)))
+        table = np.tile(snap.score_table, (k, 1))
+        t = time.perf_counter()
+        index = build_catalog_index(foods, table)
+        build_s = time.perf_counter() - t
+
+        naive_ts, index_ts = [], []
+        for concept, n, bounds in _queries(foods, table.shape[1], args.queries, args.seed):
+            scores = table[:, concept]
+            t = time.perf_counter()
+            ref = _naive(foods, scores, n, bounds)
+            naive_ts.append(time.perf_counter() - t)
+            t = time.perf_counter()
+            got = top_foods(index, foods, scores, concept, n, bounds)
+            index_ts.append(time.perf_counter() - t)
+            assert np.array_equal(ref, got), f"결과 불일치 concept={concept} n={n} bounds={bounds}"
+
+        print(f"rows={len(foods):>8} build={build_s * 1000:7.1f}ms  "
+              f"naive p50={_pct(naive_ts, 50):7.3f}ms p99={_pct(naive_ts, 99):7.3f}ms  "
+              f"index p50={_pct(index_ts, 50):7.3f}ms p99={_pct(index_ts, 99):7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
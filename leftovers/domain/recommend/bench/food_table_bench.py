@@ -0,0 +1,77 @@
+# 행 dict 리스트(db_rows + db_feats) vs FoodTable : 워커 하나당 RSS 비교
+# 모드마다 새 프로세스에서 측정 (이전 측정의 힙이 섞이지 않도록)
+# 실행 : python -m leftovers.domain.recommend.bench.food_table_bench [--repeat 10] [--snapshot]
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+from leftovers.domain.recommend.service.food_kfda_loader import load_kfda_columns, NUM_COLS
+from leftovers.domain.recommend.service.food_table import build_food_table, feats_from_columns
+from leftovers.domain.recommend.service.loader import FOOD_FILES, MODEL_DIR
+
+
+# 현재 프로세스 RSS (MB) : /proc 기준 (리눅스)
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+# 한 프로세스에서 구조 하나를 만들고 증가한 RSS 측정
+def _measure(mode: str, repeat: int) -> dict:
+    names, nums = load_kfda_columns(FOOD_FILES, cache_dir=f"{MODEL_DIR}/kfda_cache")
+    names = [str(n) for n in np.tile(names, repeat)] # 실제 DB 크기를 흉내내기 위해 행 복제 (이름 문자열은 각각 별도 객체)
+    nums = np.tile(nums, (repeat, 1))
+    gc.collect()
+    before = _rss_mb()
+
+    if mode == "rows": # 기존 구조 : 행마다 dict + (N, 9) float32 피처
+        feats = feats_from_columns(nums).astype(np.float32)
+        data = ([{"name": n, **dict(zip(NUM_COLS, v))} for n, v in zip(names, nums.tolist())], feats)
+    else:
+        data = build_food_table(names, feats_from_columns(nums))
+
+    gc.collect() # 입력 컬럼(names, nums)은 두 모드 모두 살아있으므로 증가분은 구조 자체 비용
+    return {"mode": mode, "rows": len(names), "rss_delta_mb": round(_rss_mb() - before, 1)}
+
+
+# 스냅샷 전체를 올린 워커 RSS
+def _measure_snapshot() -> dict:
+    from leftovers.domain.recommend.service import loader
+    before = _rss_mb()
+    snap = loader.load_all()
+    gc.collect()
+    return {"mode": "snapshot", "rows": len(snap.foods), "rss_before_mb": round(before, 1), "rss_after_mb": round(_rss_mb(), 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=10, help="행 복제 배수")
+    ap.add_argument("--snapshot", action="store_true", help="전체 스냅샷 로딩 후 워커 RSS도 측정")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child: # 자식 프로세스 : 측정 결과를 JSON 한 줄로 출력
+        out = _measure_snapshot() if args.child == "snapshot" else _measure(args.child, args.repeat)
+        print(json.dumps(out))
+        return
+
+    modes = ["rows", "table"] + (["snapshot"] if args.snapshot else [])
+    results = {}
+    for mode in modes:
+        cmd = [sys.executable, "-m", __spec__.name, "--child", mode, "--repeat", str(args.repeat)]
+        line = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1]
+        results[mode] = json.loads(line)
+        print(results[mode])
+
+    rows, table = results["rows"]["rss_delta_mb"], results["table"]["rss_delta_mb"]
+    print(f"rows={results['rows']['rows']}  dict rows={rows}MB  FoodTable={table}MB  "
+          f"saved={rows - table:.1f}MB per worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# 행 단위(iterrows) vs 컬럼 단위 KFDA 로딩 : 결과 일치 확인 + 속도 비교 (캐시 미사용/사용)
+# 실행 : python -m leftovers.domain.recommend.bench.ingest_bench [--files a.xlsx b.xlsx]
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+
+from leftovers.domain.recommend.service import food_kfda_loader as kfda
+from leftovers.domain.recommend.service.loader import FOOD_FILES
+
+# 기존 구현 그대로 : 엑셀 -> 행마다 _row_to_dict -> 필터
+def _rowwise(files, sheet_name=None) -> list[dict]:
+    rows = []
+    for path in files:
+        df = kfda._read_excel(path, sheet_name)
+        rows.extend(kfda._row_to_dict(r) for _, r in df.iterrows())
+    rows = [r for r in rows if r.get("name")]
+    return [r for r in rows if any(np.isfinite(r.get(k, np.nan)) for k in kfda.NUM_COLS)]
+
+
+# NaN까지 포함해 값/타입/키 순서가 같은지 확인
+def _same(a: list[dict], b: list[dict]) -> bool:
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if list(x) != list(y):
+            return False
+        for k in x:
+            u, v = x[k], y[k]
+            if type(u) is not type(v):
+                return False
+            if isinstance(u, float) and u != u:
+                if v == v:
+                    return False
+            elif u != v:
+                return False
+    return True
+
+
+def _timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", nargs="+", default=FOOD_FILES)
+    args = ap.parse_args()
+
+    ref, t_row = _timed(lambda: _rowwise(args.files))
+    cache_dir = tempfile.mkdtemp(prefix="kfda_cache_")
+    try:
+        col, t_col = _timed(lambda: kfda.load_kfda_excels(args.files))
+        cold, t_cold = _timed(lambda: kfda.load_kfda_excels(args.files, cache_dir=cache_dir))
+        warm, t_warm = _timed(lambda: kfda.load_kfda_excels(args.files, cache_dir=cache_dir))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    for label, out in (("columnar", col), ("cache cold", cold), ("cache warm", warm)):
+        assert _same(ref, out), f"{label}: 행 단위 결과와 다름"
+
+    print(f"rows={len(ref)}")
+    print(f"iterrows     {t_row * 1000:9.1f}ms")
+    print(f"columnar     {t_col * 1000:9.1f}ms  x{t_row / max(t_col, 1e-9):6.1f}")
+    print(f"cache cold   {t_cold * 1000:9.1f}ms  x{t_row / max(t_cold, 1e-9):6.1f}")
+    print(f"cache warm   {t_warm * 1000:9.1f}ms  x{t_row / max(t_warm, 1e-9):6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# ANN(HNSW) 매칭 vs 전수 코사인 top-1 비교 : recall@1 / 지연시간
+# --curve : (ef, 후보 수 k, reranker) 조합별 정확도/지연시간 곡선 (MATCH_EF / MATCH_K / MATCH_RERANKER 튜닝용)
+# 실행 : python -m leftovers.domain.recommend.bench.match_bench [--n 500] [--seed 0] [--curve]
+import argparse
+import itertools
+import random
+import re
+import time
+import numpy as np
+
+from leftovers.domain.recommend.service import loader, matcher
+
+
+# DB 이름을 사용자 입력처럼 변형 (괄호 제거, 공백 삽입, 글자 누락)
+def _perturb(name: str, rnd: random.Random) -> str:
+    ops = [
+        lambda s: re.sub(r"\(.*?\)", "", s).strip(),
+        lambda s: s[: len(s) // 2] + " " + s[len(s) // 2:],
+        lambda s: s if len(s) < 3 else (lambda i: s[:i] + s[i + 1:])(rnd.randrange(len(s))),
+        lambda s: s.replace(" ", ""),
+    ]
+    return rnd.choice(ops)(name) or name
+
+
+def _pct(ts, p):
+    return float(np.percentile(np.asarray(ts) * 1000, p))
+
+
+# 정답 : TF-IDF 공간 전수 코사인 (행은 이미 L2 정규화)
+def _exact_top1(q: str, snap) -> str:
+    sims = (snap.name_mat @ snap.name_vec.transform([q]).T).toarray().ravel()
+    return snap.name_list[int(np.argmax(sims))]
+
+
+# 조합 하나 측정 : 쿼리마다 match_best 한 번 (ANN 캐시는 비우고 시작)
+def _run(snap, queries, sources, exact, ef, k, reranker) -> dict:
+    if hasattr(snap.hnsw_index, "set_ef"):
+        snap.hnsw_index.set_ef(max(ef, k))
+    matcher._CACHE.clear()
+
+    ts, hit_exact, hit_src, margins = [], 0, 0, []
+    for q, src, ex in zip(queries, sources, exact):
+        t = time.perf_counter()
+        _, names, _, m, _ = matcher.match_best([q], k=k, reranker=reranker, snap=snap)
+        ts.append(time.perf_counter() - t)
+        hit_exact += names[0] == ex
+        hit_src += names[0] == src
+        margins.append(m[0])
+
+    n = max(len(queries), 1)
+    m = np.asarray(margins)
+    return {
+        "ef": ef, "k": k, "reranker": reranker,
+        "recall": hit_exact / n, "acc": hit_src / n,
+        "p50": _pct(ts, 50), "p95": _pct(ts, 95), "p99": _pct(ts, 99),
+        "low_margin": float(np.mean(m[np.isfinite(m)] < 0.05)) if np.isfinite(m).any() else float("nan"),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--curve", action="store_true", help="ef x k x reranker 조합별 정확도/지연시간")
+    ap.add_argument("--ef", type=int, nargs="+", default=[10, 50, 100, 200])
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    ap.add_argument("--reranker", nargs="+", default=["none", "tfidf", "rapidfuzz"])
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    snap = loader.load_all()
+    print(f"load_all {time.perf_counter() - t0:.2f}s / rows={len(snap.name_list)}")
+
+    rnd = random.Random(args.seed)
+    pairs = {}
+    for _ in range(args.n):
+        src = rnd.choice(snap.name_list)
+        pairs.setdefault(_perturb(src, rnd), src)
+    pairs = {q: s for q, s in pairs.items() if matcher.lookup_exact(q, snap)[0] is None} # 해시 인덱스에 없는 쿼리만 측정
+    queries, sources = list(pairs), list(pairs.values())
+
+    exact_ts, exact = [], []
+    for q in queries:
+        t = time.perf_counter()
+        exact.append(_exact_top1(q, snap))
+        exact_ts.append(time.perf_counter() - t)
+
+    if not args.curve:
+        r = _run(snap, queries, sources, exact, matcher._cfg["match_ef"], 1, "none")
+        print(f"queries={len(queries)}  recall@1={r['recall']:.3f}")
+        print(f"ann   p50={r['p50']:.3f}ms p95={r['p95']:.3f}ms")
+        print(f"exact p50={_pct(exact_ts, 50):.3f}ms p95={_pct(exact_ts, 95):.3f}ms")
+        return
+
+    # recall : 전수 TF-IDF top-1과 일치 / acc : 변형 전 원래 이름과 일치 / low_margin : 마진 0.05 미만 비율
+    print(f"queries={len(queries)}  exact p50={_pct(exact_ts, 50):.3f}ms p99={_pct(exact_ts, 99):.3f}ms")
+    print(f"{'ef':>4} {'k':>3} {'reranker':>9} {'recall':>7} {'acc':>6} {'p50ms':>7} {'p95ms':>7} {'p99ms':>7} {'low_margin':>10}")
+    for ef, k, reranker in itertools.product(args.ef, args.k, args.reranker):
+        if k == 1 and reranker != "none": # 후보 1개면 재정렬 의미 없음
+            continue
+        r = _run(snap, queries, sources, exact, ef, k, reranker)
+        print(f"{ef:>4} {k:>3} {reranker:>9} {r['recall']:>7.3f} {r['acc']:>6.3f} "
+              f"{r['p50']:>7.3f} {r['p95']:>7.3f} {r['p99']:>7.3f} {r['low_margin']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
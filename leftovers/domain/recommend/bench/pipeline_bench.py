@@ -0,0 +1,315 @@
+# 추천/매칭 파이프라인 전체 벤치마크 : 실제 model_store를 읽어서 커밋 간 성능 회귀를 비교
+#  - 워크로드 : DB 이름 그대로(exact) / 변형(fuzzy) / DB에 없는 이름(unknown)을 섞은 메뉴 1/15/100개 요청
+#  - direct : evaluate_many 직접 호출 (단계별 match/embed/ann/rerank/score_lookup)
+#  - http : 프로세스 내 ASGI 클라이언트로 POST /menus/recommend (batch_wait/rank/serialize 포함, 동시 요청 수 --concurrency)
+#  - cold : 새 프로세스에서 import + load_all 시간 (--cold-runs)
+#  - train : train.main 시간 (--train, model_store를 다시 씀)
+# 결과는 JSON으로 저장 (--out), --compare 기준 JSON과 비교해서 --threshold 넘게 나빠진 항목이 있으면 종료 코드 1
+# 실행 : python -m leftovers.domain.recommend.bench.pipeline_bench [--requests 200] [--out bench.json] [--compare base.json]
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+
+from leftovers.core.config.config import settings
+from leftovers.core.metrics import metrics
+from leftovers.domain.recommend.bench.match_bench import _perturb
+from leftovers.domain.recommend.service import evaluator, loader, matcher
+
+SIZES = (1, 15, 100)
+PCTS = (50, 95, 99)
+
+
+# DB에 없을 법한 이름 : 무작위 한글 음절 2~6자
+def _unknown(rnd: random.Random) -> str:
+    return "".join(chr(0xAC00 + rnd.randrange(11172)) for _ in range(rnd.randint(2, 6)))
+
+
+# 메뉴 이름 하나 : mix = (exact, fuzzy, unknown) 비율
+def _menu(names, mix, rnd: random.Random) -> str:
+    p = rnd.random()
+    if p < mix[0]:
+        return rnd.choice(names)
+    if p < mix[0] + mix[1]:
+        return _perturb(rnd.choice(names), rnd)
+    return _unknown(rnd)
+
+
+# 요청 목록 : [(컨셉, [메뉴...]), ...] (시드 고정 -> 커밋이 달라도 같은 워크로드)
+def make_workload(names, concepts, size: int, n: int, mix, seed: int):
+    rnd = random.Random(f"{seed}:{size}")
+    return [(concepts[i % len(concepts)], [_menu(names, mix, rnd) for _ in range(size)]) for i in range(n)]
+
+
+# 초 단위 샘플 -> 밀리초 백분위수
+def summarize(samples) -> dict:
+    ts = np.asarray(samples, dtype=np.float64) * 1000
+    if ts.size == 0:
+        return {"n": 0}
+    out = {"n": int(ts.size), "mean_ms": round(float(ts.mean()), 4)}
+    for p in PCTS:
+        out[f"p{p}_ms"] = round(float(np.percentile(ts, p)), 4)
+    return out
+
+
+# direct : 요청 하나씩 evaluate_many 호출 (HTTP/배칭 없이 순수 계산 경로)
+def bench_direct(snap, warm, workload) -> dict:
+    for concept, menus in warm:
+        evaluator.evaluate_many([(concept, menus)], snap)
+
+    lat = []
+    with metrics.collect_stages() as stages:
+        t0 = time.perf_counter()
+        for concept, menus in workload:
+            t = time.perf_counter()
+            evaluator.evaluate_many([(concept, menus)], snap)
+            lat.append(time.perf_counter() - t)
+        el = time.perf_counter() - t0
+
+    items = sum(len(m) for _, m in workload)
+    return {
+        "rps": round(len(workload) / el, 2),
+        "items_per_s": round(items / el, 1),
+        "latency": summarize(lat),
+        "stages": {k: summarize(v) for k, v in sorted(stages.items())},
+    }
+
+
+# http : httpx ASGI 트랜스포트로 앱을 프로세스 안에서 호출 (네트워크 없이 라우팅/검증/배칭/직렬화까지)
+async def _bench_http(app, warm, workload, concurrency: int) -> dict:
+    import httpx
+    from leftovers.domain.recommend.service import batcher
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(concept, menus):
+            t = time.perf_counter()
+            r = await client.post("/menus/recommend", json={"concept": concept, "count": 15, "items": menus})
+            return time.perf_counter() - t, r.status_code
+
+        for concept, menus in warm:
+            await call(concept, menus)
+
+        lat, errors = [], 0
+        queue = iter(workload)
+
+        async def worker():
+            nonlocal errors
+            for concept, menus in queue: # 같은 이터레이터를 나눠 가짐 -> 항상 concurrency개 요청이 진행 중
+                dt, status = await call(concept, menus)
+                lat.append(dt)
+                errors += status != 200
+
+        with metrics.collect_stages() as stages:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            el = time.perf_counter() - t0
+
+    await batcher.aclose()
+    items = sum(len(m) for _, m in workload)
+    return {
+        "concurrency": concurrency,
+        "rps": round(len(workload) / el, 2),
+        "items_per_s": round(items / el, 1),
+        "errors": errors,
+        "latency": summarize(lat),
+        "stages": {k: summarize(v) for k, v in sorted(stages.items())},
+    }
+
+
+def bench_http(warm, workload, concurrency: int) -> dict:
+    from main import app # lifespan은 실행하지 않음 (load_all은 이미 끝남, 감시 스레드 불필요)
+    return asyncio.run(_bench_http(app, warm, workload, concurrency))
+
+
+# 새 프로세스에서 실행한 코드의 마지막 줄(JSON) 반환
+def _subprocess_json(code: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+# cold : import + load_all (번들이 있으면 빠른 경로)
+def bench_cold(runs: int) -> dict:
+    code = (
+        "import json, time\n"
+        "t0 = time.perf_counter()\n"
+        "from leftovers.domain.recommend.service import loader\n"
+        "t1 = time.perf_counter()\n"
+        "loader.load_all()\n"
+        "t2 = time.perf_counter()\n"
+        "print(json.dumps({'import': t1 - t0, 'load_all': t2 - t1}))\n"
+    )
+    runs = [_subprocess_json(code) for _ in range(runs)]
+    return {k: summarize([r[k] for r in runs]) for k in ("import", "load_all")}
+
+
+# train : 전체 재학습(train.main(force=True), model_store/bundle을 새로 씀) + 바뀐 것 없을 때 증분 학습
+def bench_train(runs: int) -> dict:
+    code = (
+        "import contextlib, io, json, time\n"
+        "from leftovers.domain.recommend.service import train\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    t0 = time.perf_counter()\n"
+        "    train.main(force=True)\n"
+        "    t1 = time.perf_counter()\n"
+        "    train.main()\n"
+        "    t2 = time.perf_counter()\n"
+        "print(json.dumps({'train': t1 - t0, 'train_incremental': t2 - t1}))\n"
+    )
+    runs = [_subprocess_json(code) for _ in range(runs)]
+    return {k: summarize([r[k] for r in runs]) for k in ("train", "train_incremental")}
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+# 중첩 dict -> {"direct.15.latency.p95_ms": 값, ...}
+def _flatten(d, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}.{k}" if prefix else str(k)
+        if isinstance(v, dict):
+            out.update(_flatten(v, key))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+# 기준 결과와 비교 : 시간(_ms)은 커지면, 처리량(rps/items_per_s)은 작아지면 회귀
+def compare(base: dict, cur: dict, threshold: float) -> list:
+    b, c = _flatten(base["results"]), _flatten(cur["results"])
+    rows = []
+    for key in sorted(b.keys() & c.keys()):
+        old, new = b[key], c[key]
+        if key.endswith("_ms"):
+            higher_worse = True
+        elif key.endswith(("rps", "items_per_s")):
+            higher_worse = False
+        else:
+            continue
+        if old <= 0:
+            continue
+        change = (new - old) / old
+        regressed = change > threshold if higher_worse else change < -threshold
+        rows.append((key, old, new, change, regressed))
+    return rows
+
+
+def _print_compare(rows, base_meta, cur_meta, threshold: float, show_all: bool) -> int:
+    print(f"\ncompare {base_meta.get('git', '?')} -> {cur_meta.get('git', '?')} (threshold {threshold:.0%})")
+    for key in ("rows", "cpus", "requests", "mix", "seed", "cache", "config"): # 조건이 다르면 숫자 비교가 의미 없을 수 있음
+        if base_meta.get(key) != cur_meta.get(key):
+            print(f"  note: {key} differs ({base_meta.get(key)} -> {cur_meta.get(key)})")
+    print(f"{'metric':<48} {'base':>10} {'current':>10} {'change':>8}")
+    regressions = 0
+    for key, old, new, change, regressed in rows:
+        regressions += regressed
+        if show_all or regressed or abs(change) > threshold:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{key:<48} {old:>10.3f} {new:>10.3f} {change:>+8.1%}{flag}")
+    print(f"{regressions} regression(s) / {len(rows)} metrics")
+    return regressions
+
+
+def _print_run(name: str, r: dict):
+    lat = r["latency"]
+    print(f"{name:<10} {r['rps']:>9.1f} req/s {r['items_per_s']:>10.0f} items/s  "
+          f"p50={lat['p50_ms']:.3f}ms p95={lat['p95_ms']:.3f}ms p99={lat['p99_ms']:.3f}ms")
+    for stage, s in r["stages"].items():
+        print(f"  {stage:<14} n={s['n']:<6} p50={s['p50_ms']:.3f}ms p95={s['p95_ms']:.3f}ms p99={s['p99_ms']:.3f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200, help="요청 크기별 측정 요청 수")
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    ap.add_argument("--mix", type=float, nargs=3, default=[0.5, 0.35, 0.15], metavar=("EXACT", "FUZZY", "UNKNOWN"))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=16, help="http 측정 동시 요청 수")
+    ap.add_argument("--cache", action="store_true", help="매칭/응답 캐시 유지 (기본은 끄고 매번 계산)")
+    ap.add_argument("--skip", nargs="*", default=[], choices=["direct", "http", "cold"])
+    ap.add_argument("--cold-runs", type=int, default=3)
+    ap.add_argument("--train", type=int, default=0, metavar="RUNS", help="train.main 측정 횟수 (model_store를 다시 씀)")
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    ap.add_argument("--compare", help="비교할 기준 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=0.10, help="회귀로 볼 변화율 (기본 10%%)")
+    ap.add_argument("--show-all", action="store_true", help="비교 시 변화가 작은 항목도 출력")
+    args = ap.parse_args()
+
+    total = sum(args.mix)
+    mix = [m / total for m in args.mix]
+
+    snap = loader.load_all()
+    if not args.cache: # 같은 메뉴가 반복돼도 캐시 적중 없이 매번 계산 (커밋 간 비교를 캐시 적중률에 좌우되지 않게)
+        from leftovers.domain.recommend.api import recommend_api
+        matcher._CACHE.maxsize = 0
+        recommend_api._RESPONSE_CACHE.maxsize = 0
+        matcher._CACHE.clear()
+        recommend_api._RESPONSE_CACHE.clear()
+
+    cfg = settings()
+    meta = {
+        "git": _git_rev(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "rows": len(snap.foods),
+        "requests": args.requests,
+        "mix": {"exact": mix[0], "fuzzy": mix[1], "unknown": mix[2]},
+        "seed": args.seed,
+        "cache": args.cache,
+        "config": {k: cfg[k] for k in ("match_k", "match_ef", "match_reranker", "ann_backend", "model_mmap",
+                                       "recommend_workers", "recommend_batch_window_s")},
+    }
+    print(f"git={meta['git']} rows={meta['rows']} cpus={meta['cpus']} mix={args.mix} requests={args.requests}")
+
+    results = {}
+    for size in args.sizes:
+        workload = make_workload(snap.name_list, snap.concepts, size, args.requests + args.warmup, mix, args.seed)
+        warm, work = workload[: args.warmup], workload[args.warmup:]
+        print(f"\n[size={size}]")
+        if "direct" not in args.skip:
+            r = bench_direct(snap, warm, work)
+            results.setdefault("direct", {})[str(size)] = r
+            _print_run("direct", r)
+        if "http" not in args.skip:
+            r = bench_http(warm, work, args.concurrency)
+            results.setdefault("http", {})[str(size)] = r
+            _print_run("http", r)
+
+    if "cold" not in args.skip and args.cold_runs > 0:
+        results["cold"] = bench_cold(args.cold_runs)
+        c = results["cold"]
+        print(f"\ncold start  import p50={c['import']['p50_ms']:.0f}ms  load_all p50={c['load_all']['p50_ms']:.0f}ms (runs={args.cold_runs})")
+    if args.train > 0:
+        results["train"] = bench_train(args.train)
+        t = results["train"]
+        print(f"train.main  full p50={t['train']['p50_ms'] / 1000:.2f}s  incremental p50={t['train_incremental']['p50_ms'] / 1000:.2f}s (runs={args.train})")
+
+    report = {"meta": meta, "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nsaved {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        rows = compare(base, report, args.threshold)
+        if _print_compare(rows, base.get("meta", {}), meta, args.threshold, args.show_all):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# 추천 응답 생성 비용 비교 (메뉴 1/15/100개) : 결과 JSON 일치 확인 + 응답당 시간
+#  - validated : Envelope[RecommendRes]로 다시 검증한 뒤 model_dump_json (response_model 재검증 경로와 같은 비용)
+#  - model_dump_json : ok(res).model_dump_json() (검증 없이 담고 pydantic으로 직렬화)
+#  - ok_response : ok_response(res) (FastJSONResponse, orjson이 있으면 orjson)
+# 실행 : python -m leftovers.domain.recommend.bench.response_bench [--n 2000]
+import argparse
+import json
+import random
+import time
+
+from leftovers.core.response import api_response
+from leftovers.core.response.api_response import envelope, ok, ok_response
+from leftovers.domain.recommend.schemas.recommend_response import MatchItem, RecommendRes
+
+
+def _response(size: int, seed: int) -> RecommendRes:
+    rnd = random.Random(seed)
+    items = [
+        MatchItem(
+            input_menu=f"메뉴{i}",
+            matched_name=f"반찬_{rnd.randrange(10000)}(볶음)",
+            similarity=rnd.random(),
+            suitability=rnd.randrange(101),
+            margin=None if i % 3 else rnd.random(),
+        )
+        for i in range(size)
+    ]
+    return RecommendRes(concept="diet", count=size, items=items)
+
+
+def _validated(res: RecommendRes) -> bytes:
+    env = envelope(RecommendRes)(isSuccess=True, httpStatus=200, data=res.model_dump(), timeStamp=api_response.now_iso())
+    return env.model_dump_json().encode()
+
+
+def _model_dump_json(res: RecommendRes) -> bytes:
+    return ok(res).model_dump_json().encode()
+
+
+def _ok_response(res: RecommendRes) -> bytes:
+    return ok_response(res).body
+
+
+MODES = {"validated": _validated, "model_dump_json": _model_dump_json, "ok_response": _ok_response}
+
+
+# timeStamp는 호출마다 달라서 비교에서 제외
+def _payload(body: bytes) -> dict:
+    obj = json.loads(body)
+    obj.pop("timeStamp", None)
+    return obj
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1, 15, 100])
+    args = ap.parse_args()
+
+    print(f"serializer={'orjson' if api_response.orjson is not None else 'pydantic_core'}")
+    print(f"{'size':>5} " + " ".join(f"{m:>16}" for m in MODES) + "   speedup")
+    for size in args.sizes:
+        res = _response(size, seed=size)
+        ref = _payload(_validated(res))
+        for name, fn in MODES.items():
+            assert _payload(fn(res)) == ref, f"{name}: 결과 불일치 (size={size})"
+
+        per_call = {}
+        for name, fn in MODES.items():
+            t = time.perf_counter()
+            for _ in range(args.n):
+                fn(res)
+            per_call[name] = (time.perf_counter() - t) / args.n * 1e6
+        cols = " ".join(f"{per_call[m]:>14.1f}us" for m in MODES)
+        print(f"{size:>5} {cols}   x{per_call['validated'] / per_call['ok_response']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# compute_score(스칼라, 컨셉 정의를 행마다 해석) vs score_all(배치, 컴파일된 행렬) : 결과 일치 확인 + 속도 비교
+# 배치는 모든 컨셉을 한 번에 계산하므로 컨셉별 스칼라 시간 합계와 비교 (합산 순서 차이로 1e-9 이내 오차 허용)
+# 실행 : python -m leftovers.domain.recommend.bench.scoring_bench [--n 20000] [--db]
+import argparse
+import time
+import numpy as np
+
+from leftovers.domain.recommend.service import loader
+from leftovers.domain.recommend.service.concepts import default_spec
+from leftovers.domain.recommend.service.scoring import (
+    compute_score, score_all, fit_calibration, FEAT_COLS,
+)
+from leftovers.domain.recommend.service.evaluator import to_feat
+
+# 임계값 근처 값/결측치/국물 이름을 섞은 랜덤 행 생성
+def _synthetic_rows(n: int, seed: int) -> list[dict]:
+    rnd = np.random.default_rng(seed)
+    edges = [0, 2, 4, 6, 7, 15, 17, 20, 30, 60, 80, 120, 150, 160, 180, 200, 230, 240, 800, 2000]
+    names = ["김치찌개", "갈비탕", "제육볶음", "감자볶음", "된장국", "", "닭가슴살"]
+    highs = [900, 40, 40, 90, 40, 15, 3000, 20]
+    rows = []
+    for i in range(n):
+        r = {"name": names[i % len(names)]}
+        for k, hi in zip(FEAT_COLS[:-1], highs):
+            p = rnd.random()
+            r[k] = np.nan if p < 0.05 else (float(rnd.choice(edges)) if p < 0.25 else float(rnd.uniform(0, hi)))
+        rows.append(r)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--db", action="store_true", help="합성 데이터 대신 로딩된 KFDA DB 사용")
+    args = ap.parse_args()
+
+    if args.db:
+        snap = loader.load_all()
+        rows = [snap.foods.row(i) for i in range(len(snap.foods))]
+        calib = snap.calib
+    else:
+        rows = _synthetic_rows(args.n, args.seed)
+        calib = fit_calibration(rows)
+
+    feats = np.vstack([to_feat(r) for r in rows])
+    names = [r.get("name", "") for r in rows]
+
+    spec = default_spec()
+    for c in (None, calib):
+        t = time.perf_counter()
+        out = score_all(feats, c, spec, names)
+        t_batch = time.perf_counter() - t
+
+        t_scalar = 0.0
+        for concept in spec.concepts + ["unknown"]: # 정의에 없는 컨셉 -> 기본 규칙 열
+            t = time.perf_counter()
+            ref = np.array([compute_score(concept, r, c, spec) for r in rows])
+            t_scalar += time.perf_counter() - t
+
+            diff = float(np.max(np.abs(ref - out[:, spec.col(concept)])))
+            assert diff <= 1e-9, f"{concept}: max diff {diff}"
+            print(f"{concept:<10} calib={'y' if c else 'n'} rows={len(rows)} max_diff={diff:.2e}")
+        print(f"{'all':<10} calib={'y' if c else 'n'} concepts={out.shape[1]} "
+              f"scalar={t_scalar * 1000:8.1f}ms batch={t_batch * 1000:6.2f}ms x{t_scalar / max(t_batch, 1e-9):6.1f}")
+
+
+if __name__ == "__main__":
+    main()
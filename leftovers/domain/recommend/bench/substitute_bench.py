@@ -0,0 +1,74 @@
+# 대체 음식 검색 : 쿼리마다 전체 거리 계산 + 정렬(naive) vs 블록 행렬곱 검색(find_substitutes) 결과 일치 확인 + 메뉴당 지연시간
+# --scale k : 영양 벡터를 k배로 복제(복제본은 이름이 달라 후보가 됨)해서 행 수가 늘어날 때 지연시간 변화 확인
+# 실행 : python -m leftovers.domain.recommend.bench.substitute_bench [--queries 2000] [--batch 1 15] [--scale 1 4]
+import argparse
+import time
+import numpy as np
+
+from leftovers.domain.recommend.service import loader
+from leftovers.domain.recommend.service.evaluator import nutrient_space
+from leftovers.domain.recommend.service.substitute import build_nutrient_index, find_substitutes
+
+
+def _pct(ts, p):
+    return float(np.percentile(np.asarray(ts) * 1000, p))
+
+
+# 쿼리 하나씩 전체 행과 float64 거리 -> 조건 거른 뒤 (거리, 행 번호) 순 정렬 (적합도는 응답처럼 int(round(점수)))
+def _naive(X, names, scores, q, k, min_gain):
+    d = ((X - X[q]) ** 2).sum(axis=1)
+    shown = np.array([int(round(float(s))) for s in scores])
+    ok = (shown >= shown[q] + min_gain) & (names != names[q])
+    rows = np.flatnonzero(ok)
+    return rows[np.lexsort((rows, d[rows]))][:k]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--batch", type=int, nargs="+", default=[1, 15])
+    ap.add_argument("--k", type=int, default=3)
+    ap.add_argument("--min-gain", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--scale", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--check", type=int, default=200, help="naive와 비교할 쿼리 수")
+    args = ap.parse_args()
+
+    snap = loader.load_all()
+    X1 = np.asarray(nutrient_space(snap.foods, snap.imputer, snap.scaler), dtype=np.float32)
+    rng = np.random.default_rng(args.seed)
+    for scale in args.scale:
+        X = np.tile(X1, (scale, 1))
+        names = [f"{n}#{i}" if i else n for i in range(scale) for n in snap.foods.names]
+        table = np.tile(snap.score_table, (scale, 1))
+        t = time.perf_counter()
+        index = build_nutrient_index(X, names)
+        build_s = time.perf_counter() - t
+
+        concept = int(rng.integers(table.shape[1]))
+        scores = np.ascontiguousarray(table[:, concept])
+        queries = rng.integers(len(X), size=args.queries)
+
+        # 정확도 : naive와 행 번호까지 같아야 함 (거리 계산 방식 차이로 float32 경계 동점이 갈리면 거리만 비교)
+        name_ids = index.name_ids
+        mismatch = 0
+        for q, (got, dist) in zip(queries[: args.check], find_substitutes(index, scores, queries[: args.check], args.k, args.min_gain)):
+            ref = _naive(X.astype(np.float64), name_ids, scores, q, args.k, args.min_gain)
+            if not np.array_equal(ref, got):
+                ref_d = np.sqrt(((X[ref] - X[q]).astype(np.float64) ** 2).sum(axis=1))
+                assert len(ref) == len(got) and np.allclose(ref_d, dist, atol=1e-3), f"결과 불일치 q={q} ref={ref} got={got}"
+                mismatch += 1
+
+        line = [f"rows={len(X):>7} build={build_s * 1000:6.1f}ms tie_mismatch={mismatch}"]
+        for b in args.batch:
+            ts = []
+            for s in range(0, len(queries) - b + 1, b):
+                t = time.perf_counter()
+                find_substitutes(index, scores, queries[s:s + b], args.k, args.min_gain)
+                ts.append((time.perf_counter() - t) / b)
+            line.append(f"batch={b:<3} per-menu p50={_pct(ts, 50):6.3f}ms p99={_pct(ts, 99):6.3f}ms")
+        print("  ".join(line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# 이름 벡터화 비교 : TfidfVectorizer(글자 n-gram 어휘 사전) vs HashedNgramVectorizer(자모 n-gram 해시)
+# - 학습 시간 / 피클 크기 / 새 프로세스에서 joblib.load 시간과 RSS 증가량 / SVD 투영 행렬 크기(열 수 x SVD_DIM)
+# - transform 처리량 (배치 1, 64) / 변형된 이름으로 원래 이름을 찾는 top-1 정확도 (희소 행렬 전수 코사인)
+# 실행 : python -m leftovers.domain.recommend.bench.vectorizer_bench [--n 1000] [--mmap]
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import joblib
+
+from leftovers.domain.recommend.bench.match_bench import _perturb
+from leftovers.domain.recommend.service import bundle, train
+from leftovers.domain.recommend.service.food_kfda_loader import load_kfda_columns
+
+_KINDS = ["tfidf", "hashed"]
+
+
+def _rss_kb() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+# 새 프로세스에서 로딩만 측정 (이미 import된 모듈/할당된 메모리 영향 없이)
+def _child(path: str, mmap: bool) -> None:
+    import sklearn.feature_extraction.text # noqa: F401 (클래스 import 시간은 로딩 시간에서 제외)
+    from leftovers.domain.recommend.service import name_hash # noqa: F401
+    rss = _rss_kb()
+    t = time.perf_counter()
+    joblib.load(path, mmap_mode="r" if mmap else None)
+    print(json.dumps({"load_ms": (time.perf_counter() - t) * 1000, "rss_mb": (_rss_kb() - rss) / 1024}))
+
+
+# 받침 없는 음절 하나의 모음을 바꿈 (개 -> 게 같은 자모 하나짜리 오타)
+def _typo(name: str, rnd: random.Random) -> str:
+    pos = [i for i, ch in enumerate(name) if 0xAC00 <= ord(ch) <= 0xD7A3]
+    if not pos:
+        return name
+    i = rnd.choice(pos)
+    code = ord(name[i]) - 0xAC00
+    lead, vowel, tail = code // 588, (code // 28) % 21, code % 28
+    vowel = (vowel + rnd.randrange(1, 21)) % 21
+    return name[:i] + chr(0xAC00 + lead * 588 + vowel * 28 + tail) + name[i + 1:]
+
+
+def _accuracy(vec, mat, names, queries, sources) -> float:
+    hit = 0
+    for s in range(0, len(queries), 256):
+        sims = (vec.transform(queries[s:s + 256]) @ mat.T).toarray()
+        hit += sum(names[int(j)] == src for j, src in zip(sims.argmax(axis=1), sources[s:s + 256]))
+    return hit / max(len(queries), 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1000, help="정확도/처리량 측정 쿼리 수")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--mmap", action="store_true", help="로딩을 서버처럼 memmap으로 (MODEL_MMAP=1)")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return _child(args.child, args.mmap)
+
+    raw, _ = load_kfda_columns(train.FOOD_FILES, sheet_name=None, cache_dir=train.MODEL_DIR / "kfda_cache")
+    names = [str(n) for n in raw.tolist()]
+    rnd = random.Random(args.seed)
+    srcs = [rnd.choice(names) for _ in range(args.n)]
+    perturbed = [_perturb(s, rnd) for s in srcs]
+    typos = [_typo(s, rnd) for s in srcs]
+    print(f"rows={len(names)} queries={args.n} svd_dim={bundle.SVD_DIM}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in _KINDS:
+            vec, _ = train._name_vectorizer(kind)
+            t = time.perf_counter()
+            mat = vec.fit_transform(names).tocsr()
+            fit_s = time.perf_counter() - t
+            cols = mat.shape[1] # 투영 행렬 행 수 (어휘 크기 / 사용된 해시 열 수)
+            path = os.path.join(tmp, f"{kind}.joblib")
+            joblib.dump(vec, path)
+
+            loads = [json.loads(subprocess.run(
+                [sys.executable, "-m", __spec__.name, "--child", path] + (["--mmap"] if args.mmap else []),
+                capture_output=True, text=True, check=True).stdout) for _ in range(3)]
+
+            tput = {}
+            for b in (1, 64):
+                t = time.perf_counter()
+                for s in range(0, len(perturbed), b):
+                    vec.transform(perturbed[s:s + b])
+                tput[b] = len(perturbed) / (time.perf_counter() - t)
+
+            print(f"[{kind:6}] fit={fit_s:6.2f}s pickle={os.path.getsize(path) / 1e6:7.2f}MB "
+                  f"load={min(r['load_ms'] for r in loads):7.1f}ms rss=+{min(r['rss_mb'] for r in loads):6.1f}MB "
+                  f"cols={cols:>8} proj={cols * bundle.SVD_DIM * 4 / 1e6:7.1f}MB  "
+                  f"transform b1={tput[1]:8.0f}/s b64={tput[64]:8.0f}/s  "
+                  f"acc perturb={_accuracy(vec, mat, names, perturbed, srcs):.3f} typo={_accuracy(vec, mat, names, typos, srcs):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# uvicorn --workers N 상황 재현 : 워커 N개가 각자 load_all() 한 뒤 워커별 RSS/PSS/USS 측정 (리눅스 /proc 기준)
+# PSS는 공유 페이지를 워커 수로 나눈 값 -> memmap으로 공유되는 만큼 워커당 PSS가 줄어듦
+# 실행 : python -m leftovers.domain.recommend.bench.worker_memory_bench [--workers 4]
+import argparse
+import multiprocessing as mp
+import os
+
+# (MODEL_MMAP, ANN_BACKEND) 조합
+CONFIGS = [("0", "hnsw"), ("1", "hnsw"), ("1", "exact")]
+
+
+def _worker(ready, done):
+    from leftovers.domain.recommend.service import loader, matcher
+    snap = loader.load_all()
+    matcher.match_many(["김치찌개", "없는메뉴"], k=1, snap=snap) # 요청 한 번 처리한 상태로 (지연 로딩 페이지 포함)
+    ready.set()
+    done.wait()
+
+
+# smaps_rollup -> {Rss, Pss, Private(USS)} MB
+def _mem(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].rstrip(":") in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                out[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {"rss": out["Rss"], "pss": out["Pss"], "uss": out["Private_Clean"] + out["Private_Dirty"]}
+
+
+def _run(workers: int, mmap: str, backend: str) -> dict:
+    os.environ["MODEL_MMAP"], os.environ["ANN_BACKEND"] = mmap, backend # spawn된 자식이 settings()에서 읽음
+    ctx = mp.get_context("spawn") # uvicorn 멀티 워커도 spawn
+    done = ctx.Event()
+    procs, readies = [], []
+    for _ in range(workers):
+        ready = ctx.Event()
+        p = ctx.Process(target=_worker, args=(ready, done))
+        p.start()
+        procs.append(p)
+        readies.append(ready)
+    for r in readies:
+        r.wait()
+
+    mems = [_mem(p.pid) for p in procs]
+    done.set()
+    for p in procs:
+        p.join()
+
+    avg = {k: sum(m[k] for m in mems) / workers for k in ("rss", "pss", "uss")}
+    return {"mmap": mmap, "backend": backend, "workers": workers, **{k: round(v, 1) for k, v in avg.items()},
+            "total_pss": round(avg["pss"] * workers, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    print(f"{'MODEL_MMAP':>10} {'ANN_BACKEND':>11} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} {'total PSS':>10}")
+    for mmap, backend in CONFIGS:
+        r = _run(args.workers, mmap, backend)
+        print(f"{mmap:>10} {backend:>11} {r['rss']:>9.1f}MB {r['pss']:>9.1f}MB {r['uss']:>9.1f}MB {r['total_pss']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
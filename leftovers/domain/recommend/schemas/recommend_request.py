@@ -1,10 +1,25 @@
-from typing import List, Literal
+from typing import Dict, List
 from pydantic import BaseModel, Field
 
-Concept = Literal["diet", "keto", "low_sodium", "glycemic", "bulking"]
+# 컨셉 이름 : concepts.json에 정의된 컨셉 (API에서 로딩된 스냅샷 기준으로 검증, 없으면 400)
+Concept = str
 
 # 추천 요청 dto
 class RecommendReq(BaseModel):
     concept: Concept # 컨셉
     count: int = Field(15, ge=1, le=100) # 수량 : 기본값 15 / 최소 1, 최대 100
-    items: List[str] # 메뉴 이름 목록
\ No newline at end of file
+    items: List[str] # 메뉴 이름 목록
+
+# 전체 DB 컨셉 상위 음식 요청 dto : min/max는 영양 성분별 범위 (경계 포함, 예: "max": {"kcal": 300, "sodium": 200})
+class CatalogReq(BaseModel):
+    concept: Concept # 컨셉
+    count: int = Field(20, ge=1, le=100) # 수량 : 기본값 20 / 최소 1, 최대 100
+    min: Dict[str, float] = Field(default_factory=dict) # 영양 성분 하한
+    max: Dict[str, float] = Field(default_factory=dict) # 영양 성분 상한
+
+# 대체 음식 요청 dto : 메뉴마다 영양 성분이 비슷하면서 컨셉 적합도가 더 높은 DB 음식
+class SubstituteReq(BaseModel):
+    concept: Concept # 컨셉
+    items: List[str] # 메뉴 이름 목록
+    k: int = Field(3, ge=1, le=10) # 메뉴당 대체 음식 수 : 기본값 3 / 최소 1, 최대 10
+    min_gain: int = Field(1, ge=1) # 응답에 보이는 적합도(정수)가 원래 메뉴보다 최소 이만큼 높아야 후보 : 기본값 1
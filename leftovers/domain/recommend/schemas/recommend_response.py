@@ -1,7 +1,8 @@
-from typing import List, Literal, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
-Concept = Literal["diet", "keto", "low_sodium", "glycemic", "bulking"]
+# 컨셉 이름 : concepts.json에 정의된 컨셉 (API에서 로딩된 스냅샷 기준으로 검증, 없으면 400)
+Concept = str
 
 # 영양 성분 상세 모델
 class NutritionDetail(BaseModel):
@@ -14,6 +15,8 @@ class MatchItem(BaseModel):
     matched_name: Optional[str] = None # 매칭된 메뉴명
     similarity: Optional[float] = None # 입력값과 매칭된 메뉴명의 유사도
     suitability: Optional[int] = None # 컨셉 적합도
+    margin: Optional[float] = None # 1위 후보와 이름이 다른 최고 후보의 점수 차 (후보 재정렬 모드에서만, 작을수록 애매한 매칭)
+    rerank_score: Optional[float] = None # 재정렬 점수 (MATCH_RERANKER 기준, similarity는 항상 ANN/정확 코사인)
     # detail: Optional[NutritionDetail] = None # 영양정보 상세 - 개발용
     # note: Optional[str] = None # 기타 메모 - 개발용
 
@@ -21,4 +24,35 @@ class MatchItem(BaseModel):
 class RecommendRes(BaseModel):
     concept: Concept
     count: int
-    items: List[MatchItem]
\ No newline at end of file
+    items: List[MatchItem]
+
+# 전체 DB 컨셉 상위 음식 항목
+class CatalogItem(BaseModel):
+    name: str # 음식명
+    suitability: int # 컨셉 적합도
+    nutrition: Dict[str, Optional[float]] # 영양 성분 (값이 없으면 null)
+
+# 전체 DB 컨셉 상위 음식 응답 DTO
+class CatalogRes(BaseModel):
+    concept: Concept
+    count: int
+    items: List[CatalogItem]
+
+# 대체 음식 후보
+class SubstituteFood(BaseModel):
+    name: str # 음식명
+    suitability: int # 컨셉 적합도
+    distance: float # 정규화 영양 성분 공간에서 원래 메뉴와의 거리 (작을수록 비슷한 음식)
+
+# 메뉴별 대체 음식 목록 (매칭 실패면 matched_name 없이 빈 목록)
+class SubstituteItem(BaseModel):
+    input_menu: str # 입력값
+    matched_name: Optional[str] = None # 매칭된 메뉴명
+    similarity: Optional[float] = None # 입력값과 매칭된 메뉴명의 유사도
+    suitability: Optional[int] = None # 원래 메뉴의 컨셉 적합도
+    substitutes: List[SubstituteFood] = Field(default_factory=list) # 거리 가까운 순
+
+# 대체 음식 응답 DTO
+class SubstituteRes(BaseModel):
+    concept: Concept
+    items: List[SubstituteItem]
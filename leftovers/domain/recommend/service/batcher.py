@@ -0,0 +1,136 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from leftovers.core.config.config import settings
+from leftovers.core.metrics import metrics
+from leftovers.domain.recommend.service import evaluator
+
+_cfg = settings()
+
+# 추천 CPU 작업 전용 스레드 풀 : 기본 스레드 풀(40개)과 분리해서 크기를 고정 -> GIL 경합/대기열 폭증 방지
+_EXECUTOR = ThreadPoolExecutor(max_workers=_cfg["recommend_workers"], thread_name_prefix="recommend")
+
+_STATS = {"requests": 0, "batches": 0, "items": 0, "rejected": 0}
+_loop_state = {} # 이벤트 루프 -> (대기열, 디스패처 태스크) : asyncio 객체는 루프에 묶여 있어 루프마다 하나씩
+
+# 배치 하나에 들어간 메뉴 수 분포
+BATCH_ITEMS = metrics.histogram("leftovers_batch_items", "Menus per recommend batch", buckets=(1, 5, 15, 30, 60, 120, 250, 500, 1000))
+
+
+# 요청 하나(컨셉, 메뉴 목록)를 대기열에 넣고 배치 결과를 기다림
+# 대기열이 가득 차면 asyncio.QueueFull -> API에서 503
+async def evaluate(concept: str, menus: list[str], snap) -> list:
+    queue = _state()[0]
+    fut = asyncio.get_running_loop().create_future()
+    try:
+        queue.put_nowait((concept, menus, snap, fut, time.perf_counter())) # (컨셉, 메뉴, 스냅샷, 결과 future, 넣은 시각)
+    except asyncio.QueueFull:
+        _STATS["rejected"] += 1
+        raise
+    _STATS["requests"] += 1
+    return await fut
+
+
+# 배칭하지 않는 CPU 작업(대체 음식 검색 등)도 같은 전용 스레드 풀에서 : 추천과 합쳐 동시 CPU 작업 수 상한 유지
+async def run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_EXECUTOR, fn, *args)
+
+
+def _state():
+    loop = asyncio.get_running_loop()
+    state = _loop_state.get(loop)
+    if state is None:
+        queue = asyncio.Queue(maxsize=_cfg["recommend_queue_size"])
+        state = (queue, loop.create_task(_dispatch(queue)))
+        _loop_state[loop] = state
+    return state
+
+
+# 대기열에서 요청을 모아 배치로 실행 : 작업 스레드가 모두 바쁘면 새 배치를 만들지 않고 기다림
+# (그동안 들어온 요청은 대기열에 쌓였다가 다음 배치에 한꺼번에 들어감)
+async def _dispatch(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(_cfg["recommend_workers"])
+    window = _cfg["recommend_batch_window_s"]
+    max_items = _cfg["recommend_batch_max_items"]
+
+    while True:
+        await slots.acquire()
+        batch = [await queue.get()]
+        n_items = len(batch[0][1])
+        deadline = loop.time() + window
+        while n_items < max_items:
+            if not queue.empty(): # 이미 쌓여 있는 요청은 바로 합침
+                job = queue.get_nowait()
+            else:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    job = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(job)
+            n_items += len(job[1])
+
+        task = loop.create_task(_run_batch(batch))
+        task.add_done_callback(lambda _: slots.release())
+
+
+# 배치 실행 : 같은 스냅샷끼리 묶어 evaluate_many 한 번 -> 요청별 future로 결과 분배
+async def _run_batch(batch: list):
+    loop = asyncio.get_running_loop()
+    _STATS["batches"] += 1
+    _STATS["items"] += sum(len(job[1]) for job in batch)
+    BATCH_ITEMS.observe(sum(len(job[1]) for job in batch))
+    now = time.perf_counter()
+    for job in batch: # 대기열에 들어간 뒤 배치 실행까지 기다린 시간
+        metrics.observe_stage("batch_wait", now - job[4])
+
+    groups = {}
+    for job in batch:
+        groups.setdefault(id(job[2]), []).append(job)
+
+    for jobs in groups.values():
+        try:
+            results = await loop.run_in_executor(
+                _EXECUTOR, evaluator.evaluate_many, [(job[0], job[1]) for job in jobs], jobs[0][2]
+            )
+        except Exception as e:
+            for job in jobs:
+                if not job[3].done():
+                    job[3].set_exception(e)
+            continue
+        for job, res in zip(jobs, results):
+            if not job[3].done(): # 클라이언트가 끊겨 취소된 요청은 건너뜀
+                job[3].set_result(res)
+
+
+# 배칭 통계 (배치당 평균 요청/메뉴 수, 거절 수)
+def stats() -> dict:
+    s = dict(_STATS)
+    s["queued"] = sum(q.qsize() for q, _ in _loop_state.values())
+    s["avg_requests_per_batch"] = round(s["requests"] / s["batches"], 2) if s["batches"] else 0.0
+    s["avg_items_per_batch"] = round(s["items"] / s["batches"], 2) if s["batches"] else 0.0
+    return s
+
+
+# /metrics : 배칭 누적 카운트 + 대기 중인 요청 수
+@metrics.collector
+def _collect():
+    s = stats()
+    for key in ("requests", "batches", "items", "rejected"):
+        yield f"leftovers_batcher_{key}_total", "counter", f"recommend batcher {key}", [({}, s[key])]
+    yield "leftovers_batcher_queued", "gauge", "recommend requests waiting for a batch", [({}, s["queued"])]
+
+
+# 서버 종료 시 현재 루프의 디스패처 정리
+async def aclose():
+    state = _loop_state.pop(asyncio.get_running_loop(), None)
+    if state is not None:
+        state[1].cancel()
+        try:
+            await state[1]
+        except asyncio.CancelledError:
+            pass
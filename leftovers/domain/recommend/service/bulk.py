@@ -0,0 +1,138 @@
+# 대량 메뉴 점수 계산 (야간 배치용) : JSONL/CSV 스트림 -> 프로세스 풀 -> JSONL 스트림
+# 실행 : python -m leftovers.domain.recommend.service.bulk --input menus.jsonl --output scores.jsonl [--workers 8]
+import argparse
+import csv
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+
+from leftovers.domain.recommend.service import loader, matcher
+
+CHUNK_SIZE = 512 # 프로세스 하나에 한 번에 넘길 메뉴 수
+
+
+# 입력 파일 -> (id, 메뉴) 스트림 : 한 줄씩 읽어서 전체를 메모리에 올리지 않음
+# JSONL : 한 줄에 문자열 하나 또는 {"menu": ..., "id": ...} / CSV : menu 컬럼(없으면 첫 컬럼), id 컬럼은 선택
+def read_menus(f: Iterable[str], fmt: str = "jsonl") -> Iterator[tuple]:
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        col = "menu" if "menu" in (reader.fieldnames or []) else (reader.fieldnames or [None])[0]
+        for row in reader:
+            menu = (row.get(col) or "").strip()
+            if menu:
+                yield row.get("id"), menu
+        return
+
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        obj = json.loads(line)
+        if isinstance(obj, str):
+            yield None, obj
+        else:
+            yield obj.get("id"), str(obj.get("menu") or obj.get("name") or "")
+
+
+# 메뉴 묶음 하나 점수 계산 (워커 프로세스에서 실행) : 매칭 한 번 + 점수표에서 전 컨셉 조회
+def _score_chunk(chunk: List[tuple], concepts: List[str]) -> List[dict]:
+    snap = loader.current()
+    menus = [m for _, m in chunk]
+    labels, names, sims, margins, reranks = matcher.match_best(menus, snap=snap)
+    cols = [snap.concept_index[c] for c in concepts]
+
+    out = []
+    for (rid, menu), idx, name, sim, margin, rerank in zip(chunk, labels.tolist(), names, sims.tolist(), margins.tolist(), reranks.tolist()):
+        row = {} if rid is None else {"id": rid}
+        row["input_menu"] = menu
+        if idx < 0: # 매칭 실패
+            row.update(matched_name=None, similarity=None, margin=None, rerank_score=None, scores=None)
+        else:
+            scores = snap.score_table[idx, cols].tolist()
+            row.update(
+                matched_name=name,
+                similarity=round(sim, 3),
+                margin=None if margin != margin else round(margin, 3),
+                rerank_score=None if rerank != rerank else round(rerank, 3),
+                scores={c: int(round(s)) for c, s in zip(concepts, scores)},
+            )
+        out.append(row)
+    return out
+
+
+# 워커 초기화 : fork면 부모가 올린 스냅샷(배열/HNSW 그래프)을 copy-on-write로 그대로 공유,
+# spawn이면 각자 load_all (MODEL_MMAP=1이면 번들 배열은 페이지 캐시 공유)
+# 프로세스끼리 코어를 나눠 쓰므로 BLAS/knn_query 스레드는 1개로
+def _init_worker():
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    matcher.KNN_THREADS = 1
+    if loader.current() is None:
+        loader.load_all()
+
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# 메뉴 스트림 -> 결과 dict 스트림 (입력 순서 유지)
+# 동시에 처리 중인 묶음은 workers * 2개까지만 -> 입력이 아무리 커도 메모리는 일정
+def score_stream(
+    rows: Iterable[tuple], # (id, 메뉴) 스트림 (read_menus 결과)
+    concepts: Optional[List[str]] = None, # 기본값 : 전체 컨셉
+    workers: Optional[int] = None, # 기본값 : CPU 코어 수
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[dict]:
+    snap = loader.current() or loader.load_all() # fork 전에 부모에서 한 번만 로딩
+    concepts = list(concepts or snap.concepts)
+    unknown = [c for c in concepts if c not in snap.concept_index]
+    if unknown:
+        raise ValueError(f"알 수 없는 컨셉: {unknown}")
+
+    workers = workers or os.cpu_count() or 1
+    method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context(method), initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in _chunks(rows, chunk_size):
+            pending.append(pool.submit(_score_chunk, chunk, concepts))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="대량 메뉴 컨셉 점수 계산 (JSONL/CSV -> JSONL)")
+    ap.add_argument("--input", default="-", help="입력 파일 (- 이면 stdin)")
+    ap.add_argument("--output", default="-", help="출력 JSONL 파일 (- 이면 stdout)")
+    ap.add_argument("--format", choices=["jsonl", "csv"], default=None, help="기본값 : 확장자로 판단 (.csv면 csv)")
+    ap.add_argument("--concepts", nargs="+", default=None)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = ap.parse_args(argv)
+
+    loader.load_all()
+
+    fmt = args.format or ("csv" if args.input.endswith(".csv") else "jsonl")
+    fin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8") if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    fout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8") if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    with fin, fout:
+        rows = read_menus(fin, fmt)
+        for row in score_stream(rows, args.concepts, args.workers, args.chunk_size):
+            fout.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
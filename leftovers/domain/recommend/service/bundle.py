@@ -0,0 +1,204 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+import hashlib
+import json
+import os
+import joblib
+import numpy as np
+import hnswlib
+from sklearn.decomposition import TruncatedSVD
+
+# 번들 포맷 버전 : 저장 구조가 바뀌면 올려서 기존 번들을 stale 처리
+BUNDLE_VERSION = 3
+BUNDLE_DIR = "bundle"
+MANIFEST = "manifest.json"
+
+# 이름 임베딩 / HNSW 파라미터 (train, loader 공통)
+SVD_DIM = 256
+SVD_SEED = 42
+HNSW_EF_CONSTRUCTION = 200
+HNSW_M = 16
+HNSW_EF = 50
+
+# 번들 구성 파일
+_FILES = {
+    "svd": "name_svd.joblib",
+    "name_dense": "name_dense.f32",
+    "name_proj": "name_proj.npy", # SVD 투영 행렬 (vocab, dim) float32 : svd.components_.T를 워커마다 복사하지 않도록
+    "hnsw": "name_hnsw.bin",
+    "food_cols": "food_cols.npy", # (9, N) float32 영양 성분 컬럼 (이름은 name_list.joblib)
+}
+
+
+# 파일 sha256 (1MB 단위로 읽어서 메모리 사용 최소화)
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# 원본 엑셀 파일 해시 -> 데이터가 바뀌면 번들이 stale 처리됨
+def source_fingerprint(files: List[str]) -> Dict[str, Optional[str]]:
+    return {Path(p).name: (file_sha256(p) if os.path.exists(p) else None) for p in files}
+
+
+# TF-IDF 행렬 -> SVD 차원 축소 (dense float32)
+def fit_name_embedding(name_mat):
+    svd = TruncatedSVD(n_components=SVD_DIM, random_state=SVD_SEED)
+    dense = svd.fit_transform(name_mat).astype(np.float32)
+    return svd, dense
+
+
+# dense 이름 벡터로 HNSW 인덱스 구축
+def build_hnsw(dense: np.ndarray):
+    index = hnswlib.Index(space="cosine", dim=dense.shape[1])
+    index.init_index(max_elements=dense.shape[0], ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+    index.add_items(dense)
+    index.set_ef(HNSW_EF)
+    return index
+
+
+# 임시 파일에 쓴 뒤 교체 : 실행 중인 워커가 memmap으로 보고 있는 파일을 덮어쓰지 않음 (기존 inode는 그대로 유지)
+def write_atomic(path, write) -> None:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+
+# joblib 아티팩트 저장 (write_atomic 사용)
+def dump_atomic(obj, path) -> None:
+    write_atomic(path, lambda tmp: joblib.dump(obj, tmp))
+
+
+# numpy 배열을 .npy로 저장 (np.save가 확장자를 붙이지 않도록 파일 객체로 전달)
+def _save_npy(tmp, arr) -> None:
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+
+
+# 브루트포스 코사인 검색 : hnswlib.Index와 같은 knn_query 인터페이스
+# dense 행렬을 memmap 그대로 읽어서 여러 워커가 물리 메모리 한 벌을 공유 (HNSW 그래프는 워커마다 힙에 올라감)
+class ExactIndex:
+    def __init__(self, dense: np.ndarray, block: int = 4096):
+        self.dense = dense
+        self.block = block
+        inv = np.empty(dense.shape[0], dtype=np.float32) # 행 노름의 역수 (워커마다 N개 float32만 사용)
+        for s in range(0, dense.shape[0], block):
+            n = np.linalg.norm(np.asarray(dense[s:s + block], dtype=np.float32), axis=1)
+            inv[s:s + block] = np.divide(1.0, n, out=np.zeros_like(n), where=n > 0)
+        self.inv_norm = inv
+
+    def get_current_count(self) -> int:
+        return self.dense.shape[0]
+
+    # (n, dim) 쿼리 -> (라벨 (n, k) uint64, 코사인 거리 (n, k) float32) : 유사도 높은 순
+    def knn_query(self, vectors, k: int = 1, num_threads: int = -1):
+        q = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        qn = np.linalg.norm(q, axis=1, keepdims=True)
+        q = np.divide(q, qn, out=np.zeros_like(q), where=qn > 0)
+        k = min(k, self.dense.shape[0])
+
+        labels = np.empty((q.shape[0], k), dtype=np.uint64)
+        dists = np.empty((q.shape[0], k), dtype=np.float32)
+        for s in range(0, q.shape[0], 256): # 쿼리 블록 단위로 (블록 x N) 유사도 행렬만 만듦
+            sims = (q[s:s + 256] @ self.dense.T) * self.inv_norm
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k] # 상위 k개만 고른 뒤 그 안에서 정렬
+            top_sims = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_sims, axis=1, kind="stable")
+            labels[s:s + 256] = np.take_along_axis(top, order, axis=1)
+            dists[s:s + 256] = 1.0 - np.take_along_axis(top_sims, order, axis=1)
+        return labels, dists
+
+
+# 번들 저장 : 아티팩트를 먼저 쓰고 manifest는 마지막에 교체 -> manifest가 있으면 완성된 번들
+def save_bundle(model_dir, *, svd, name_dense, hnsw_index, db_feats, source_files) -> Path:
+    out = Path(model_dir) / BUNDLE_DIR
+    out.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = out / MANIFEST
+    if manifest_path.exists():
+        manifest_path.unlink() # 쓰는 도중 죽으면 이전 manifest로 깨진 번들을 읽지 않도록
+
+    name_dense = np.ascontiguousarray(name_dense, dtype=np.float32)
+    food_cols = np.ascontiguousarray(np.asarray(db_feats).T, dtype=np.float32) # 컬럼 단위로 연속 저장
+
+    name_proj = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+    dump_atomic(svd, out / _FILES["svd"])
+    write_atomic(out / _FILES["name_dense"], name_dense.tofile) # raw float32 -> memmap으로 바로 읽음
+    write_atomic(out / _FILES["name_proj"], lambda tmp: _save_npy(tmp, name_proj))
+    write_atomic(out / _FILES["hnsw"], lambda tmp: hnsw_index.save_index(str(tmp)))
+    write_atomic(out / _FILES["food_cols"], lambda tmp: _save_npy(tmp, food_cols))
+
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "n_rows": int(food_cols.shape[1]),
+        "dim": int(name_dense.shape[1]),
+        "hnsw": {"ef_construction": HNSW_EF_CONSTRUCTION, "M": HNSW_M, "ef": HNSW_EF},
+        "sources": source_fingerprint(source_files),
+        "files": {k: {"name": v, "sha256": file_sha256(out / v)} for k, v in _FILES.items()},
+    }
+    text = json.dumps(manifest, ensure_ascii=False, indent=2)
+    write_atomic(manifest_path, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+    return out
+
+
+# 번들 로딩 : 없거나 stale/손상이면 None 반환 -> 호출부에서 느린 경로로 재구축
+# mmap=True면 배열을 전부 읽기 전용 memmap으로 -> 같은 파일을 연 워커끼리 페이지 캐시 한 벌을 공유
+# backend="exact"면 HNSW 그래프를 올리지 않고 memmap된 dense 행렬로 브루트포스 검색
+def load_bundle(model_dir, source_files: List[str], backend: str = "hnsw", mmap: bool = True) -> Optional[Dict[str, Any]]:
+    out = Path(model_dir) / BUNDLE_DIR
+    try:
+        manifest = json.loads((out / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != BUNDLE_VERSION:
+        return None
+
+    # 원본 데이터가 배포 이미지에 있으면 해시 비교 (원본이 없으면 번들을 신뢰)
+    current = source_fingerprint(source_files)
+    for name, digest in current.items():
+        if digest is not None and manifest.get("sources", {}).get(name) != digest:
+            return None
+
+    files = manifest.get("files", {})
+    for key, fname in _FILES.items():
+        entry = files.get(key)
+        path = out / fname
+        if not entry or not path.exists() or file_sha256(path) != entry.get("sha256"):
+            return None
+
+    n_rows, dim = int(manifest["n_rows"]), int(manifest["dim"])
+    mmap_mode = "r" if mmap else None
+    try:
+        name_dense = np.memmap(out / _FILES["name_dense"], dtype=np.float32, mode="r", shape=(n_rows, dim))
+        if not mmap:
+            name_dense = np.array(name_dense)
+        name_proj = np.load(out / _FILES["name_proj"], mmap_mode=mmap_mode)
+        food_cols = np.load(out / _FILES["food_cols"], mmap_mode=mmap_mode)
+        svd = joblib.load(out / _FILES["svd"], mmap_mode=mmap_mode)
+
+        if backend == "exact":
+            index = ExactIndex(name_dense)
+        else:
+            index = hnswlib.Index(space="cosine", dim=dim)
+            index.load_index(str(out / _FILES["hnsw"]), max_elements=n_rows)
+            index.set_ef(manifest.get("hnsw", {}).get("ef", HNSW_EF))
+    except Exception:
+        return None
+
+    if food_cols.ndim != 2 or food_cols.shape[1] != n_rows:
+        return None
+
+    return {
+        "svd": svd,
+        "name_dense": name_dense,
+        "name_proj": name_proj,
+        "hnsw": index,
+        "food_cols": food_cols,
+    }
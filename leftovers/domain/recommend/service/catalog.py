@@ -0,0 +1,108 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from leftovers.domain.recommend.service.food_table import FOOD_COLS, FoodTable
+
+# 전체 DB에서 "컨셉 점수 상위 N개 음식" 조회용 정렬 인덱스 (스냅샷 로딩 시 한 번 구축, 요청마다 점수 재계산 없음)
+# - concept_order : 컨셉별 점수 내림차순 행 번호 (동점이면 행 번호 순)
+# - col_order / col_sorted : 영양 성분별 오름차순 행 번호와 정렬된 값 (NaN은 맨 뒤) -> 범위 조건은 이분 탐색으로 구간 하나
+# 조건이 좁으면 가장 좁은 성분 구간의 행만 모아 argpartition, 넓으면 컨셉 순서대로 블록씩 훑다가 N개 채우면 중단
+SCAN_BLOCK = 1024 # 컨셉 순서 스캔 블록 최소 크기
+SCAN_SELECTIVITY = 0.25 # 가장 좁은 조건을 통과하는 비율이 이보다 크면 컨셉 순서 스캔
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    concept_order: np.ndarray # (컨셉 수, N) int32
+    col_order: np.ndarray # (len(FOOD_COLS), N) int32
+    col_sorted: np.ndarray # (len(FOOD_COLS), N) float32
+    n_valid: np.ndarray # (len(FOOD_COLS),) 성분별 NaN이 아닌 행 수
+
+
+def build_catalog_index(foods: FoodTable, score_table: np.ndarray) -> CatalogIndex:
+    scores = np.asarray(score_table)
+    concept_order = np.empty((scores.shape[1], len(foods)), dtype=np.int32)
+    for j in range(scores.shape[1]):
+        concept_order[j] = np.argsort(-scores[:, j], kind="stable")
+
+    col_order = np.empty((len(FOOD_COLS), len(foods)), dtype=np.int32)
+    col_sorted = np.empty((len(FOOD_COLS), len(foods)), dtype=np.float32)
+    for k in range(len(FOOD_COLS)):
+        col = np.asarray(foods.cols[k])
+        col_order[k] = np.argsort(col, kind="stable") # NaN은 뒤로
+        col_sorted[k] = col[col_order[k]]
+    n_valid = (~np.isnan(col_sorted)).sum(axis=1)
+    return CatalogIndex(concept_order=concept_order, col_order=col_order, col_sorted=col_sorted, n_valid=n_valid)
+
+
+# {성분: (하한 또는 None, 상한 또는 None)} -> [(컬럼 번호, 하한, 상한)] (경계 포함, 없는 쪽은 ±inf)
+# 경계는 컬럼과 같은 float32로 한 번만 변환 -> 이분 탐색/마스크 두 경로가 같은 값으로 비교 (경계값 포함 여부가 경로마다 달라지지 않음)
+def _bounds(bounds: Dict[str, Tuple[Optional[float], Optional[float]]]):
+    out = []
+    for key, (lo, hi) in bounds.items():
+        if key not in FOOD_COLS:
+            raise ValueError(f"알 수 없는 영양 성분: {key}")
+        lo = np.float32(-np.inf if lo is None else lo)
+        hi = np.float32(np.inf if hi is None else hi)
+        out.append((FOOD_COLS.index(key), lo, hi))
+    return out
+
+
+# 조건 전부를 만족하는 행 마스크 (NaN은 어떤 조건도 만족하지 않음)
+def _mask(foods: FoodTable, rows: np.ndarray, conds) -> np.ndarray:
+    ok = np.ones(len(rows), dtype=bool)
+    for k, lo, hi in conds:
+        v = foods.cols[k, rows]
+        ok &= (v >= lo) & (v <= hi)
+    return ok
+
+
+# 컨셉 점수 상위 n개 행 번호 (점수 내림차순, 동점이면 행 번호 순) : bounds는 영양 성분 범위 조건 (경계 포함)
+def top_foods(index: CatalogIndex, foods: FoodTable, scores: np.ndarray, concept_col: int, n: int,
+              bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None) -> np.ndarray:
+    order = index.concept_order[concept_col]
+    conds = _bounds(bounds or {})
+    if n <= 0 or not len(order):
+        return order[:0]
+    if not conds:
+        return order[:n]
+
+    # 조건별 통과 구간 [start, end) : 정렬된 값에서 이분 탐색 (NaN 제외)
+    spans = []
+    for k, lo, hi in conds:
+        valid = index.col_sorted[k, : index.n_valid[k]]
+        start = int(np.searchsorted(valid, lo, side="left")) if lo > -np.inf else 0
+        end = int(np.searchsorted(valid, hi, side="right")) if hi < np.inf else len(valid)
+        spans.append((max(end - start, 0), k, start, end))
+    width, k, start, end = min(spans)
+    if width == 0:
+        return order[:0]
+
+    if width > SCAN_SELECTIVITY * len(order):
+        # 조건이 넓음 -> 컨셉 순서대로 블록 스캔 (통과 비율이 높아 앞쪽 몇 블록이면 n개가 참)
+        picked, found = [], 0
+        block = max(SCAN_BLOCK, 4 * n)
+        for s in range(0, len(order), block):
+            rows = order[s:s + block]
+            rows = rows[_mask(foods, rows, conds)]
+            picked.append(rows[: n - found])
+            found += len(picked[-1])
+            if found >= n:
+                break
+        return np.concatenate(picked)
+
+    # 조건이 좁음 -> 가장 좁은 성분 구간의 행만 나머지 조건으로 거른 뒤 점수 상위 n개
+    rows = index.col_order[k, start:end]
+    if len(conds) > 1:
+        rows = rows[_mask(foods, rows, conds)]
+    s = scores[rows]
+    if len(rows) > n:
+        # n번째 점수보다 높은 행은 전부, n번째 점수와 같은 행은 행 번호 순으로 남은 자리만큼 (스캔 결과와 같은 순서)
+        t = -np.partition(-s, n - 1)[n - 1]
+        above = rows[s > t]
+        ties = np.sort(rows[s == t])[: n - len(above)]
+        rows = np.concatenate([above, ties])
+        s = scores[rows]
+    return rows[np.lexsort((rows, -s))] # 점수 내림차순, 동점이면 행 번호 순
@@ -0,0 +1,160 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import numpy as np
+
+from leftovers.core.config.config import settings
+from leftovers.domain.recommend.service.food_table import FOOD_COLS
+
+# 컨셉 정의 파일(concepts.json) -> 행렬로 컴파일 : 모든 컨셉 규칙 점수를 행렬곱 두 번으로 계산 (scoring.score_all)
+# - z_features : 이름 -> 원본 피처를 0~1로 정규화 (분위수 p10~p90 또는 고정 bounds, invert면 낮을수록 1)
+# - penalties : 조건(gt/ge/lt/le)을 만족하면 delta 가감 / ramp면 (값 - 하한) x ramp (크기는 cap까지)
+#   최상위 penalties는 모든 컨셉(기본 포함)에 적용
+# - cutoffs : 조건을 만족하면 점수 0
+# - default : 정의에 없는 컨셉 이름에 쓰는 가중치/규칙
+# 컨셉 추가/수정은 이 파일만 바꾸고 train -> 재로딩 (코드 변경 없음)
+RULE_FEATURES = FOOD_COLS + ["prot_density", "soup"] # 조건/정규화에 쓸 수 있는 피처 (prot_density = 단백질/kcal, soup = 국물류 이름이면 1)
+DEFAULT = "__default__" # 기본 규칙 열 이름 (정의에 없는 컨셉)
+_BOUND_KEYS = ("gt", "ge", "lt", "le")
+
+
+@dataclass(frozen=True)
+class ConceptSpec:
+    concepts: List[str] # 정의된 컨셉 (열 순서 = 점수표 열 순서, 마지막 열은 DEFAULT)
+    source: dict # 파싱한 정의 원본 (스칼라 compute_score가 그대로 해석)
+    digests: Dict[str, str] # 컨셉 -> 정의 해시 (전역 규칙/정규화 포함) : train 단계 입력 해시용
+    z_names: List[str]
+    z_src: np.ndarray # (Z,) RULE_FEATURES 열 번호
+    z_invert: np.ndarray # (Z,) bool
+    z_bounds: List[Optional[tuple]] # (Z,) 고정 (lo, hi) 또는 None (분위수 사용)
+    weights: np.ndarray # (Z, C+1) float64
+    rule_src: np.ndarray # (R,) RULE_FEATURES 열 번호
+    rule_lo: np.ndarray # (R,) 열린 하한 : 값 > rule_lo (ge는 nextafter로 바꿔 비교 한 번, 없으면 -inf)
+    rule_hi: np.ndarray # (R,) 열린 상한 : 값 < rule_hi (le는 nextafter, 없으면 inf)
+    ramp_rows: np.ndarray # ramp 규칙 번호
+    ramp_origin: np.ndarray # ramp 규칙의 원래 하한 (gt/ge 값)
+    ramp_slope: np.ndarray # |ramp|
+    ramp_cap: np.ndarray # ramp 크기 상한 (없으면 inf)
+    rule_delta: np.ndarray # (R, C+1) 조건 만족 시 가감값 (ramp 규칙은 부호만, 해당 컨셉 열에만 값)
+    cut_src: np.ndarray # (K,) 이하 cutoff 조건 (rule_*와 같은 형식)
+    cut_lo: np.ndarray
+    cut_hi: np.ndarray
+    cut_cols: np.ndarray # (K, C+1) float64 : 1이면 그 컨셉에 적용
+
+    # 컨셉 -> 점수 열 (정의에 없으면 기본 열)
+    def col(self, concept: str) -> int:
+        try:
+            return self.concepts.index(concept)
+        except ValueError:
+            return len(self.concepts)
+
+
+# 조건 dict -> (피처 열 번호, 하한, 하한 포함, 상한, 상한 포함)
+def _bounds(rule: dict, where: str):
+    feature = rule.get("feature")
+    if feature not in RULE_FEATURES:
+        raise ValueError(f"{where}: 알 수 없는 피처 {feature!r} (사용 가능 : {', '.join(RULE_FEATURES)})")
+    if "gt" in rule and "ge" in rule or "lt" in rule and "le" in rule:
+        raise ValueError(f"{where}: gt/ge, lt/le는 하나씩만 쓸 수 있습니다.")
+    if not any(k in rule for k in _BOUND_KEYS):
+        raise ValueError(f"{where}: 조건(gt/ge/lt/le)이 없습니다.")
+    lo, lo_incl = (float(rule["ge"]), True) if "ge" in rule else (float(rule.get("gt", -np.inf)), False)
+    hi, hi_incl = (float(rule["le"]), True) if "le" in rule else (float(rule.get("lt", np.inf)), False)
+    return RULE_FEATURES.index(feature), lo, lo_incl, hi, hi_incl
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+# 파싱한 정의 -> ConceptSpec (잘못된 피처/가중치/조건이면 ValueError)
+def compile_concepts(source: dict) -> ConceptSpec:
+    zdefs = source.get("z_features") or {}
+    sections = dict(source.get("concepts") or {})
+    if DEFAULT in sections:
+        raise ValueError(f"컨셉 이름으로 {DEFAULT}는 쓸 수 없습니다.")
+    concepts = list(sections)
+    sections[DEFAULT] = source.get("default") or {}
+    cols = concepts + [DEFAULT]
+
+    z_names = list(zdefs)
+    z_src, z_invert, z_bounds = [], [], []
+    for name, z in zdefs.items():
+        if z.get("feature") not in RULE_FEATURES:
+            raise ValueError(f"z_features.{name}: 알 수 없는 피처 {z.get('feature')!r}")
+        z_src.append(RULE_FEATURES.index(z["feature"]))
+        z_invert.append(bool(z.get("invert", False)))
+        z_bounds.append(tuple(float(v) for v in z["bounds"]) if z.get("bounds") else None)
+
+    weights = np.zeros((len(z_names), len(cols)))
+    for j, c in enumerate(cols):
+        for name, w in (sections[c].get("weights") or {}).items():
+            if name not in z_names:
+                raise ValueError(f"{c}.weights: 정의되지 않은 z 피처 {name!r}")
+            weights[z_names.index(name), j] = float(w)
+
+    # 규칙 : (조건 dict, 적용 열 목록, 오류 메시지용 위치) / 전역 규칙은 모든 열
+    rules, cuts = [], []
+    for i, rule in enumerate(source.get("penalties") or []):
+        rules.append((rule, list(range(len(cols))), f"penalties[{i}]"))
+    for j, c in enumerate(cols):
+        for i, rule in enumerate(sections[c].get("penalties") or []):
+            rules.append((rule, [j], f"{c}.penalties[{i}]"))
+        for i, rule in enumerate(sections[c].get("cutoffs") or []):
+            cuts.append((rule, [j], f"{c}.cutoffs[{i}]"))
+
+    rule_bounds, ramps = [], []
+    delta = np.zeros((len(rules), len(cols)))
+    for r, (rule, js, where) in enumerate(rules):
+        b = _bounds(rule, where)
+        rule_bounds.append(b)
+        if "ramp" in rule:
+            if b[1] == -np.inf:
+                raise ValueError(f"{where}: ramp 규칙은 하한(gt/ge)이 필요합니다.")
+            ramps.append((r, b[1], abs(float(rule["ramp"])), float(rule.get("cap", np.inf))))
+            delta[r, js] = np.sign(float(rule["ramp"]))
+        else:
+            delta[r, js] = float(rule.get("delta", 0.0))
+    ramp_rows, ramp_origin, ramp_slope, ramp_cap = (np.array(v) for v in zip(*ramps)) if ramps else (np.empty(0),) * 4
+
+    cut_bounds = [_bounds(rule, where) for rule, _, where in cuts]
+    cut_cols = np.zeros((len(cuts), len(cols)))
+    for k, (_, js, _) in enumerate(cuts):
+        cut_cols[k, js] = 1.0
+
+    # 경계 포함(ge/le)은 바로 옆 float 값으로 바꿔 열린 구간 비교 한 번으로 (x >= a  <=>  x > nextafter(a, -inf))
+    def unpack(bounds):
+        if not bounds:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        src, lo, lo_incl, hi, hi_incl = (np.array(v) for v in zip(*bounds))
+        lo = np.where(lo_incl, np.nextafter(lo, -np.inf), lo)
+        hi = np.where(hi_incl, np.nextafter(hi, np.inf), hi)
+        return src, lo, hi
+
+    r_src, r_lo, r_hi = unpack(rule_bounds)
+    c_src, c_lo, c_hi = unpack(cut_bounds)
+    shared = (zdefs, source.get("penalties") or [])
+    return ConceptSpec(
+        concepts=concepts, source=source,
+        digests={c: _digest(c, shared, sections[c]) for c in cols},
+        z_names=z_names, z_src=np.array(z_src, dtype=np.int64), z_invert=np.array(z_invert, dtype=bool), z_bounds=z_bounds,
+        weights=weights,
+        rule_src=r_src, rule_lo=r_lo, rule_hi=r_hi,
+        ramp_rows=ramp_rows.astype(np.int64), ramp_origin=ramp_origin, ramp_slope=ramp_slope, ramp_cap=ramp_cap,
+        rule_delta=delta,
+        cut_src=c_src, cut_lo=c_lo, cut_hi=c_hi, cut_cols=cut_cols,
+    )
+
+
+def load_concepts(path) -> ConceptSpec:
+    return compile_concepts(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+# 설정 경로(CONCEPTS_PATH)의 정의 : 스냅샷 없이 점수를 계산할 때 (벤치마크, 스칼라 점수)
+@lru_cache(maxsize=1)
+def default_spec() -> ConceptSpec:
+    return load_concepts(settings()["concepts_path"])
@@ -1,7 +1,10 @@
 import numpy as np
-from leftovers.domain.recommend.service.scoring import compute_score
-from leftovers.domain.recommend.schemas.recommend_response import MatchItem
+from leftovers.core.metrics import metrics
+from leftovers.domain.recommend.service.scoring import score_all
+from leftovers.domain.recommend.service.food_table import FoodTable
+from leftovers.domain.recommend.schemas.recommend_response import MatchItem, SubstituteFood, SubstituteItem
 from leftovers.domain.recommend.service import loader, matcher
+from leftovers.domain.recommend.service.substitute import find_substitutes
 
 # 음식 영양 성분을 딕셔너리에서 numpy 배열로 변환(ML 모델 입력은 항상 숫자여야 하므로)
 def to_feat(n: dict) -> np.ndarray:
@@ -16,57 +19,87 @@ def to_feat(n: dict) -> np.ndarray:
     netcarb = max(carbs - fiber, 0.0)
     return np.array([kcal, protein, fat, carbs, sugar, fiber, sodium, sat_fat, netcarb], dtype=float)
 
-# 데이터에서 유사한 메뉴 찾아 점수를 계산하여 반환
-def evaluate_items(concept: str, menus: list[str]) -> list[MatchItem]:
-    matched = []
-    features = []
+# 모든 DB 행의 모델 입력 벡터 (N, 9) : 점수표 예측과 대체 음식 검색이 같은 공간을 씀
+def nutrient_space(foods: FoodTable, imputer, scaler) -> np.ndarray:
+    with metrics.stage("impute_scale"):
+        X = imputer.transform(foods.feats) # 결측치 보간
+        return scaler.transform(X) # 모델 학습 범위에 맞게 정규화
 
-    for menu in menus:
-        idx, b_name, sim = matcher.match_top1(menu) # 메뉴 매칭
-        if idx < 0:
-            matched.append(MatchItem(input_menu=menu, note="매칭 실패"))
-            features.append(None)
-            continue
-        
-        b_row = dict(loader._DB_ROWS[idx]) # 음식 데이터에서 해당 행을 딕셔너리 형태로 가져옴
-        b_row["name"] = b_name
+# 모든 DB 행 x 컨셉의 최종 점수표 (ML 예측 0.3 + 규칙 점수 0.7) : 요청마다 점수 계산 없이 조회만
+# 열 순서는 spec.concepts / X : nutrient_space 결과를 이미 계산했으면 넘겨서 재사용
+def build_score_table(foods: FoodTable, imputer, scaler, models: dict, calib, spec, X=None) -> np.ndarray:
+    if X is None:
+        X = nutrient_space(foods, imputer, scaler)
+    with metrics.stage("rule_score"):
+        rules = score_all(foods, calib or None, spec) # 모든 컨셉 규칙 점수 한 번에 (N, 컨셉 수 + 1)
 
-        x_num = to_feat(b_row) # 피쳐 추출
-        matched.append((menu, b_name, sim, b_row, idx))  # 후처리용
-        features.append(x_num)
-    
-    valid_idx = [i for i, f in enumerate(features) if f is not None] # 매칭 실패 제거하고 batch 변환
-    
-    if not valid_idx:
-        return matched  # 전부 실패면 그대로 반환
-    
-    X = loader._DB_FEATS[[m[-1] for m in matched if not isinstance(m, MatchItem)]] # dict -> numpy 변환 대신 캐시된 _DB_FEATS 사용
+    table = np.empty((len(foods), len(spec.concepts)), dtype=np.float32)
+    for j, concept in enumerate(spec.concepts):
+        with metrics.stage("predict"):
+            preds = models[concept].predict(X) # 모델 배치 예측
+        table[:, j] = 0.3 * preds + 0.7 * rules[:, j]
+    return table
 
-    X = loader._IMPUTER.transform(X) # 결측치 보간
-    X = loader._SCALER.transform(X) # 모델 학습 범위에 맞게 정규화
+# 데이터에서 유사한 메뉴 찾아 점수를 계산하여 반환
+def evaluate_items(concept: str, menus: list[str], snap=None) -> list[MatchItem]:
+    return evaluate_many([(concept, menus)], snap)[0]
 
-    model = loader._MODELS[concept]
-    preds = model.predict(X) # 모델 배치 예측
+# 여러 요청(컨셉, 메뉴 목록)을 한 번에 평가 : 모든 메뉴를 이어붙여 매칭은 한 번만, 점수는 요청별 컨셉 열에서 조회
+def evaluate_many(jobs: list[tuple[str, list[str]]], snap=None) -> list[list[MatchItem]]:
+    snap = snap or loader.current() # 요청 하나는 같은 스냅샷으로 끝까지 처리
+    menus = [m for _, ms in jobs for m in ms]
+    with metrics.stage("match"):
+        labels, names, sims, margins, reranks = matcher.match_best(menus, snap=snap) # 메뉴 배치 매칭 (설정 시 후보 재정렬)
+    labels, sims, margins, reranks = labels.tolist(), sims.tolist(), margins.tolist(), reranks.tolist()
 
-    results = []
-    pred_i = 0
-    for m in matched:
-        if isinstance(m, MatchItem):  # 매칭 실패
-            results.append(m)
-        else:
-            menu, b_name, sim, b_row, idx = m
-            pred = float(preds[pred_i])
-            rule = float(compute_score(concept, b_row, loader._CALIB or None))
-            fused = 0.3 * pred + 0.7 * rule
-            score_int = int(round(fused))
-            pred_i += 1
+    out = []
+    matched = zip(labels, names, sims, margins, reranks) # 요청 순서대로 앞에서부터 잘라 씀
+    with metrics.stage("score_lookup"):
+        for concept, ms in jobs:
+            scores = snap.score_table[:, snap.concept_index[concept]] # 컨셉 점수 열
+            results = []
+            for menu, (idx, name, sim, margin, rerank) in zip(ms, matched):
+                if idx < 0:  # 매칭 실패
+                    results.append(MatchItem(input_menu=menu, note="매칭 실패"))
+                    continue
 
-            results.append(
-                MatchItem(
-                    input_menu=menu,
-                    matched_name=b_name,
-                    similarity=round(sim, 3),
-                    suitability=score_int,
+                results.append(
+                    MatchItem(
+                        input_menu=menu,
+                        matched_name=name,
+                        similarity=round(sim, 3),
+                        suitability=int(round(float(scores[idx]))),
+                        margin=None if margin != margin else round(margin, 3), # NaN이면 마진 없음
+                        rerank_score=None if rerank != rerank else round(rerank, 3),
+                    )
                 )
+            out.append(results)
+    return out
+
+# 메뉴마다 영양 성분이 가까우면서 적합도(반올림 정수)가 min_gain점 이상 더 높은 DB 음식 k개
+def substitute_items(concept: str, menus: list[str], k: int, min_gain: float = 1.0, snap=None) -> list[SubstituteItem]:
+    snap = snap or loader.current()
+    with metrics.stage("match"):
+        labels, names, sims, _, _ = matcher.match_best(menus, snap=snap)
+    scores = snap.score_table[:, snap.concept_index[concept]]
+    with metrics.stage("substitute"):
+        found = find_substitutes(snap.nutrients, scores, labels, k, min_gain)
+
+    out = []
+    for menu, idx, name, sim, (rows, dists) in zip(menus, labels.tolist(), names, sims.tolist(), found):
+        if idx < 0: # 매칭 실패
+            out.append(SubstituteItem(input_menu=menu))
+            continue
+        out.append(
+            SubstituteItem(
+                input_menu=menu,
+                matched_name=name,
+                similarity=round(sim, 3),
+                suitability=int(round(float(scores[idx]))),
+                substitutes=[
+                    SubstituteFood(name=snap.foods.names[r], suitability=int(round(float(scores[r]))), distance=round(d, 3))
+                    for r, d in zip(rows.tolist(), dists.tolist())
+                ],
             )
-    return results
+        )
+    return out
@@ -1,8 +1,12 @@
 from __future__ import annotations
+from pathlib import Path
 from typing import List, Optional, Dict, Any
+import hashlib
 import math
+import os
 import pandas as pd
 import numpy as np
+from leftovers.domain.recommend.service.bundle import file_sha256
 
 # 컬럼 매핑
 COL = {
@@ -22,6 +26,9 @@ NUM_COLS = [
     "kcal","protein","fat","carbs","sugar","fiber","sodium","sat_fat"
 ]
 
+# 컬럼형 캐시 포맷 버전 : 정제 규칙이 바뀌면 올려서 기존 캐시 무시
+CACHE_VERSION = 1
+
 # 데이터 전처리  -> float형으로 변환
 def _to_float(x, default=np.nan):
     try:
@@ -55,29 +62,107 @@ def _row_to_dict(row: pd.Series) -> Dict[str, Any]: # pandas의 행을 받아 
     return dic
 
 
+# 컬럼 하나를 float64 배열로 변환 (_to_float와 같은 규칙을 컬럼 단위로 적용)
+def _numeric_column(col: pd.Series) -> np.ndarray:
+    if col.dtype.kind in "iufb": # 이미 숫자형이면 변환만
+        out = col.to_numpy(dtype=np.float64, na_value=np.nan)
+        out[~np.isfinite(out)] = np.nan
+        return out
+
+    values = col.to_numpy(dtype=object)
+    out = np.full(len(values), np.nan)
+
+    is_str = np.fromiter((type(v) is str for v in values), dtype=bool, count=len(values))
+    if is_str.any(): # 문자열 : 공백/쉼표 제거 후 한 번에 숫자 변환
+        cleaned = pd.Series(values[is_str]).str.strip().str.replace(",", "", regex=False)
+        parsed = pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype=np.float64)
+        # to_numeric이 못 읽지만 float()은 읽는 표기(전각 숫자, 1_000 등)는 셀 단위로 다시 확인
+        retry = np.isnan(parsed) & (cleaned != "").to_numpy()
+        if retry.any():
+            parsed[retry] = [_to_float(v) for v in cleaned.to_numpy()[retry]]
+        out[is_str] = parsed
+
+    rest = ~is_str & ~pd.isna(values)
+    if rest.any(): # 문자열이 아닌 셀(숫자, bool 등)은 드물어서 셀 단위 변환
+        out[rest] = [_to_float(v) for v in values[rest]]
+
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+# 데이터프레임 -> 정제된 컬럼 (이름 배열, (N, 8) 숫자 행렬) : 식품명이 있고 숫자 값이 하나라도 있는 행만
+def _clean_frame(df: pd.DataFrame):
+    n = len(df)
+    if COL["name"] in df.columns:
+        names = df[COL["name"]].astype(str).str.strip().to_numpy(dtype=object)
+    else:
+        names = np.full(n, "", dtype=object)
+
+    nums = np.full((n, len(NUM_COLS)), np.nan)
+    for j, k in enumerate(NUM_COLS):
+        if COL[k] in df.columns:
+            nums[:, j] = _numeric_column(df[COL[k]])
+
+    keep = (names != "") & np.isfinite(nums).any(axis=1)
+    return names[keep], nums[keep]
+
+
+# 엑셀 파일 하나 읽기 (시트가 여러개면 합치기)
+def _read_excel(path, sheet_name) -> pd.DataFrame:
+    xls = pd.read_excel(path, sheet_name=sheet_name, engine="openpyxl")
+    if isinstance(xls, dict): # 엑셀에 시트가 여러개라면
+        frames = [df for _, df in xls.items()]
+        return pd.concat(frames, ignore_index=True)  # 모든 시트의 데이터를 하나로 합치기
+    return xls
+
+
+# 엑셀 파일 하나 -> 정제된 컬럼 : cache_dir가 있으면 파일 해시 기준 npz 캐시 사용 (엑셀을 다시 읽지 않음)
+def _load_file(path, sheet_name, cache_dir: Optional[str]):
+    cache_path = None
+    if cache_dir:
+        key = hashlib.sha256(f"{file_sha256(path)}:{CACHE_VERSION}:{sheet_name}".encode()).hexdigest()[:16]
+        cache_path = Path(cache_dir) / f"{Path(path).stem}.{key}.npz"
+        if cache_path.exists():
+            try:
+                with np.load(cache_path, allow_pickle=False) as z:
+                    return z["names"].astype(object), z["nums"]
+            except Exception:
+                pass # 깨진 캐시는 무시하고 다시 만듦
+
+    names, nums = _clean_frame(_read_excel(path, sheet_name))
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(cache_path.stem + ".tmp.npz")
+        np.savez(tmp, names=names.astype(str), nums=nums)
+        os.replace(tmp, cache_path)
+    return names, nums
+
+
+# 엑셀 파일들 -> 컬럼형 데이터 (이름 배열, (N, 8) float64 숫자 행렬, 컬럼 순서는 NUM_COLS)
+def load_kfda_columns(
+    files: List[str], # 파일 경로
+    sheet_name: Optional[str] = None, # 시트명
+    cache_dir: Optional[str] = None, # 컬럼형 캐시 디렉토리 (None이면 캐시 안 함)
+):
+    parts = [_load_file(path, sheet_name, cache_dir) for path in files]
+    if not parts:
+        return np.empty(0, dtype=object), np.empty((0, len(NUM_COLS)))
+    names = np.concatenate([p[0] for p in parts])
+    nums = np.vstack([p[1] for p in parts])
+    return names, nums
+
+
 # 엑셀 파일을 읽어 리스트로 변환
 def load_kfda_excels(
     files: List[str], # 파일 경로
-    sheet_name: Optional[str] = None # 시트명
+    sheet_name: Optional[str] = None, # 시트명
+    cache_dir: Optional[str] = None, # 컬럼형 캐시 디렉토리
 ) -> List[dict]:
-    rows: List[dict] = [] # 데이터를 담을 공간
-    for path in files:
-        xls = pd.read_excel(path, sheet_name=sheet_name, engine="openpyxl")
-        if isinstance(xls, dict): # 엑셀에 시트가 여러개라면
-            frames = [df for _, df in xls.items()]
-            df = pd.concat(frames, ignore_index=True)  # 모든 시트의 데이터를 하나로 합치기
-        else:
-            df = xls
-
-        out = [_row_to_dict(r) for _, r in df.iterrows()] # 데이터 프레임의 각 행을 딕셔너리로 변환
-        rows.extend(out)
-
-    rows = [r for r in rows if r.get("name")] # 식품명이 있는 행만 가져오기
-
-    cleaned = []
-    for r in rows:
-        # 해당 해의 NUM_COLS의 값 중 유효한 값이 하나라도 있으면 해당 행을 cleaned 딕셔너리에 추가
-        has_any = any(np.isfinite(r.get(k, np.nan)) for k in NUM_COLS)
-        if has_any:
-            cleaned.append(r)
-    return cleaned
\ No newline at end of file
+    names, nums = load_kfda_columns(files, sheet_name, cache_dir)
+    # 결측치는 기존 행 단위 변환과 같은 np.nan 객체로
+    cols = [[v if v == v else np.nan for v in nums[:, j].tolist()] for j in range(len(NUM_COLS))]
+    return [
+        {"name": name, **dict(zip(NUM_COLS, vals))}
+        for name, *vals in zip(names.tolist(), *cols)
+    ]
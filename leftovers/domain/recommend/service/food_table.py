@@ -0,0 +1,53 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Any, List
+import sys
+import numpy as np
+
+from leftovers.domain.recommend.service.food_kfda_loader import NUM_COLS
+
+# 음식 테이블 컬럼 (evaluator.to_feat / scoring.FEAT_COLS 순서와 동일, 마지막은 순탄수)
+FOOD_COLS = NUM_COLS + ["netcarb"]
+_IDX = {k: i for i, k in enumerate(FOOD_COLS)}
+
+# 컬럼형 음식 테이블 : 행마다 dict를 두지 않고 영양 성분은 컬럼별 연속 float32, 이름은 intern된 리스트 하나
+# cols는 (컬럼 수, N) C-contiguous -> 컬럼 하나가 메모리에서 연속 (번들에서는 memmap 그대로 사용)
+@dataclass(frozen=True)
+class FoodTable:
+    names: List[str] # 음식 이름 (행 순서, Snapshot.name_list와 같은 리스트)
+    cols: np.ndarray # (len(FOOD_COLS), N) float32
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # (N, 9) 피처 행렬 뷰 (복사 없음) : imputer/모델/compute_scores 입력용
+    @property
+    def feats(self) -> np.ndarray:
+        return self.cols.T
+
+    # 영양 성분 컬럼 하나 (연속 메모리, 복사 없음)
+    def col(self, key: str) -> np.ndarray:
+        return self.cols[_IDX[key]]
+
+    # 행 하나를 기존 db_rows와 같은 모양의 dict로 (표시/디버깅용, 요청 경로에서는 쓰지 않음)
+    def row(self, i: int) -> Dict[str, Any]:
+        vals = self.cols[: len(NUM_COLS), i].tolist()
+        return {"name": self.names[i], **dict(zip(NUM_COLS, vals))}
+
+
+# 정제된 숫자 컬럼 (N, 8) float64 -> (N, 9) 피처 : evaluator.to_feat를 행마다 돈 것과 같은 값
+def feats_from_columns(nums: np.ndarray) -> np.ndarray:
+    nums = np.asarray(nums, dtype=np.float64)
+    netc = nums[:, _IDX["carbs"]] - nums[:, _IDX["fiber"]]
+    netc = np.where(0.0 > netc, 0.0, netc) # max(carbs - fiber, 0.0)와 동일 (NaN 유지)
+    return np.column_stack([nums, netc])
+
+
+# 이름 + (N, 9) 피처 -> FoodTable (중복 이름은 intern해서 문자열 하나만 유지)
+def build_food_table(names: List[str], feats: np.ndarray) -> FoodTable:
+    feats = np.asarray(feats)
+    if feats.shape != (len(names), len(FOOD_COLS)):
+        raise ValueError(f"feats는 ({len(names)}, {len(FOOD_COLS)}) 배열이어야 합니다: {feats.shape}")
+    interned = [sys.intern(str(n)) for n in names]
+    cols = np.ascontiguousarray(feats.T, dtype=np.float32)
+    return FoodTable(names=interned, cols=cols)
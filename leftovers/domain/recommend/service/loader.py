@@ -1,77 +1,205 @@
-from typing import List
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+import threading
+import time
 import joblib
 import numpy as np
-import hnswlib
-from sklearn.decomposition import TruncatedSVD
 
-from leftovers.domain.recommend.service.food_kfda_loader import load_kfda_excels
-from leftovers.domain.recommend.service.evaluator import to_feat
+from leftovers.core.config.config import settings
+from leftovers.core.metrics import metrics
+from leftovers.domain.recommend.service import bundle
+from leftovers.domain.recommend.service.catalog import CatalogIndex, build_catalog_index
+from leftovers.domain.recommend.service.concepts import ConceptSpec, load_concepts
+from leftovers.domain.recommend.service.food_kfda_loader import load_kfda_columns
+from leftovers.domain.recommend.service.food_table import FoodTable, build_food_table, feats_from_columns
+from leftovers.domain.recommend.service.name_norm import build_norm_index
+from leftovers.domain.recommend.service.evaluator import build_score_table, nutrient_space
+from leftovers.domain.recommend.service.substitute import NutrientIndex, build_nutrient_index
 
 FOOD_FILES = ["leftovers/domain/recommend/data/foodData1.xlsx", "leftovers/domain/recommend/data/foodData2.xlsx"]
 MODEL_DIR = "leftovers/domain/recommend/model_store"
-
-# 컨셉
-CONCEPTS = {"diet", "keto", "low_sodium", "glycemic", "bulking"}
-
-# 캐시 이용 -> 서버 시작 시, 메모리에 로딩해두고 API 요청마다 바로 쓰게
-_DB_ROWS: List[dict] = [] # 음식 데이터
-_DB_FEATS = None # numpy 캐시
-_NAME_LIST: List[str] = [] # 음식 이름 리스트
-_NAME_VEC = None # 음식 이름 벡터화(음식 이름 문자열을 숫자 벡터로 변환)
-_NAME_MAT = None # 벡터화 결과 저장소(매트릭스) : 유사도 계산 전체 돌릴 때 사용
-_NAME_LOOKUP = {} # 벡터화 결과 딕셔너리 : 메뉴가 DB에 있는 경우, 그 벡터만 필요할 때 사용
-_IMPUTER = None # 결측치를 적절한 값으로 채워주는 보간기
-_SCALER = None # 값들의 크기를 일정한 값으로 맞춰주는 도구
-_MODELS = {} # 컨셉별 ML 모델
-_CALIB = None # 점수 보정기
-
-_HNSW_INDEX = None # ANN 인덱스
-
-# 캐시에 DB와 모델 전부 로딩
-def load_all():
-    global _DB_ROWS, _DB_FEATS
-    global _NAME_LIST, _NAME_VEC, _NAME_MAT, _NAME_LOOKUP
-    global _IMPUTER, _SCALER, _MODELS, _CALIB, _HNSW_INDEX
-
-    _DB_ROWS = load_kfda_excels(FOOD_FILES, sheet_name=None)
-
-    feats = [to_feat(row) for row in _DB_ROWS]  # dict -> numpy 변환을 미리해두기
-    _DB_FEATS = np.vstack(feats).astype(np.float32) # float32로 메모리 최적화
-    print("1차 진입")
+CONCEPTS_FILE = "concepts.json" # train이 학습에 쓴 컨셉 정의 사본 (MODEL_DIR 기준)
+TRAIN_DONE = "train_done.json" # train이 모든 산출물을 쓴 뒤 마지막에 교체하는 완료 표시 (변경 감지 기준)
+
+# 로딩된 DB/인덱스/모델 한 벌 : 만든 뒤에는 바꾸지 않고, 재로딩 시 새 스냅샷으로 통째로 교체
+# 요청은 시작할 때 current()로 스냅샷을 한 번 잡고 끝까지 그 스냅샷만 사용
+@dataclass(frozen=True)
+class Snapshot:
+    generation: int # 로딩 세대 : 캐시가 이 값이 바뀌면 비워짐
+    foods: FoodTable # 음식 데이터 (컬럼형 영양 성분 + 이름)
+    name_list: List[str] # 음식 이름 리스트 (foods.names와 같은 리스트)
+    name_vec: object # 음식 이름 벡터화(음식 이름 문자열을 숫자 벡터로 변환)
+    name_mat: object # 벡터화 결과 저장소(매트릭스) : 유사도 계산 전체 돌릴 때 사용
+    name_svd: object # TF-IDF -> dense 차원 축소기 : DB에 없는 메뉴 쿼리도 인덱스와 같은 공간으로 투영
+    name_proj: np.ndarray # SVD 투영 행렬 (vocab x dim, C-contiguous float32) : 쿼리마다 dtype/메모리 레이아웃 변환 방지
+    name_lookup: dict # 이름 -> 행 번호 : 메뉴가 DB에 그대로 있으면 ANN 없이 바로 매칭
+    norm_lookup: dict # 정규화 이름 -> 행 번호 : 공백/괄호 수식어/구두점/유니코드 차이만 있는 메뉴도 바로 매칭
+    hnsw_index: object # ANN 인덱스 (hnswlib.Index 또는 bundle.ExactIndex, knn_query 인터페이스 동일)
+    imputer: object # 결측치를 적절한 값으로 채워주는 보간기
+    scaler: object # 값들의 크기를 일정한 값으로 맞춰주는 도구
+    models: dict # 컨셉별 ML 모델
+    calib: object # 점수 보정기
+    score_table: np.ndarray # 행 x 컨셉 최종 점수표 (N, len(concepts)) float32
+    concept_spec: ConceptSpec # 컴파일된 컨셉 정의 (규칙 점수 가중치/조건 행렬)
+    catalog: CatalogIndex # 컨셉별 점수 순서 + 영양 성분별 정렬 인덱스 (전체 DB 상위 N개 조회용)
+    nutrients: NutrientIndex # 정규화 영양 벡터 (대체 음식 최근접 검색용)
+    concepts: List[str] = field(default_factory=list) # concept_spec.concepts
+    concept_index: dict = field(default_factory=dict) # 컨셉 -> 점수표 열
+    loaded_at: float = field(default_factory=time.time)
+
+
+_SNAPSHOT: Optional[Snapshot] = None # 현재 서비스 중인 스냅샷 (참조 하나만 교체 -> 원자적)
+_RELOAD_LOCK = threading.Lock() # 재로딩은 한 번에 하나만
+
+# 현재 스냅샷 (로딩 전이면 None)
+def current() -> Optional[Snapshot]:
+    return _SNAPSHOT
+
+# 모델 디렉토리에서 새 스냅샷 생성 (전역 상태는 건드리지 않음)
+def build_snapshot(generation: int) -> Snapshot:
+    cfg = settings()
+    # memmap이면 joblib 안의 numpy 배열(희소 행렬 내부 배열 포함)을 복사 없이 파일에서 바로 읽음 -> 워커끼리 공유
+    mmap_mode = "r" if cfg["model_mmap"] else None
 
     # 이름 벡터 관련
-    _NAME_VEC = joblib.load(f"{MODEL_DIR}/name_vectorizer.joblib")
-    _NAME_MAT = joblib.load(f"{MODEL_DIR}/name_matrix.joblib")
-    _NAME_LIST = joblib.load(f"{MODEL_DIR}/name_list.joblib")
-
-    # sparse -> dense float32 변환
-    svd = TruncatedSVD(n_components=256, random_state=42)
-    _NAME_MAT_DENSE = svd.fit_transform(_NAME_MAT).astype(np.float32)
-
-    # dens 기반 이름 벡터 캐시
-    _NAME_LOOKUP = {name: vec for name, vec in zip(_NAME_LIST, _NAME_MAT_DENSE)}
-
-    print(f"[DEBUG] load_all: _HNSW_INDEX before = {id(_HNSW_INDEX)}")
-          
-    # HNSW 인덱스 구축
-    dim = _NAME_MAT_DENSE.shape[1]
-    _HNSW_INDEX = hnswlib.Index(space='cosine', dim=dim)
-    _HNSW_INDEX.init_index(max_elements=_NAME_MAT.shape[0],
-                           ef_construction=200, M=16)
-    _HNSW_INDEX.add_items(_NAME_MAT_DENSE)
-    _HNSW_INDEX.set_ef(50)
-
-    print(f"[DEBUG] load_all: _HNSW_INDEX after  = {id(_HNSW_INDEX)}")
+    name_vec = joblib.load(f"{MODEL_DIR}/name_vectorizer.joblib", mmap_mode=mmap_mode)
+    name_mat = joblib.load(f"{MODEL_DIR}/name_matrix.joblib", mmap_mode=mmap_mode)
+    name_list = joblib.load(f"{MODEL_DIR}/name_list.joblib")
+
+    # train.py가 만든 번들이 있으면 엑셀 파싱/SVD/HNSW 구축 없이 바로 로딩
+    b = bundle.load_bundle(MODEL_DIR, FOOD_FILES, backend=cfg["ann_backend"], mmap=cfg["model_mmap"])
+    if b is not None and b["food_cols"].shape[1] == len(name_list):
+        foods = build_food_table(name_list, b["food_cols"].T) # 이미 (9, N) float32라 memmap 그대로 사용
+        name_svd = b["svd"]
+        name_proj = b["name_proj"]
+        hnsw_index = b["hnsw"]
+    else:
+        # 번들이 없거나 stale이면 느린 경로로 재구축
+        _, nums = load_kfda_columns(FOOD_FILES, sheet_name=None, cache_dir=f"{MODEL_DIR}/kfda_cache")
+        foods = build_food_table(name_list, feats_from_columns(nums)) # 행 dict 없이 컬럼에서 바로 피처 계산
+
+        # sparse -> dense float32 변환
+        name_svd, name_dense = bundle.fit_name_embedding(name_mat)
+        name_proj = np.ascontiguousarray(name_svd.components_.T, dtype=np.float32)
+
+        # ANN 인덱스 구축 (exact면 그래프 없이 dense 행렬 그대로)
+        hnsw_index = bundle.ExactIndex(name_dense) if cfg["ann_backend"] == "exact" else bundle.build_hnsw(name_dense)
+
+    if hasattr(hnsw_index, "set_ef"): # HNSW 검색 폭 (후보 수보다 작을 수 없음)
+        hnsw_index.set_ef(max(cfg["match_ef"], cfg["match_k"]))
+
+    # 이름 해시 인덱스 (중복 이름은 먼저 나온 행)
+    name_lookup = {}
+    for i, name in enumerate(foods.names):
+        name_lookup.setdefault(name, i)
 
     # 영양성분 전처리기
-    _IMPUTER = joblib.load(f"{MODEL_DIR}/nutrition_imputer.joblib")
-    _SCALER  = joblib.load(f"{MODEL_DIR}/nutrition_scaler.joblib")
+    imputer = joblib.load(f"{MODEL_DIR}/nutrition_imputer.joblib", mmap_mode=mmap_mode)
+    scaler  = joblib.load(f"{MODEL_DIR}/nutrition_scaler.joblib", mmap_mode=mmap_mode)
+
+    # 컨셉 정의 : train이 모델과 함께 복사해 둔 정의 우선 (학습한 컨셉과 로딩할 컨셉이 항상 같도록), 없으면 설정 경로
+    spec_path = Path(MODEL_DIR) / CONCEPTS_FILE
+    spec = load_concepts(spec_path if spec_path.exists() else cfg["concepts_path"])
 
-    # ML 모델
-    _MODELS = {c: joblib.load(f"{MODEL_DIR}/concept_model_{c}.joblib") for c in CONCEPTS}
-    print("마지막 진입")
+    # ML 모델 (정의에 있는데 학습되지 않은 컨셉이면 실패 -> 재로딩이면 기존 스냅샷 유지)
+    models = {}
+    for c in spec.concepts:
+        path = f"{MODEL_DIR}/concept_model_{c}.joblib"
+        if not Path(path).exists():
+            raise FileNotFoundError(f"컨셉 {c!r} 모델이 없습니다. train을 먼저 실행하세요: {path}")
+        models[c] = joblib.load(path, mmap_mode=mmap_mode)
 
     try:
-        _CALIB = joblib.load(f"{MODEL_DIR}/calibration.joblib") # calibration 로딩
+        calib = joblib.load(f"{MODEL_DIR}/calibration.joblib") # calibration 로딩
     except Exception:
-        _CALIB = None
+        calib = None
+
+    # 컨셉별 최종 점수를 전체 행에 대해 미리 계산
+    X = nutrient_space(foods, imputer, scaler)
+    score_table = build_score_table(foods, imputer, scaler, models, calib, spec, X=X)
+    with metrics.stage("catalog_index"):
+        catalog = build_catalog_index(foods, score_table)
+    with metrics.stage("nutrient_index"):
+        nutrients = build_nutrient_index(X, foods.names)
+
+    return Snapshot(
+        generation=generation,
+        foods=foods,
+        name_list=foods.names,
+        name_vec=name_vec,
+        name_mat=name_mat,
+        name_svd=name_svd,
+        name_proj=name_proj,
+        name_lookup=name_lookup,
+        norm_lookup=build_norm_index(foods.names),
+        hnsw_index=hnsw_index,
+        imputer=imputer,
+        scaler=scaler,
+        models=models,
+        calib=calib,
+        score_table=score_table,
+        concept_spec=spec,
+        catalog=catalog,
+        nutrients=nutrients,
+        concepts=list(spec.concepts),
+        concept_index={c: i for i, c in enumerate(spec.concepts)},
+    )
+
+# 캐시에 DB와 모델 전부 로딩 : 새 스냅샷을 다 만든 뒤 참조 하나만 교체
+# 실패하면 기존 스냅샷을 그대로 유지하고 예외를 올림
+def load_all() -> Snapshot:
+    global _SNAPSHOT
+    with _RELOAD_LOCK:
+        generation = (_SNAPSHOT.generation if _SNAPSHOT else 0) + 1
+        with metrics.stage("load_all"):
+            snap = build_snapshot(generation)
+        _SNAPSHOT = snap
+    return snap
+
+# /metrics : 현재 스냅샷 세대/행 수/로딩 시각
+@metrics.collector
+def _collect():
+    snap = _SNAPSHOT
+    if snap is not None:
+        yield "leftovers_snapshot_generation", "gauge", "loaded snapshot generation", [({}, snap.generation)]
+        yield "leftovers_index_rows", "gauge", "food rows in the loaded index", [({}, len(snap.foods))]
+        yield "leftovers_snapshot_loaded_at_seconds", "gauge", "unix time the snapshot was loaded", [({}, snap.loaded_at)]
+
+# 재로딩 중인지 (관리자 API에서 중복 요청 방지용)
+def reloading() -> bool:
+    return _RELOAD_LOCK.locked()
+
+
+# 변경 감지용 시그니처 : 학습 완료 표시 파일의 (크기, 수정시각) / 없으면 None
+# 디렉토리 전체를 보지 않음 -> 단계 사이(인덱스만 바뀌고 컨셉 모델은 학습 중)나 kfda_cache 갱신에는 반응하지 않음
+def _model_signature():
+    try:
+        st = (Path(MODEL_DIR) / TRAIN_DONE).stat()
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+# 학습 완료 표시가 바뀌면 백그라운드에서 재로딩 (interval_s <= 0 이면 비활성)
+# train은 이 파일을 모든 산출물을 쓴 뒤 원자적으로 교체하므로 보이는 순간 한 세대가 모두 준비된 상태
+def start_watcher(interval_s: float) -> Optional[threading.Thread]:
+    if interval_s <= 0:
+        return None
+
+    def _watch():
+        last = _model_signature()
+        while True:
+            time.sleep(interval_s)
+            sig = _model_signature()
+            if sig is None or sig == last:
+                continue
+            try:
+                load_all()
+                print(f"[loader] 학습 완료 감지 -> 재로딩 완료 (generation={_SNAPSHOT.generation})")
+            except Exception as e: # 재로딩 실패 시 기존 스냅샷 유지 (다음 학습 완료 때 다시 시도)
+                print(f"[loader] 재로딩 실패, 기존 모델 유지: {e!r}")
+            last = sig
+
+    t = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+    t.start()
+    return t
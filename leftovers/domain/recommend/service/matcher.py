@@ -1,20 +1,185 @@
+import threading
 import numpy as np
+from rapidfuzz import fuzz
+from leftovers.core.cache.lru_cache import LRUCache
+from leftovers.core.config.config import settings
+from leftovers.core.metrics import metrics
 from leftovers.domain.recommend.service import loader
+from leftovers.domain.recommend.service.name_norm import normalize_name
 
-# 메뉴 이름이 유사한 것 찾기
-def match_top1(query: str):
-    if not loader._NAME_LIST or loader._HNSW_INDEX is None : # 로딩된 메뉴가 없을 경우, ANN 인덱스가 없을 경우
-        return (-1, "", 0.0) # 매칭 실패
-    
-    if query in loader._NAME_LOOKUP: # 입력이 DB에 존재하면 변환 스킵하고 캐싱된 벡터 사용
-        query_vector = loader._NAME_LOOKUP[query].astype(np.float32).reshape(1, -1)
+# 매칭 경로별 카운터 : exact(이름 그대로) / normalized(정규화 이름) / cached(ANN 결과 캐시) / ann(HNSW)
+_STATS = {"exact": 0, "normalized": 0, "cached": 0, "ann": 0}
+_STATS_LOCK = threading.Lock()
+
+# ANN 결과 캐시 : (세대, 정규화 쿼리, k) -> (인덱스, 유사도) / 스냅샷이 바뀌면 비움
+# 해시 인덱스(norm_lookup)처럼 정규화 이름이 같으면 같은 메뉴로 봄 -> 띄어쓰기/대소문자/괄호 수식어만 다른 쿼리도 캐시 적중
+_cfg = settings()
+_CACHE = LRUCache(_cfg["match_cache_size"], _cfg["match_cache_ttl_s"])
+
+# /metrics : 매칭 경로별 누적 카운트 + ANN 결과 캐시
+@metrics.collector
+def _collect():
+    with _STATS_LOCK:
+        s = dict(_STATS)
+    yield "leftovers_match_total", "counter", "menu matches by path", [({"kind": k}, v) for k, v in s.items()]
+
+metrics.register_cache("match", _CACHE.stats)
+
+# knn_query 스레드 수 (-1이면 코어 전체) : 벌크 작업처럼 프로세스 여러 개로 나눌 때는 프로세스당 1로 낮춤
+KNN_THREADS = -1
+
+# 메뉴 이름 -> 인덱스와 같은 공간의 dense 벡터 (vectorizer -> SVD -> L2 정규화)
+def embed_queries(queries: list[str], snap=None) -> np.ndarray:
+    snap = snap or loader.current()
+    sparse = snap.name_vec.transform([str(q) for q in queries]).astype(np.float32)
+    dense = np.asarray(sparse @ snap.name_proj) # name_svd.transform과 동일 (float32 투영)
+    norms = np.linalg.norm(dense, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0 # 어휘에 없는 글자만 있는 쿼리는 0 벡터 그대로
+    return dense / norms
+
+# 해시 인덱스 조회 : 이름 그대로 -> 정규화 이름 순서, 없으면 None
+def lookup_exact(query: str, snap=None):
+    snap = snap or loader.current()
+    idx = snap.name_lookup.get(query)
+    if idx is not None:
+        return idx, "exact"
+    idx = snap.norm_lookup.get(normalize_name(query))
+    if idx is not None:
+        return idx, "normalized"
+    return None, "ann"
+
+# 여러 메뉴를 한 번에 매칭 : 해시 인덱스에 있으면 유사도 1.0으로 바로 반환, 이전 ANN 결과가 캐시에 있으면 재사용,
+# 나머지는 한 번에 벡터화해서 knn_query도 한 번만 호출
+# 반환 : (인덱스 (n, k), 이름 [[...]], 유사도 (n, k)) / 실패 시 인덱스 -1
+def match_many(queries: list[str], k: int = 1, snap=None):
+    snap = snap or loader.current()
+    n = len(queries)
+    labels = np.full((n, k), -1, dtype=np.int64)
+    sims = np.zeros((n, k), dtype=np.float64)
+    if n == 0 or snap is None or not snap.name_list: # 로딩된 메뉴가 없을 경우
+        return (labels, [[""] * k for _ in range(n)], sims)
+
+    kk = min(k, len(snap.name_list))
+    _CACHE.sync(snap.generation)
+    counts = dict.fromkeys(_STATS, 0)
+    misses, keys = [], {}
+    for i, q in enumerate(queries):
+        idx, kind = lookup_exact(q, snap)
+        if idx is not None:
+            labels[i, 0] = idx
+            sims[i, 0] = 1.0
+        else:
+            keys[i] = (snap.generation, normalize_name(q), kk)
+            cached = _CACHE.get(keys[i])
+            if cached is None:
+                misses.append(i)
+            else:
+                kind = "cached"
+                labels[i, :kk], sims[i, :kk] = cached
+        counts[kind] += 1
+
+    with _STATS_LOCK:
+        for kind, c in counts.items():
+            _STATS[kind] += c
+
+    if misses:
+        with metrics.stage("embed"):
+            vectors = embed_queries([queries[i] for i in misses], snap)
+        with metrics.stage("ann"):
+            ann_labels, distances = snap.hnsw_index.knn_query(vectors, k=kk, num_threads=KNN_THREADS) # ANN(HNSW) 배치 검색
+        ann_sims = 1.0 - distances.astype(np.float64)
+        ann_sims[~np.isfinite(ann_sims)] = 0.0 # NaN이나 inf 나오면 0.0으로 보정
+        # 어휘와 겹치는 n-gram이 없는 쿼리("zzzz", "")는 0 벡터 -> HNSW가 아무 행이나 돌려주므로 매칭 실패 처리
+        # 유사도가 MATCH_MIN_SIM 이하인 후보도 실패 (-1, 유사도 0)
+        weak = (ann_sims <= _cfg["match_min_sim"]) | ~vectors.any(axis=1)[:, None]
+        ann_labels = np.where(weak, -1, ann_labels.astype(np.int64))
+        ann_sims[weak] = 0.0
+        labels[misses, :kk] = ann_labels
+        sims[misses, :kk] = ann_sims
+        for i in misses:
+            _CACHE.put(keys[i], (labels[i, :kk].copy(), sims[i, :kk].copy()))
+
+    names = [[snap.name_list[j] if j >= 0 else "" for j in row] for row in labels]
+    return (labels, names, sims)
+
+# 후보 점수 재계산 : (m, k) 후보 행 번호 -> (m, k) 점수 (후보가 없는 칸은 -inf)
+def rerank_scores(queries: list[str], cand: np.ndarray, reranker: str, snap=None) -> np.ndarray:
+    snap = snap or loader.current()
+    m, k = cand.shape
+    valid = cand >= 0
+    scores = np.full((m, k), -np.inf)
+
+    if reranker == "tfidf": # TF-IDF 희소 행 정확 코사인 (행은 이미 L2 정규화) : 후보 행만 모아서 한 번에 내적
+        q = snap.name_vec.transform([str(x) for x in queries])
+        rows, cols = np.nonzero(valid)
+        dots = snap.name_mat[cand[rows, cols]].multiply(q[rows]).sum(axis=1)
+        scores[rows, cols] = np.asarray(dots).ravel()
+    elif reranker == "rapidfuzz": # 정규화 이름 편집 거리 유사도 (0~1)
+        for i, query in enumerate(queries):
+            nq = normalize_name(query)
+            for j in np.nonzero(valid[i])[0]:
+                scores[i, j] = fuzz.ratio(nq, normalize_name(snap.name_list[cand[i, j]])) / 100.0
     else:
-        query_vector = loader._NAME_VEC.transform([str(query)]).toarray().astype(np.float32)
-    
-    labels, distances = loader._HNSW_INDEX.knn_query(query_vector, k=1) # ANN(HNSW) 검색
-    idx = int(labels[0][0])
-    similarity = 1 - float(distances[0][0]) # 가장 높은 유사도를 가진 인덱스
-
-    if not np.isfinite(similarity): # NaN이나 inf 나오면
-        similarity = 0.0 # 0.0.으로 보정
-    return (idx, loader._NAME_LIST[idx], similarity)
\ No newline at end of file
+        raise ValueError(f"알 수 없는 reranker: {reranker}")
+    return scores
+
+# 후보 k개를 한 번에 받아 재정렬한 뒤 최고 후보 + 신뢰 마진(1위 점수 - 이름이 다른 최고 후보 점수) 반환
+# KFDA에는 같은 이름 행이 많아 바로 다음 후보와 비교하면 확실한 매칭도 마진 0이 됨 -> 정규화 이름이 다른 후보와 비교 (없으면 1위 점수)
+# k <= 1 이거나 reranker가 none이면 기존 top-1과 같음 (마진은 후보가 2개 이상일 때만)
+# 해시 인덱스로 바로 찾은 메뉴는 유사도/마진 1.0
+# 반환 : (인덱스 (n,), 이름 [...], 유사도 (n,) (고른 후보의 ANN/정확 코사인), 마진 (n,), 재정렬 점수 (n,) / 없으면 NaN) / 실패 시 인덱스 -1
+def match_best(queries: list[str], k: int = None, reranker: str = None, snap=None):
+    snap = snap or loader.current()
+    k = max(1, _cfg["match_k"] if k is None else k)
+    reranker = _cfg["match_reranker"] if reranker is None else reranker
+
+    labels, names, sims = match_many(queries, k=k, snap=snap)
+    n = len(queries)
+    best, best_sims = labels[:, 0].copy(), sims[:, 0].copy()
+    margins = np.full(n, np.nan)
+    rerank = np.full(n, np.nan)
+    if k <= 1 or n == 0:
+        return best, [row[0] for row in names], best_sims, margins, rerank
+
+    # 해시 적중은 0열만 채워지고 유사도 1.0 / 나머지 매칭은 ANN 결과 (유사도 하한에 걸린 후보는 -1이라 2위가 없을 수 있음)
+    hashed = (labels[:, 0] >= 0) & (labels[:, 1] < 0) & (sims[:, 0] == 1.0)
+    ann = (labels[:, 0] >= 0) & ~hashed
+    margins[hashed] = 1.0
+    if ann.any():
+        idx = np.nonzero(ann)[0]
+        cand = labels[idx]
+        if reranker == "none": # ANN 유사도 순서 그대로
+            scores = np.where(cand >= 0, sims[idx], -np.inf)
+        else:
+            with metrics.stage("rerank"):
+                scores = rerank_scores([queries[i] for i in idx], cand, reranker, snap)
+        order = np.argsort(-scores, axis=1, kind="stable") # 동점이면 ANN 순서 유지
+        ranked = np.take_along_axis(scores, order, axis=1)
+        ranked_cand = np.take_along_axis(cand, order, axis=1)
+        best[idx] = ranked_cand[:, 0]
+        best_sims[idx] = np.take_along_axis(sims[idx], order[:, :1], axis=1).ravel()
+        if reranker != "none":
+            rerank[idx] = ranked[:, 0]
+        for r, i in enumerate(idx):
+            top = normalize_name(snap.name_list[ranked_cand[r, 0]])
+            other = next((ranked[r, j] for j in range(1, k) if np.isfinite(ranked[r, j])
+                          and normalize_name(snap.name_list[ranked_cand[r, j]]) != top), None)
+            margins[i] = ranked[r, 0] - other if other is not None else ranked[r, 0]
+
+    out_names = [snap.name_list[j] if j >= 0 else "" for j in best]
+    return best, out_names, best_sims, margins, rerank
+
+# 메뉴 이름이 유사한 것 찾기 (match_k/match_reranker 설정에 따라 후보 재정렬)
+def match_top1(query: str, snap=None):
+    best, names, sims, _, _ = match_best([query], snap=snap)
+    return (int(best[0]), names[0], float(sims[0]))
+
+# 매칭 경로별 카운트와 해시 인덱스 적중률
+def stats() -> dict:
+    with _STATS_LOCK:
+        s = dict(_STATS)
+    total = sum(s.values())
+    s["total"] = total
+    s["hit_rate"] = round((s["exact"] + s["normalized"]) / total, 4) if total else 0.0
+    s["cache"] = _CACHE.stats()
+    return s
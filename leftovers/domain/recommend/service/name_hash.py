@@ -0,0 +1,103 @@
+from __future__ import annotations
+import unicodedata
+import numpy as np
+import scipy.sparse as sp
+
+# 어휘 사전 없는 이름 벡터화 : 한글 음절을 자모로 분해(NFKD)한 뒤 글자 n-gram을 해시로 고정 폭 열에 매핑 + IDF 가중치 + L2 정규화
+# - TfidfVectorizer처럼 n-gram -> 열 번호 파이썬 dict를 들고 있지 않음 -> 피클이 작고 로딩/메모리 부담 없음 (IDF는 numpy 배열 하나, memmap 가능)
+# - 자모 단위라 받침/모음 하나 틀린 오타도 n-gram 대부분이 그대로 겹침 ("김치찌게" vs "김치찌개")
+# - n-gram 해시는 배치 전체 코드포인트 배열에서 n 길이별로 한 번씩 벡터 연산 (쿼리/n-gram마다 파이썬 루프 없음)
+# - fit 때 한 번도 나오지 않은 해시 열은 버리고 나온 열만 앞에서부터 다시 번호를 매김 (TfidfVectorizer가 어휘 밖 n-gram을 버리는 것과 같음)
+#   -> SVD 투영 행렬이 (사용된 열 수 x SVD_DIM)이라 n_features를 키워도 학습 데이터에 없는 열만큼 메모리를 쓰지 않음
+# transform 결과는 TfidfVectorizer와 같은 (문서 수, 열 수) CSR float32 행렬이라 matcher/번들은 그대로 사용
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+
+
+# 소문자 + 공백 정리 + 자모 분해 (호환용 자모 "ㄱ", 전각 문자도 같은 글자로)
+def jamo(text: str) -> str:
+    return unicodedata.normalize("NFKD", " ".join(str(text).lower().split()))
+
+
+class HashedNgramVectorizer:
+    def __init__(self, ngram_range=(2, 6), n_features: int = 1 << 13):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features는 2의 거듭제곱이어야 합니다.")
+        self.ngram_range = tuple(ngram_range)
+        self.n_features = int(n_features)
+        self.columns = None # (n_features,) int32 해시 열 -> 출력 열 번호 (fit에 없던 열은 -1) : fit 전에는 None (해시 열 그대로)
+        self.idf = None # (출력 열 수,) float32 : fit 전에는 None (가중치 없이 개수만)
+
+    # 문서 목록 -> n-gram 해시 개수 행렬 (CSR, 중복 n-gram은 합산)
+    def _counts(self, docs) -> sp.csr_matrix:
+        texts = [jamo(d) for d in docs]
+        lens = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        doc_of = np.repeat(np.arange(len(texts)), lens) # 글자 위치 -> 문서 번호
+        end_of = np.repeat(np.cumsum(lens), lens) # 글자 위치 -> 그 문서의 끝 위치
+
+        lo, hi = self.ngram_range
+        h = np.full(len(codes), _FNV_OFFSET, dtype=np.uint64)
+        rows, cols = [], []
+        pos = np.arange(len(codes))
+        with np.errstate(over="ignore"):
+            for n in range(1, hi + 1):
+                # 위치 p에서 시작하는 길이 n 해시 = 길이 n-1 해시에 p+n-1 글자를 FNV-1a로 이어붙임
+                m = len(codes) - n + 1
+                if m <= 0:
+                    break
+                h = h[:m]
+                h ^= codes[n - 1:]
+                h *= _FNV_PRIME
+                if n < lo:
+                    continue
+                ok = pos[:m] + n <= end_of[:m] # 문서 경계를 넘는 n-gram 제외
+                mixed = h[ok] ^ (h[ok] >> np.uint64(29))
+                rows.append(doc_of[:m][ok])
+                cols.append((mixed & np.uint64(self.n_features - 1)).astype(np.int64))
+
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+        width = self.n_features
+        if self.columns is not None: # fit에 없던 해시 열은 버림
+            cols = self.columns[cols]
+            rows, cols = rows[cols >= 0], cols[cols >= 0]
+            width = int(self.columns.max()) + 1
+        X = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(len(texts), width))
+        X.sum_duplicates()
+        return X
+
+    # 학습 문서에 나온 해시 열만 남김 : 해시 열 개수 행렬 -> 사용된 열만 남긴 행렬 (열 순서는 해시 값 순)
+    def _fit_columns(self, X: sp.csr_matrix) -> sp.csr_matrix:
+        used = np.unique(X.indices)
+        self.columns = np.full(self.n_features, -1, dtype=np.int32)
+        self.columns[used] = np.arange(len(used), dtype=np.int32)
+        return X[:, used].tocsr()
+
+    # IDF (sklearn smooth_idf와 같은 식) : log((1 + 문서 수) / (1 + 등장 문서 수)) + 1
+    def _fit_idf(self, X: sp.csr_matrix) -> None:
+        df = np.bincount(X.indices, minlength=X.shape[1])
+        self.idf = (np.log((1 + X.shape[0]) / (1 + df)) + 1).astype(np.float32)
+
+    # 개수 행렬 -> IDF 가중치 + 행별 L2 정규화 (n-gram이 하나도 없는 행은 0 벡터 그대로)
+    def _weigh(self, X: sp.csr_matrix) -> sp.csr_matrix:
+        if self.idf is not None:
+            X.data *= self.idf[X.indices]
+        per_row = np.diff(X.indptr)
+        sq = np.bincount(np.repeat(np.arange(X.shape[0]), per_row), weights=X.data ** 2, minlength=X.shape[0])
+        X.data /= np.repeat(np.sqrt(sq).astype(np.float32), per_row)
+        return X
+
+    def fit(self, docs):
+        self.columns = None
+        self._fit_idf(self._fit_columns(self._counts(docs)))
+        return self
+
+    def transform(self, docs) -> sp.csr_matrix:
+        return self._weigh(self._counts(docs))
+
+    def fit_transform(self, docs) -> sp.csr_matrix:
+        self.columns = None
+        X = self._fit_columns(self._counts(docs))
+        self._fit_idf(X)
+        return self._weigh(X)
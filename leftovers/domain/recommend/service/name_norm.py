@@ -0,0 +1,27 @@
+import re
+import unicodedata
+
+# 괄호로 감싼 수식어 : (국산), [냉동], （가정식） 등
+_PAREN_RE = re.compile(r"[\(\[\{（［【〔<].*?[\)\]\}）］】〕>]")
+# 공백/구두점/밑줄 (한글, 영문, 숫자만 남김)
+_PUNCT_RE = re.compile(r"[\W_]+")
+
+# 메뉴 이름 정규화 : NFKC(전각/조합형 자모 통일) -> 괄호 수식어 제거 -> 공백/구두점 제거 -> 소문자
+def normalize_name(name: str) -> str:
+    s = unicodedata.normalize("NFKC", str(name))
+    stripped = _PUNCT_RE.sub("", _PAREN_RE.sub("", s))
+    if not stripped: # 이름 전체가 괄호였다면 괄호 안 내용이라도 사용
+        stripped = _PUNCT_RE.sub("", s)
+    return stripped.lower()
+
+# 정규화 이름 -> 행 번호 인덱스 : 같은 키면 수식어 없는 이름(이름 == 키)을 우선, 그 외에는 먼저 나온 행
+def build_norm_index(names: list[str]) -> dict:
+    index = {}
+    for i, name in enumerate(names):
+        key = normalize_name(name)
+        if not key:
+            continue
+        j = index.get(key)
+        if j is None or (names[j] != key and name == key):
+            index[key] = i
+    return index
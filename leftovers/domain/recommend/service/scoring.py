@@ -4,6 +4,9 @@ import numpy as np
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
+from leftovers.domain.recommend.service.concepts import RULE_FEATURES, ConceptSpec, default_spec
+from leftovers.domain.recommend.service.food_table import FoodTable
+
 # v를 low~high 범위로 자르기
 def _clip(v, low, high):
     return float(np.minimum(np.maximum(v, low), high))
@@ -87,6 +90,49 @@ def fit_calibration(rows: List[dict]) -> Calib:
         }
     return Calib(q=q)
 
+# fit_calibration 벡터 버전 : feats (N, 9) float64 -> 같은 Calib (행 dict를 만들지 않음)
+def fit_calibration_feats(feats) -> Calib:
+    F = np.asarray(feats, dtype=np.float64)
+
+    def col(i): # _safe와 동일하게 NaN/inf는 0으로
+        return np.nan_to_num(F[:, i], nan=0.0, posinf=0.0, neginf=0.0)
+
+    kcal, protein, fat, carbs, sugar, fiber, sodium, sat = (col(i) for i in range(8))
+    netc = np.maximum(carbs - fiber, 0.0)
+
+    def ratio(n, d): # _ratio와 동일 : 분모가 0 이하면 0
+        return np.divide(n, d, out=np.zeros_like(n), where=d > 0)
+
+    vals = {
+        "kcal":kcal, "protein":protein, "fat":fat, "carbs":carbs, "sugar":sugar,
+        "fiber":fiber, "sodium":sodium, "sat_fat":sat, "netcarb":netc,
+        "prot_density":ratio(protein, kcal), "fat_density":ratio(fat, kcal), "carb_density":ratio(carbs, kcal),
+        "sat_ratio":sat / np.maximum(fat, 1e-9),
+    }
+
+    q = {}
+    for k in DEFAULT_KEYS:
+        vs = vals[k][np.isfinite(vals[k])]
+        if not vs.size:
+            q[k] = {"p10":0,"p25":0,"p50":0,"p75":1,"p90":1}
+            continue
+        q[k] = {f"p{p}": float(np.percentile(vs, p)) for p in (10, 25, 50, 75, 90)}
+    return Calib(q=q)
+
+# 분위수가 없을 때 쓰는 정규화 기준 (p10, p90)
+_DEFAULT_BOUNDS = {
+    "kcal": (50, 600), "protein": (2, 25), "fat": (0.5, 30),
+    "carbs": (1, 70), "sugar": (0.5, 20), "fiber": (0.5, 10),
+    "sodium": (50, 1200), "sat_fat": (0.1, 10), "netcarb": (1, 60),
+}
+
+# 정규화 기준점
+def _quantile(calib: Optional[Calib], k: str, key: str) -> float:
+    if calib and calib.q.get(key):
+        return calib.q[key][k]
+    lo, hi = _DEFAULT_BOUNDS.get(key, (0,1))
+    return {"p10":lo, "p90":hi}[k] # 10% 분위값 / 90% 분위값
+
 # 정규화
 def _to_z01(x, lo, hi, invert=False):
     if hi <= lo: # 범위 잘못되면 중앙값 리턴
@@ -95,8 +141,15 @@ def _to_z01(x, lo, hi, invert=False):
     u = (v - lo) / (hi - lo)
     return (1.0 - u) if invert else u # invert가 True일 경우 높을수록 좋은 값/ False일 경우 낮을수록 좋은 값
 
-# 점수 계산
-def compute_score(concept: str, r: dict, calib: Optional[Calib]) -> float:
+# 조건 하나 판정 (gt/ge/lt/le 중 있는 것 전부 만족해야 함)
+def _match(rule: dict, x: float) -> bool:
+    return (("gt" not in rule or x > rule["gt"]) and ("ge" not in rule or x >= rule["ge"])
+            and ("lt" not in rule or x < rule["lt"]) and ("le" not in rule or x <= rule["le"]))
+
+# 점수 계산 (한 행) : 컨셉 정의(concepts.json)를 그대로 해석 / 배치 score_all과 같은 결과 (합산 순서만 다름)
+def compute_score(concept: str, r: dict, calib: Optional[Calib], spec: Optional[ConceptSpec] = None) -> float:
+    src = (spec or default_spec()).source
+    section = (src.get("concepts") or {}).get(concept) or src.get("default") or {} # 정의에 없는 컨셉은 기본 규칙
     name    = str(r.get("name") or "")
     kcal    = _safe(r.get("kcal"))
     protein = _safe(r.get("protein"))
@@ -106,126 +159,102 @@ def compute_score(concept: str, r: dict, calib: Optional[Calib]) -> float:
     fiber   = _safe(r.get("fiber"))
     sodium  = _safe(r.get("sodium"))
     sat     = _safe(r.get("sat_fat", fat))
-    netc    = _net_carb(carbs, fiber)
-
-    def q(k, key): # 정규화 기준점
-        if calib and calib.q.get(key):
-            return calib.q[key][k]
-        defaults = {
-            "kcal": (50, 600), "protein": (2, 25), "fat": (0.5, 30),
-            "carbs": (1, 70), "sugar": (0.5, 20), "fiber": (0.5, 10),
-            "sodium": (50, 1200), "sat_fat": (0.1, 10), "netcarb": (1, 60),
-        }
-        lo, hi = defaults.get(key, (0,1))
-        return {"p10":lo, "p90":hi}[k] # 10% 분위값 / 90% 분위값
+    v = {
+        "kcal":kcal, "protein":protein, "fat":fat, "carbs":carbs, "sugar":sugar,
+        "fiber":fiber, "sodium":sodium, "sat_fat":sat, "netcarb":_net_carb(carbs, fiber),
+        "prot_density":_ratio(protein, max(kcal, 1e-9)), "soup":1.0 if name and _SOUP_RE.search(name) else 0.0,
+    }
+
+    for rule in section.get("cutoffs") or []: # 점수 0으로 고정
+        if _match(rule, v[rule["feature"]]):
+            return 0.0
 
     z = {}
-    z["kcal_low"]   = _to_z01(kcal,  q("p10","kcal"),    q("p90","kcal"),    invert=True)
-    z["kcal_high"]  = _to_z01(kcal,  q("p10","kcal"),    q("p90","kcal"))
-    z["protein"]    = _to_z01(protein, q("p10","protein"), q("p90","protein"))
-    z["fat_low"]    = _to_z01(fat,   q("p10","fat"),     q("p90","fat"),     invert=True)
-    z["fat_high"]   = _to_z01(fat,   q("p10","fat"),     q("p90","fat"))
-    z["carb_low"]   = _to_z01(carbs, q("p10","carbs"),   q("p90","carbs"),   invert=True)
-    z["sugar_low"]  = _to_z01(sugar, q("p10","sugar"),   q("p90","sugar"),   invert=True)
-    z["fiber"]      = _to_z01(fiber, q("p10","fiber"),   q("p90","fiber"))
-    z["sodium_low"] = _to_z01(sodium,q("p10","sodium"),  q("p90","sodium"),  invert=True)
-    z["sat_low"]    = _to_z01(sat,   q("p10","sat_fat"), q("p90","sat_fat"), invert=True)
-    z["netcarb_low"]= _to_z01(netc,  q("p10","netcarb"), q("p90","netcarb"), invert=True)
-
-    hard_pen = 0.0 # 강제 페널티/보너스
-    if sodium > 2000: hard_pen -= 0.15
-    if sugar  >   30: hard_pen -= 0.10
-    if kcal   >  800: hard_pen -= 0.10
-    if sat    >   15: hard_pen -= 0.08
-
-    if concept == "diet":
-        w = dict(
-            kcal_low=0.28, protein=0.25, sugar_low=0.12,
-            sodium_low=0.10,
-            fat_low=0.12, fiber=0.08, netcarb_low=0.05
-        )
-        if kcal > 150: hard_pen -= 0.15
-        if sugar > 4:  hard_pen -= 0.15
-        if carbs > 15: hard_pen -= 0.10
-
-        if kcal < 80:   hard_pen += 0.25
-        elif kcal < 120: hard_pen += 0.20
-        elif kcal < 150: hard_pen += 0.15
-
-
-    elif concept == "keto":
-        w = dict(
-            netcarb_low=0.40, fat_high=0.15, protein=0.20,
-            sugar_low=0.10, sodium_low=0.10, sat_low=0.05
-        )
-        if netc > 15:   hard_pen -= 0.20
-        if sodium > 800: hard_pen -= 0.08
-
-
-    elif concept == "low_sodium":
-        w = dict(
-            sodium_low=0.60,
-            kcal_low=0.12,
-            sugar_low=0.12,
-            protein=0.08,
-            fiber=0.06,
-            fat_low=0.02
-        )
-        s = sodium
-        if s > 240: return 0.0
-        if s > 60:  hard_pen -= min(0.35, 0.0014 * (s - 60))
-        if s > 80:  hard_pen -= 0.06
-        if s > 120: hard_pen -= 0.18
-        if s > 160: hard_pen -= 0.22
-        if s > 200: hard_pen -= 0.30
-        if name and _SOUP_RE.search(name):
-            hard_pen -= 0.08
-
-
-    elif concept == "glycemic":
-        w = dict(
-            netcarb_low=0.35, sugar_low=0.20, fiber=0.15,
-            protein=0.15, sat_low=0.10, sodium_low=0.10
-        )
-        if sugar > 2:  hard_pen -= 0.20
-        if netc  > 7:  hard_pen -= 0.25
-        if sodium > 230: hard_pen -= 0.15
-        elif sodium > 180: hard_pen -= 0.08
-
-
-    elif concept == "bulking":
-        prot_dens = _ratio(protein, max(kcal, 1e-9))
-        z["prot_density"] = _to_z01(prot_dens, 0.02, 0.25)
-
-        w = dict(
-            protein=0.50,
-            prot_density=0.15,
-            kcal_high=0.15,
-            fat_high=0.05,
-            sugar_low=0.05,
-            sodium_low=0.03,
-            sat_low=0.02
-        )
-
-        if protein < 6:        hard_pen -= 0.15
-        if prot_dens < 0.04:   hard_pen -= 0.15
-
-        if protein > 15:       hard_pen += 0.65
-        if protein > 17:       hard_pen += 0.75
-        if protein > 20:       hard_pen += 0.85
-        if prot_dens > 0.10:   hard_pen += 0.65
-        if prot_dens > 0.15:   hard_pen += 0.75
-        if prot_dens > 0.20:   hard_pen += 0.85 
-        base = sum(z.get(k, 0.0) * wv for k, wv in w.items())
-        score = base * (1 + hard_pen)
-
-
-    else:
-        w = dict(
-            protein=0.25, fiber=0.10, sugar_low=0.15,
-            sodium_low=0.15, fat_low=0.10, netcarb_low=0.25
-        )
-
-    base = sum(z.get(k, 0.0) * wv for k, wv in w.items())
-    score = base + hard_pen
-    return _clip(score, 0.0, 1.0) * 100.0
+    for k, zd in (src.get("z_features") or {}).items():
+        lo, hi = zd["bounds"] if zd.get("bounds") else (_quantile(calib, "p10", zd["feature"]), _quantile(calib, "p90", zd["feature"]))
+        z[k] = _to_z01(v[zd["feature"]], lo, hi, invert=zd.get("invert", False))
+
+    hard_pen = 0.0 # 강제 페널티/보너스 (전역 규칙 -> 컨셉 규칙)
+    for rule in (src.get("penalties") or []) + (section.get("penalties") or []):
+        x = v[rule["feature"]]
+        if not _match(rule, x):
+            continue
+        if "ramp" in rule: # 하한을 넘은 만큼 비례 (크기는 cap까지)
+            amount = min(rule.get("cap", np.inf), abs(rule["ramp"]) * (x - rule.get("ge", rule.get("gt"))))
+            hard_pen += float(np.copysign(amount, rule["ramp"]))
+        else:
+            hard_pen += rule.get("delta", 0.0)
+
+    base = sum(z[k] * wv for k, wv in (section.get("weights") or {}).items())
+    return _clip(base + hard_pen, 0.0, 1.0) * 100.0
+
+
+# ---- 배치 점수 계산 (compute_score 벡터 버전) ----
+
+# 피처 행렬 컬럼 순서 (evaluator.to_feat / Snapshot.db_feats와 동일)
+FEAT_COLS = ["kcal","protein","fat","carbs","sugar","fiber","sodium","sat_fat","netcarb"]
+_COL = {k: i for i, k in enumerate(FEAT_COLS)}
+
+# 국물류 이름 마스크 (low_sodium 페널티용) : 이름 배열이 고정이면 한 번만 만들어 재사용
+def soup_mask(names) -> np.ndarray:
+    return np.fromiter((bool(n) and _SOUP_RE.search(str(n)) is not None for n in names), dtype=bool, count=len(names))
+
+# 규칙 피처 행렬 (len(RULE_FEATURES), N) : 피처마다 연속 행 (규칙별로 행을 모아도 복사가 연속)
+# NaN/inf는 0(_safe와 동일), 순탄수는 보정된 값으로 다시 계산
+def rule_features(F: np.ndarray, names=None, soup=None) -> np.ndarray:
+    V = np.zeros((len(RULE_FEATURES), F.shape[0]))
+    V[:8] = F[:, :8].T
+    np.nan_to_num(V[:8], copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    kcal, protein, carbs, fiber = V[_COL["kcal"]], V[_COL["protein"]], V[_COL["carbs"]], V[_COL["fiber"]]
+    np.maximum(carbs - fiber, 0.0, out=V[_COL["netcarb"]])
+    np.divide(protein, np.maximum(kcal, 1e-9), out=V[RULE_FEATURES.index("prot_density")])
+    if soup is None and names is not None:
+        soup = soup_mask(names)
+    if soup is not None:
+        V[RULE_FEATURES.index("soup")] = soup
+    return V
+
+# 모든 컨셉 규칙 점수를 한 번에 : feats (N, 9) 또는 FoodTable -> (N, 컨셉 수 + 1) / 열 순서는 spec.concepts + 기본 규칙
+# 정규화 피처 x 가중치 행렬, 조건 마스크 x 가감값 행렬 (행렬곱 두 번, 컨셉별 분기 없음)
+# 반환 배열은 (컨셉 수 + 1, N)의 전치 뷰 : 컨셉 열 하나([:, j])가 메모리상 연속
+def score_all(feats, calib: Optional[Calib], spec: Optional[ConceptSpec] = None, names=None, soup=None) -> np.ndarray:
+    spec = spec or default_spec()
+    if isinstance(feats, FoodTable): # 컬럼형 테이블이면 컬럼 연속 뷰 + 테이블 이름 사용
+        names = feats.names if names is None else names
+        feats = feats.feats
+    F = np.asarray(feats, dtype=np.float64)
+    if F.ndim != 2 or F.shape[1] < 8:
+        raise ValueError(f"feats는 (N, {len(FEAT_COLS)}) 배열이어야 합니다: {F.shape}")
+    V = rule_features(F, names, soup)
+
+    # z 피처 : 고정 bounds 또는 분위수 p10~p90 -> 0~1 (범위가 잘못되면 0.5)
+    lo = np.array([b[0] if b else _quantile(calib, "p10", RULE_FEATURES[i]) for b, i in zip(spec.z_bounds, spec.z_src)])[:, None]
+    hi = np.array([b[1] if b else _quantile(calib, "p90", RULE_FEATURES[i]) for b, i in zip(spec.z_bounds, spec.z_src)])[:, None]
+    ok = (hi > lo).ravel()
+    Z = np.minimum(np.maximum(V[spec.z_src], lo), hi)
+    Z -= lo
+    Z /= np.where(hi > lo, hi - lo, 1.0)
+    np.subtract(1.0, Z, out=Z, where=spec.z_invert[:, None])
+    Z[~ok] = 0.5
+    score = spec.weights.T @ Z # (C+1, N)
+
+    # 페널티/보너스 : 조건 마스크(고정 delta 규칙은 1, ramp 규칙은 min(cap, |ramp| x (값 - 하한)))와 가감값 행렬 곱
+    X = V[spec.rule_src]
+    M = (X > spec.rule_lo[:, None]) & (X < spec.rule_hi[:, None])
+    M = M.astype(np.float64)
+    for r, origin, slope, cap in zip(spec.ramp_rows, spec.ramp_origin, spec.ramp_slope, spec.ramp_cap):
+        M[r] *= np.minimum(cap, slope * (X[r] - origin))
+    score += spec.rule_delta.T @ M
+
+    np.clip(score, 0.0, 1.0, out=score)
+    score *= 100.0
+    if len(spec.cut_src): # cutoff 조건을 만족한 행은 해당 컨셉 점수 0
+        X = V[spec.cut_src]
+        cut = (X > spec.cut_lo[:, None]) & (X < spec.cut_hi[:, None])
+        score[(spec.cut_cols.T @ cut) > 0] = 0.0
+    return score.T
+
+# 컨셉 하나 점수 배치 계산 : (N,) / 정의에 없는 컨셉은 기본 규칙
+def compute_scores(concept: str, feats, calib: Optional[Calib], names=None, soup=None, spec: Optional[ConceptSpec] = None) -> np.ndarray:
+    spec = spec or default_spec()
+    return score_all(feats, calib, spec, names, soup)[:, spec.col(concept)]
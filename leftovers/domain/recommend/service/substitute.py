@@ -0,0 +1,56 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Tuple
+import numpy as np
+
+# 영양 성분 공간 최근접 "더 건강한 대체 음식" 검색
+# 모델 입력과 같은 공간(결측치 보간 + 정규화한 9차원 벡터)에서 유클리드 거리로 가까운 음식 중 컨셉 점수가 더 높은 것만
+# 9차원이라 그래프 인덱스(HNSW) 없이 쿼리 블록 x 전체 행 행렬곱 한 번이 더 빠르고 정확함 (점수 조건도 마스크로 바로 적용)
+QUERY_BLOCK = 256 # 한 번에 거리를 계산할 쿼리 수 : (블록 x N) float32 행렬만 만듦
+
+
+@dataclass(frozen=True)
+class NutrientIndex:
+    vecs: np.ndarray # (N, 9) float32 C-contiguous 정규화 영양 벡터
+    sqnorm: np.ndarray # (N,) float32 행 제곱 노름
+    name_ids: np.ndarray # (N,) int32 같은 이름이면 같은 번호 (자기 자신/같은 이름 음식은 대체 후보에서 제외)
+
+
+def build_nutrient_index(X: np.ndarray, names: List[str]) -> NutrientIndex:
+    vecs = np.ascontiguousarray(X, dtype=np.float32)
+    ids = {}
+    name_ids = np.fromiter((ids.setdefault(n, len(ids)) for n in names), dtype=np.int32, count=len(names))
+    return NutrientIndex(vecs=vecs, sqnorm=np.einsum("ij,ij->i", vecs, vecs), name_ids=name_ids)
+
+
+# 쿼리 행마다 적합도(응답과 같이 반올림한 정수 점수)가 쿼리보다 min_gain점 이상 높은 음식 중 영양 벡터가 가까운 k개
+# 반환 : [(행 번호 (<=k,) int, 거리 (<=k,) float), ...] 쿼리 순서대로 (거리 오름차순, 같으면 행 번호 순) / 쿼리 행이 -1이면 빈 결과
+def find_substitutes(index: NutrientIndex, scores: np.ndarray, rows, k: int, min_gain: float = 1.0) -> List[Tuple[np.ndarray, np.ndarray]]:
+    rows = np.asarray(rows, dtype=np.int64)
+    scores = np.rint(np.asarray(scores, dtype=np.float32)) # 응답의 int(round(점수))와 같은 값 (둘 다 짝수 쪽 반올림)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0))
+    out = [empty] * len(rows)
+    valid = np.flatnonzero(rows >= 0)
+    n = len(index.sqnorm)
+    if k <= 0 or n == 0:
+        return out
+
+    kk = min(k, n)
+    for s in range(0, len(valid), QUERY_BLOCK):
+        pos = valid[s:s + QUERY_BLOCK]
+        q = rows[pos]
+        d = index.vecs[q] @ index.vecs.T # (b, N) 제곱 거리 = |q|^2 - 2 q.x + |x|^2
+        d *= -2.0
+        d += index.sqnorm
+        d += index.sqnorm[q][:, None]
+        d[scores[None, :] < (scores[q] + np.float32(min_gain))[:, None]] = np.inf # 적합도가 min_gain점 이상 높지 않은 음식 제외
+        d[index.name_ids[None, :] == index.name_ids[q][:, None]] = np.inf # 자기 자신/같은 이름 제외
+
+        kth = np.partition(d, kk - 1, axis=1)[:, kk - 1] # 쿼리별 k번째 거리
+        for i, p in enumerate(pos):
+            # k번째 거리와 같은 행까지 전부 -> 정렬 후 k개 (동점은 행 번호 순) / 후보가 k개보다 적으면 kth가 inf라 유한한 거리만
+            cand = np.flatnonzero(np.isfinite(d[i]) & (d[i] <= kth[i]))
+            dist = d[i, cand]
+            order = np.lexsort((cand, dist))[:kk]
+            out[p] = (cand[order], np.sqrt(np.maximum(dist[order], 0.0)))
+    return out
@@ -1,82 +1,225 @@
 from pathlib import Path
-import joblib
+import argparse
+import hashlib
+import json
+import os
+import time
 import numpy as np
-import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import RidgeCV
 from sklearn.metrics import mean_absolute_error
 from sklearn.impute import SimpleImputer
 
-from leftovers.domain.recommend.service.food_kfda_loader import load_kfda_excels
-from leftovers.domain.recommend.service.scoring import fit_calibration, compute_score
+from leftovers.core.config.config import settings
+from leftovers.domain.recommend.service import bundle, food_kfda_loader, name_hash, scoring
+from leftovers.domain.recommend.service.food_kfda_loader import load_kfda_columns
+from leftovers.domain.recommend.service.food_table import feats_from_columns
+from leftovers.domain.recommend.service.concepts import compile_concepts
+from leftovers.domain.recommend.service.scoring import fit_calibration_feats, score_all, soup_mask
 
 FOOD_FILES = ["leftovers/domain/recommend/data/foodData1.xlsx", "leftovers/domain/recommend/data/foodData2.xlsx"]
 MODEL_DIR = Path("leftovers/domain/recommend/model_store")
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 
-# 컨셉
-CONCEPTS = ["diet", "keto", "low_sodium", "glycemic", "bulking"]
-
-# 음식 딕셔너리를 벡터로 변환
-def _to_feat(n: dict) -> np.ndarray:
-    kcal    = float(n.get("kcal", 0.0))
-    protein = float(n.get("protein", 0.0))
-    fat     = float(n.get("fat", 0.0))
-    carbs   = float(n.get("carbs", 0.0))
-    sugar   = float(n.get("sugar", 0.0))
-    fiber   = float(n.get("fiber", 0.0))
-    sodium  = float(n.get("sodium", 0.0))  # mg / 100g
-    sat_fat = float(n.get("sat_fat", fat))
-    netcarb = max(carbs - fiber, 0.0) # 순탄수 (탄수 - 식이섬유)
-    return np.array([kcal, protein, fat, carbs, sugar, fiber, sodium, sat_fat, netcarb], dtype=float)
-
-def main():
-    # 데이터 로드
-    rows = load_kfda_excels(FOOD_FILES, sheet_name=None)
-    if not rows:
+# 하이퍼파라미터 (바뀌면 해당 단계만 다시 학습)
+NAME_NGRAM = (2, 5) # 이름 TF-IDF 글자 n-gram 범위
+NAME_HASH_NGRAM = (2, 6) # 해시 벡터화 자모 n-gram 범위 (음절 하나가 자모 2~3개)
+NAME_HASH_FEATURES = 1 << 13 # 해시 열 수 : 학습 데이터에 나온 열만 남기므로 SVD 투영 행렬은 최대 (이 값 x SVD_DIM) float32 = 8MB
+IMPUTE_STRATEGY = "median"
+RIDGE_ALPHAS = (0.1, 1.0, 3.0, 10.0, 30.0) # 규제 강도 후보
+RIDGE_CV = 5
+
+# 단계별 입력 해시 + 산출물 해시 기록 (산출물과 같은 디렉토리)
+TRAIN_MANIFEST = "train_manifest.json"
+CONCEPTS_FILE = "concepts.json" # 학습한 컨셉 정의 사본 (loader.CONCEPTS_FILE과 동일)
+TRAIN_DONE = "train_done.json" # 학습 완료 표시 : 모든 산출물을 쓴 뒤 마지막에 원자적으로 교체 (loader.TRAIN_DONE과 동일, 변경 감지 기준)
+MANIFEST_VERSION = 1
+
+# 단계별 산출물 (MODEL_DIR 기준 상대 경로)
+_INDEX_FILES = ["name_vectorizer.joblib", "name_matrix.joblib", "name_list.joblib"] + \
+    [f"{bundle.BUNDLE_DIR}/{f}" for f in list(bundle._FILES.values()) + [bundle.MANIFEST]]
+_NUTRITION_FILES = ["nutrition_imputer.joblib", "nutrition_scaler.joblib", "calibration.joblib"]
+
+
+# 입력값들 -> sha256 (순서/키 정렬 고정)
+def _hash(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _read_manifest() -> dict:
+    try:
+        m = json.loads((MODEL_DIR / TRAIN_MANIFEST).read_text(encoding="utf-8"))
+        if m.get("version") == MANIFEST_VERSION:
+            return m
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "stages": {}}
+
+
+def _write_manifest(manifest: dict) -> None:
+    text = json.dumps(manifest, ensure_ascii=False, indent=2)
+    bundle.write_atomic(MODEL_DIR / TRAIN_MANIFEST, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+
+
+# 입력 해시가 같고 산출물이 그대로 있으면 건너뜀 (산출물을 지우거나 손으로 바꿔도 다시 학습)
+def _fresh(manifest: dict, stage: str, key: str) -> bool:
+    entry = manifest["stages"].get(stage)
+    if not entry or entry.get("key") != key:
+        return False
+    for name, digest in entry.get("files", {}).items():
+        path = MODEL_DIR / name
+        if not path.exists() or bundle.file_sha256(path) != digest:
+            return False
+    return True
+
+
+# 단계 완료 기록 : 단계마다 바로 저장 -> 중간에 실패해도 끝난 단계는 다음 실행에서 건너뜀
+def _record(manifest: dict, stage: str, key: str, files) -> None:
+    manifest["stages"][stage] = {
+        "key": key,
+        "files": {name: bundle.file_sha256(MODEL_DIR / name) for name in files},
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    _write_manifest(manifest)
+
+
+# 이름 벡터화 방식 -> (새 벡터화 객체, 인덱스 단계 입력 해시에 넣을 파라미터)
+# tfidf는 기존 매니페스트가 그대로 유효하도록 n-gram 범위만 키로 사용
+def _name_vectorizer(kind: str):
+    if kind == "tfidf":
+        return TfidfVectorizer(analyzer="char", ngram_range=NAME_NGRAM, min_df=1), NAME_NGRAM
+    if kind == "hashed":
+        return name_hash.HashedNgramVectorizer(ngram_range=NAME_HASH_NGRAM, n_features=NAME_HASH_FEATURES), \
+            (kind, NAME_HASH_NGRAM, NAME_HASH_FEATURES, bundle.file_sha256(name_hash.__file__))
+    raise SystemExit(f"알 수 없는 이름 벡터화 방식: {kind} (tfidf | hashed)")
+
+
+# 컨셉 하나 학습 (병렬 작업 단위)
+def _fit_concept(concept: str, X: np.ndarray, y: np.ndarray):
+    # 릿지 회귀 중 교차 검증 -> 여러 개 후보값을 두고, 데이터 나눠서 성능 제일 좋은 값을 자동으로 찾아줌
+    model = RidgeCV(alphas=RIDGE_ALPHAS, cv=RIDGE_CV, scoring="neg_mean_absolute_error")
+    model.fit(X, y) # X와 y 관계 학습 (이 정도 영양성분이면 이 컨셉 점수는 나와야 한다!)
+    pred = model.predict(X) # 학습된 모델로 X 데이터를 다시 넣어 예측 -> 훈련 데이터에 대해 얼마나 잘 맞췄나 확인
+    mae = mean_absolute_error(y, pred) # 실제 점수(y)와 예측 점수(pred)의 차이를 MAE(평균 절대 오차)로 계산
+    return concept, model, mae
+
+
+# 학습에 쓴 컨셉 정의를 모델과 같은 디렉토리에 복사 (loader는 이 사본으로 컨셉 목록/규칙을 읽음) : 내용이 같으면 그대로
+def _save_concepts(text: str) -> bool:
+    path = MODEL_DIR / CONCEPTS_FILE
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    bundle.write_atomic(path, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+    return True
+
+
+# 학습 완료 표시 (마지막 단계) : 서버 변경 감지는 이 파일만 봄 -> 학습 도중(단계 사이)의 섞인 산출물을 읽지 않음
+def _mark_done(manifest: dict) -> None:
+    text = json.dumps({
+        "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": {stage: entry["key"] for stage, entry in sorted(manifest["stages"].items())},
+    }, ensure_ascii=False, indent=2)
+    bundle.write_atomic(MODEL_DIR / TRAIN_DONE, lambda tmp: tmp.write_text(text, encoding="utf-8"))
+
+
+# force=True면 매니페스트를 무시하고 전부 다시 학습 / vectorizer가 None이면 설정값(NAME_VECTORIZER)
+def main(force: bool = False, vectorizer: str = None):
+    name_vec, vec_params = _name_vectorizer(vectorizer or settings()["name_vectorizer"])
+    concepts_text = Path(settings()["concepts_path"]).read_text(encoding="utf-8")
+    spec = compile_concepts(json.loads(concepts_text)) # 컨셉 목록/규칙 (잘못된 정의면 학습 전에 실패)
+    concepts = spec.concepts
+    manifest = {"version": MANIFEST_VERSION, "stages": {}} if force else _read_manifest()
+
+    # 단계별 입력 해시 : 원본 엑셀 내용 + 파싱 버전 + 하이퍼파라미터 (+ 규칙 점수 코드)
+    data_key = _hash(bundle.source_fingerprint(FOOD_FILES), food_kfda_loader.CACHE_VERSION)
+    index_key = _hash(data_key, vec_params, bundle.BUNDLE_VERSION, bundle.SVD_DIM, bundle.SVD_SEED,
+                      bundle.HNSW_EF_CONSTRUCTION, bundle.HNSW_M, bundle.HNSW_EF, sklearn.__version__)
+    nutrition_key = _hash(data_key, IMPUTE_STRATEGY, bundle.file_sha256(scoring.__file__), sklearn.__version__)
+    concept_keys = {c: _hash(nutrition_key, spec.digests[c], RIDGE_ALPHAS, RIDGE_CV) for c in concepts} # 정의가 바뀐 컨셉만 다시 학습
+
+    todo_index = not _fresh(manifest, "index", index_key)
+    todo_nutrition = not _fresh(manifest, "nutrition", nutrition_key)
+    todo_concepts = [c for c in concepts if not _fresh(manifest, f"concept:{c}", concept_keys[c])]
+    if not (todo_index or todo_nutrition or todo_concepts):
+        if _save_concepts(concepts_text) or not (MODEL_DIR / TRAIN_DONE).exists():
+            _mark_done(manifest)
+        print("변경 없음 : 모든 단계 최신 상태", MODEL_DIR.resolve())
+        return
+
+    # 데이터 로드 (컬럼 단위, 행 dict 없이)
+    raw_names, nums = load_kfda_columns(FOOD_FILES, sheet_name=None, cache_dir=MODEL_DIR / "kfda_cache")
+    if not len(raw_names):
         raise SystemExit("데이터 엑셀을 찾지 못했거나 로드 실패")
+    names = [str(n) for n in raw_names.tolist()] # 이름 리스트
+    X_num = feats_from_columns(nums) # 모든 음식을 수치 벡터로 변환 (N, 9)
+
+    if todo_index:
+        # 음식명을 글자(또는 자모) n-gram으로 벡터화 -> 이름이 비슷하면 높은 유사도 부여
+        X_name = name_vec.fit_transform(names) # 음식 이름 특징 벡터
+
+        # 아티팩트 저장 (임시 파일에 쓰고 교체 : 서버가 memmap으로 읽는 중인 파일을 덮어쓰지 않도록)
+        bundle.dump_atomic(name_vec, MODEL_DIR / "name_vectorizer.joblib")
+        bundle.dump_atomic(X_name,  MODEL_DIR / "name_matrix.joblib")
+        bundle.dump_atomic(names,   MODEL_DIR / "name_list.joblib")
+
+        # 서버 기동용 번들 : SVD, dense 이름 행렬, HNSW 인덱스, 영양 성분 컬럼
+        svd, name_dense = bundle.fit_name_embedding(X_name)
+        bundle.save_bundle(
+            MODEL_DIR,
+            svd=svd,
+            name_dense=name_dense,
+            hnsw_index=bundle.build_hnsw(name_dense),
+            db_feats=X_num,
+            source_files=FOOD_FILES,
+        )
+        _record(manifest, "index", index_key, _INDEX_FILES)
+        print(f"[index] 이름 벡터({type(name_vec).__name__})/번들 저장")
+    else:
+        print("[index] 변경 없음, 건너뜀")
+
+    if todo_nutrition or todo_concepts:
+        # 전처리/분위수는 빠르니 컨셉 모델만 다시 학습해도 다시 계산 (같은 입력이면 같은 결과)
+        imputer = SimpleImputer(strategy=IMPUTE_STRATEGY)
+        X_imp = imputer.fit_transform(X_num) # 결측치를 중앙값으로 채움
+        scaler = StandardScaler()
+        X = scaler.fit_transform(X_imp) # 음식 수치 벡터 정규화 (각 열의 평균 = 0, 표준편차 = 1이 되도록 변환)
+        calib = fit_calibration_feats(X_num) # 데이터로 분위수 기준값 계산 -> 규칙 점수표 생성
+
+        if todo_nutrition:
+            bundle.dump_atomic(imputer, MODEL_DIR / "nutrition_imputer.joblib")
+            bundle.dump_atomic(scaler,  MODEL_DIR / "nutrition_scaler.joblib")
+            bundle.dump_atomic(calib,   MODEL_DIR / "calibration.joblib")
+            _record(manifest, "nutrition", nutrition_key, _NUTRITION_FILES)
+            print("[nutrition] 전처리/분위수 저장")
+
+    if todo_concepts:
+        # 특정 음식이 해당 컨셉에 얼마나 적합한지 규칙 기반 점수로 계산 (모든 컨셉 한 번에) -> 컨셉별 모델은 프로세스 여러 개로 병렬 학습
+        rules = score_all(X_num, calib, spec, soup=soup_mask(names))
+        labels = {c: np.ascontiguousarray(rules[:, spec.col(c)]) for c in todo_concepts}
+        jobs = settings()["train_jobs"]
+        jobs = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(todo_concepts))
+        results = Parallel(n_jobs=jobs)(delayed(_fit_concept)(c, X, labels[c]) for c in todo_concepts)
+
+        for concept, model, mae in results:
+            print(f"[{concept}] 교차검증을 통한 최적 알파 값 ={model.alpha_:.2f}  평균 절대 오차={mae:.2f}")
+            bundle.dump_atomic(model, MODEL_DIR / f"concept_model_{concept}.joblib")
+            _record(manifest, f"concept:{concept}", concept_keys[concept], [f"concept_model_{concept}.joblib"])
+
+    for concept in concepts:
+        if concept not in todo_concepts:
+            print(f"[{concept}] 변경 없음, 건너뜀")
 
-    # 이름 리스트
-    names = [str(r.get("name","")) for r in rows]
-
-    # 음식명을 글자 단위로 벡터화 -> 이름이 비슷하면 높은 유사도 부여
-    name_vec = TfidfVectorizer(analyzer="char", ngram_range=(2, 5), min_df=1)
-    X_name = name_vec.fit_transform(names) # 음식 이름 특징 벡터
-
-    # 모든 음식을 수치 벡터로 변환
-    X_num = np.vstack([_to_feat(r) for r in rows])
-
-    imputer = SimpleImputer(strategy="median")
-    X_imp = imputer.fit_transform(X_num) # 결측치를 중앙값으로 채움
-    scaler = StandardScaler()
-    X = scaler.fit_transform(X_imp) # 음식 수치 벡터 정규화 (각 열의 평균 = 0, 표준편차 = 1이 되도록 변환)
-
-    calib = fit_calibration(rows) # 데이터로 분위수 기준값 계산 -> 규칙 점수표 생성
-    joblib.dump(calib, MODEL_DIR / "calibration.joblib")
-
-    for concept in CONCEPTS:
-        # 특정 음식이 해당 컨셉에 얼마나 적합한지 규칙 기반 점수로 계산
-        y = np.array([compute_score(concept, r, calib) for r in rows], dtype=float)
-
-        # 릿지 회귀 중 교차 검증 -> 여러 개 후보값을 두고, 데이터 나눠서 성능 제일 좋은 값을 자동으로 찾아줌
-        model = RidgeCV(alphas=(0.1, 1.0, 3.0, 10.0, 30.0), # 규제 강도 : 과적합 방지
-                        cv=5, scoring="neg_mean_absolute_error")
-        model.fit(X, y) # X와 y 관계 학습 (이 정도 영양성분이면 이 컨셉 점수는 나와야 한다!)
-        pred = model.predict(X) # 학습된 모델로 X 데이터를 다시 넣어 예측 -> 훈련 데이터에 대해 얼마나 잘 맞췄나 확인
-        mae = mean_absolute_error(y, pred) # 실제 점수(y)와 예측 점수(pred)의 차이를 MAE(평균 절대 오차)로 계산
-        
-        print(f"[{concept}] 교차검증을 통한 최적 알파 값 ={model.alpha_:.2f}  평균 절대 오차={mae:.2f}") 
-        joblib.dump(model, MODEL_DIR / f"concept_model_{concept}.joblib")
-
-    # 아티팩트 저장
-    joblib.dump(name_vec, MODEL_DIR / "name_vectorizer.joblib")
-    joblib.dump(X_name,  MODEL_DIR / "name_matrix.joblib")
-    joblib.dump(names,   MODEL_DIR / "name_list.joblib")
-    joblib.dump(imputer, MODEL_DIR / "nutrition_imputer.joblib")
-    joblib.dump(scaler,  MODEL_DIR / "nutrition_scaler.joblib")
+    _save_concepts(concepts_text) # 모든 컨셉 모델이 준비된 뒤에 교체 (loader가 모델 없는 컨셉을 읽지 않도록)
+    _mark_done(manifest)
 
     print("모델 저장 완료 : ", MODEL_DIR.resolve())
 
 if __name__ == "__main__":
-    main()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--force", action="store_true", help="매니페스트를 무시하고 모든 단계를 다시 학습")
+    ap.add_argument("--vectorizer", choices=["tfidf", "hashed"], help="이름 벡터화 방식 (기본 : NAME_VECTORIZER 설정)")
+    args = ap.parse_args()
+    main(force=args.force, vectorizer=args.vectorizer)
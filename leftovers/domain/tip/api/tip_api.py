@@ -1,51 +1,136 @@
 from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi.responses import StreamingResponse
+from openai import APITimeoutError
+from typing import List, Literal
 
-from leftovers.core.response.api_response import Envelope, ok
+from leftovers.core.metrics import metrics
+from leftovers.core.response.api_response import dumps, envelope, ok, ok_response
 from leftovers.domain.tip.schemas.tip_request import TipRequest
 from leftovers.domain.tip.schemas.tip_response import TipItem
-from leftovers.domain.tip.service.prompt import chatForTip
+from leftovers.domain.tip.service.prompt import chatForTip, streamTips, build_tip_messages
+from leftovers.domain.tip.service.tip_cache import build_tip_cache, tip_key
 
+import asyncio
 import json
 from json import JSONDecodeError
 
 router = APIRouter(prefix="/tip")
 
-@router.post("", response_model=Envelope[List[TipItem]])
-def getTip(req: TipRequest):
+# 반찬별 팁 캐시 (메모리 LRU + 선택적 SQLite)
+_TIP_CACHE = build_tip_cache()
+metrics.register_cache("tip", _TIP_CACHE.stats)
+
+# LLM 응답 항목 하나 -> (요청한 반찬 키, 이름 일치 여부) / 대응하는 반찬이 없거나 이미 받았으면 (None, False)
+# menu 이름이 요청 반찬과 맞지 않으면 순서로 대응해서 응답에는 넣되, 다른 반찬의 팁일 수 있으므로 캐시에는 저장하지 않음
+def _item_key(item: dict, pos: int, menus: list[str], wanted: dict, found: dict):
+    key = tip_key(item.get("menu", ""))
+    if key in wanted:
+        return (key, True) if key not in found else (None, False)
+    if pos < len(menus):
+        key = tip_key(menus[pos])
+        if key in wanted and key not in found:
+            return key, False
+    return None, False
+
+# 요청 반찬 -> (요청 순서 키 목록, 캐시 적중 {키: 팁}, 캐시 미스 {키: 요청에 적힌 반찬 이름} (중복 제거))
+async def _split_cached(menus: list[str]):
+    keys = [tip_key(m) for m in menus]
+    unique = {}
+    for menu, key in zip(menus, keys):
+        unique.setdefault(key, menu)
+    tips = await _TIP_CACHE.get_many(list(unique))
+    missing = {key: menu for key, menu in unique.items() if key not in tips}
+    return keys, tips, missing
+
+# 캐시에 없는 반찬만 LLM에 요청 -> 반찬별로 캐시에 저장
+async def _fetch_tips(menus: list[str]) -> dict:
+    text = await chatForTip(build_tip_messages(menus), temperature=0.6, max_tokens=400)
+    try:
+        obj = json.loads(text)
+        items =  obj["items"]
+    except JSONDecodeError:
+        raise HTTPException(status_code=502, detail="AI 응답이 JSON 형식이 아님")
+
+    wanted = {tip_key(m): m for m in menus}
+    found, cacheable = {}, {}
+    for pos, item in enumerate(items):
+        key, named = _item_key(item, pos, menus, wanted, found)
+        if key is not None:
+            tip = {"title": item["title"], "content": item["content"]}
+            found[key] = tip
+            if named:
+                cacheable[key] = tip
+                _TIP_CACHE.put(key, tip)
+    await _TIP_CACHE.persist(cacheable)
+    return found
+
+@router.post("", response_model=envelope(List[TipItem]))
+async def getTip(req: TipRequest):
     try:
-        system = """너는 남은 반찬을 새롭게 조리해서 먹는 법을 알려주는 식사 코치야.
-                    출력은 반드시 하나의 JSON 객체여야 해. title에는 그에 맞는 제목을, content에는 방법을 적어주면 돼.
-                    제목의 형식은 고정되어 있지 않아도 되고, 창의성이 돋보이는 재밌는 묘사를 이용한 제목을 지어줘. 
-                    반찬마다 다른 형식의 제목을 부탁해. 예시는 아래와 같아:
-                    {"items":[{"title":"남은 감자볶음, 고소한 감자전으로",
-                    "content":"감자볶음을 으깨서 계란과 함께 섞어 팬에 부치면 감자전이 됩니다."}, ...]}
-
-                    규칙:
-                    - 배열의 각 요소는 {"title":"...", "content":"..."} 형식
-                    - title은 20자 이내, content는 한국어 1~2문장, 줄바꿈 없이 작성
-                    - 코드블록/마크다운/설명 문장/문자열로 감싸기(이스케이프 따옴표) 모두 금지
-                """
-
-        user = (
-            f"남은 반찬 목록: {', '.join(req.menus)}\n"
-            "- 위 목록의 각 반찬마다 아이디어 1개씩 제시해줘.\n"
-            '- 반드시 {"items":[...]} 형태로만 반환해.'
-        )
-
-        messages = [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ]
-
-        text = chatForTip(messages, temperature=0.6, max_tokens=400)
-        try:
-            obj = json.loads(text)
-            items =  obj["items"]
-        except JSONDecodeError:
-            raise HTTPException(status_code=502, detail="AI 응답이 JSON 형식이 아님")
-
-        return ok(items, http_status=200)
-     
+        keys, tips, missing = await _split_cached(req.menus)
+
+        if missing:
+            tips.update(await _fetch_tips(list(missing.values())))
+
+        items = [tips[k] for k in keys if k in tips] # 요청 순서대로 캐시/새 응답 합치기
+        return ok_response(items, http_status=200) # 캐시/LLM 응답에서 만든 dict라 재검증 없이 바로 직렬화
+
+    except (asyncio.TimeoutError, APITimeoutError):
+        raise HTTPException(status_code=504, detail="AI 응답 시간이 초과되었습니다.")
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=502, detail=str(e))
+
+# 스트리밍 이벤트 한 줄 : ndjson은 {"type": ..., ...} 한 줄, sse는 event/data 블록
+def _event(kind: str, data: dict, fmt: str) -> bytes:
+    if fmt == "sse":
+        return b"event: " + kind.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+    return dumps({"type": kind, **data}) + b"\n"
+
+# 스트리밍 버전 : 캐시에 있는 팁을 먼저 보내고, LLM 팁은 항목 하나가 완성될 때마다 바로 전송 (전체 생성을 기다리지 않음)
+# 이벤트 : tip {"menu", "title", "content", "cached"} -> 마지막에 done {"count", "missing"} / 실패 시 error {"httpStatus", "message"}
+# 응답 상태 코드는 첫 바이트를 보낼 때 정해지므로 LLM 실패/시간 초과는 error 이벤트로 알림
+@router.post("/stream")
+async def streamTip(req: TipRequest, format: Literal["ndjson", "sse"] = "ndjson"):
+    keys, cached, missing = await _split_cached(req.menus)
+
+    async def events():
+        found, cacheable = {}, {}
+        for key, tip in cached.items():
+            yield _event("tip", {"menu": req.menus[keys.index(key)], **tip, "cached": True}, format)
+
+        if missing:
+            menus = list(missing.values())
+            error = None
+            try:
+                pos = 0
+                async for item in streamTips(build_tip_messages(menus), temperature=0.6, max_tokens=400):
+                    key, named = _item_key(item, pos, menus, missing, found)
+                    pos += 1
+                    if key is None or "title" not in item or "content" not in item:
+                        continue
+                    tip = {"title": item["title"], "content": item["content"]}
+                    found[key] = tip
+                    if named:
+                        cacheable[key] = tip
+                        _TIP_CACHE.put(key, tip)
+                    yield _event("tip", {"menu": missing[key], **tip, "cached": False}, format)
+            except (asyncio.TimeoutError, APITimeoutError):
+                error = {"httpStatus": 504, "message": "AI 응답 시간이 초과되었습니다."}
+            except Exception as e:
+                error = {"httpStatus": 502, "message": str(e)}
+            await _TIP_CACHE.persist(cacheable) # 디스크 저장은 받은 항목까지 스트림 끝에 한 번 (항목마다 커밋하지 않음)
+            if error is not None:
+                yield _event("error", error, format)
+                return
+
+        yield _event("done", {"count": len(cached) + len(found), "missing": [m for k, m in missing.items() if k not in found]}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# 팁 캐시 적중률
+@router.get("/stats")
+def stats():
+    return ok({"tip_cache": _TIP_CACHE.stats()})
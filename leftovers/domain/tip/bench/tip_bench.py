@@ -0,0 +1,111 @@
+# /tip 처리량 측정 (가짜 OpenAI 트랜스포트 사용, 네트워크/API 키 불필요)
+# --stream : /tip/stream (NDJSON)으로 첫 팁 도착 시간(time-to-first-tip)과 전체 완료 시간 비교
+# 실행 : python -m leftovers.domain.tip.bench.tip_bench [--requests 200] [--concurrency 50] [--latency 0.5] [--stream] [--menus 5]
+# 같은 서버의 /healthz 지연시간도 함께 측정 -> LLM 대기가 스레드풀을 막지 않는지 확인
+import argparse
+import asyncio
+import json
+import os
+import time
+import httpx
+
+
+def _pct(ts, p):
+    ts = sorted(ts)
+    return ts[min(len(ts) - 1, int(len(ts) * p / 100))] * 1000 if ts else 0.0
+
+
+# ASGI 앱을 직접 호출해서 응답 본문 조각이 도착하는 시점을 기록 (httpx ASGITransport는 본문을 다 모은 뒤에 돌려줘서 첫 조각 시간을 알 수 없음)
+# 반환 : (상태 코드, 첫 tip 이벤트 도착 시각 perf_counter / 없으면 None)
+async def _stream_post(app, path: str, payload: dict):
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("bench", 0), "server": ("bench", 80),
+    }
+    sent = False
+    state = {"status": 0, "first": None}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait() # 연결 끊김 없음
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+        elif message["type"] == "http.response.body" and state["first"] is None and b'"type":"tip"' in message.get("body", b""):
+            state["first"] = time.perf_counter()
+
+    await app(scope, receive, send)
+    return state["status"], state["first"]
+
+
+async def _run(args):
+    from main import app # 환경변수 설정 후에 임포트
+
+    transport = httpx.ASGITransport(app=app) # lifespan(모델 로딩) 없이 라우터만 사용
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sem = asyncio.Semaphore(args.concurrency)
+        tip_ts, first_ts, codes = [], [], {}
+
+        def menus_for(i): # --menus N이면 요청마다 서로 다른 반찬 N개 (캐시 적중 없이 매번 LLM 호출)
+            return [f"반찬{i}-{j}" for j in range(args.menus)] if args.menus else [f"반찬{i % 7}", "멸치볶음"]
+
+        async def one(i):
+            async with sem:
+                t = time.perf_counter()
+                if not args.stream:
+                    r = await client.post("/tip", json={"menus": menus_for(i)})
+                    tip_ts.append(time.perf_counter() - t)
+                    codes[r.status_code] = codes.get(r.status_code, 0) + 1
+                    return
+                status, first = await _stream_post(app, "/tip/stream", {"menus": menus_for(i)})
+                tip_ts.append(time.perf_counter() - t)
+                first_ts.append(tip_ts[-1] if first is None else first - t)
+                codes[status] = codes.get(status, 0) + 1
+
+        health_ts = []
+        done = asyncio.Event()
+
+        async def probe(): # 동기 엔드포인트 지연 (스레드풀 고갈 여부)
+            while not done.is_set():
+                t = time.perf_counter()
+                await client.get("/healthz")
+                health_ts.append(time.perf_counter() - t)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - t0
+        done.set()
+        await prober
+
+    print(f"tip requests={args.requests} concurrency={args.concurrency} latency={args.latency}s codes={codes}")
+    print(f"throughput={args.requests / elapsed:.1f} req/s  p50={_pct(tip_ts, 50):.0f}ms p99={_pct(tip_ts, 99):.0f}ms")
+    if args.stream:
+        print(f"time-to-first-tip p50={_pct(first_ts, 50):.0f}ms p99={_pct(first_ts, 99):.0f}ms")
+    print(f"healthz during load p50={_pct(health_ts, 50):.1f}ms p99={_pct(health_ts, 99):.1f}ms (n={len(health_ts)})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--stream", action="store_true", help="/tip/stream으로 측정 (첫 팁 도착 시간 포함)")
+    ap.add_argument("--menus", type=int, default=0, help="요청당 서로 다른 반찬 수 (0이면 반찬 7종 반복 -> 캐시 적중)")
+    args = ap.parse_args()
+
+    os.environ["OPENAI_FAKE"] = "1"
+    os.environ["OPENAI_FAKE_LATENCY_S"] = str(args.latency)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
-from leftovers.core.external.open_ai_client import client
+import asyncio
+import time
+from leftovers.core.external.open_ai_client import async_client, llm_semaphore
 from leftovers.core.config.config import settings
+from leftovers.core.metrics import metrics
+from leftovers.domain.tip.service.tip_stream import ItemStreamParser
 
 # OpenAI Responses API의 structured outputs 기능에서 쓰는 JSON Schema
 # TIp SCHEMA의 형태로 응답을 제공함
@@ -13,29 +17,109 @@ TIP_SCHEMA = {
                 "type": "object",
                 "additionalProperties": False,
                 "properties": {
+                    "menu":    {"type": "string"}, # 어떤 반찬의 팁인지 (반찬별 캐시에 저장할 때 사용)
                     "title":   {"type": "string", "maxLength": 20},
                     "content": {"type": "string"}
                 },
-                "required": ["title", "content"]
+                "required": ["menu", "title", "content"]
             }
         }
     },
     "required": ["items"] # items 키는 필수
 }
 
-def chatForTip(messages, model=None, **kwargs) -> str:
-    res = client.chat.completions.create(
-        model=model or settings()["openai_model"],
-        messages=messages,
-        response_format={
-            "type": "json_schema",
-            "json_schema": {
-                "name": "tip_list",
-                "strict": True,
-                "schema": TIP_SCHEMA
-            }
-        },
-        **kwargs
+TIP_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "tip_list",
+        "strict": True,
+        "schema": TIP_SCHEMA
+    }
+}
+
+SYSTEM_PROMPT = """너는 남은 반찬을 새롭게 조리해서 먹는 법을 알려주는 식사 코치야.
+                    출력은 반드시 하나의 JSON 객체여야 해. title에는 그에 맞는 제목을, content에는 방법을 적어주면 돼.
+                    제목의 형식은 고정되어 있지 않아도 되고, 창의성이 돋보이는 재밌는 묘사를 이용한 제목을 지어줘. 
+                    반찬마다 다른 형식의 제목을 부탁해. 예시는 아래와 같아:
+                    {"items":[{"menu":"감자볶음","title":"남은 감자볶음, 고소한 감자전으로",
+                    "content":"감자볶음을 으깨서 계란과 함께 섞어 팬에 부치면 감자전이 됩니다."}, ...]}
+
+                    규칙:
+                    - 배열의 각 요소는 {"menu":"...", "title":"...", "content":"..."} 형식
+                    - menu에는 목록에 적힌 반찬 이름을 그대로 적기
+                    - title은 20자 이내, content는 한국어 1~2문장, 줄바꿈 없이 작성
+                    - 코드블록/마크다운/설명 문장/문자열로 감싸기(이스케이프 따옴표) 모두 금지
+                """
+
+# 반찬 목록 -> 팁 요청 메시지
+def build_tip_messages(menus: list[str]) -> list[dict]:
+    user = (
+        f"남은 반찬 목록: {', '.join(menus)}\n"
+        "- 위 목록의 각 반찬마다 아이디어 1개씩 제시해줘.\n"
+        '- 반드시 {"items":[...]} 형태로만 반환해.'
     )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user},
+    ]
+
+# 동시 호출 수는 세마포어로 제한, 대기 시간 + 호출 시간 합쳐서 timeout_s 안에 끝나지 않으면 asyncio.TimeoutError
+async def chatForTip(messages, model=None, timeout_s=None, **kwargs) -> str:
+    timeout_s = timeout_s or settings()["tip_timeout_s"]
+
+    async def _call():
+        async with llm_semaphore():
+            return await async_client().chat.completions.create(
+                model=model or settings()["openai_model"],
+                messages=messages,
+                response_format=TIP_RESPONSE_FORMAT,
+                timeout=timeout_s,
+                **kwargs
+            )
+
+    with metrics.stage("llm"):
+        res = await asyncio.wait_for(_call(), timeout=timeout_s)
     return res.choices[0].message.content
 
+# 스트리밍 호출 : 응답 JSON이 다 오기 전에 완성된 팁 항목({"menu","title","content"})을 도착하는 대로 하나씩 반환
+# 세마포어 대기 + 전체 생성 시간이 timeout_s를 넘으면 asyncio.TimeoutError
+async def streamTips(messages, model=None, timeout_s=None, **kwargs):
+    timeout_s = timeout_s or settings()["tip_timeout_s"]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout_s
+    started = time.perf_counter()
+
+    def left():
+        return max(0.0, deadline - loop.time())
+
+    sem = llm_semaphore()
+    await asyncio.wait_for(sem.acquire(), timeout=left())
+    stream = None
+    try:
+        stream = await asyncio.wait_for(async_client().chat.completions.create(
+            model=model or settings()["openai_model"],
+            messages=messages,
+            response_format=TIP_RESPONSE_FORMAT,
+            stream=True,
+            timeout=timeout_s,
+            **kwargs
+        ), timeout=left())
+
+        parser = ItemStreamParser()
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=left())
+            except StopAsyncIteration:
+                break
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for item in parser.feed(chunk.choices[0].delta.content):
+                if parser.count == 1: # 첫 팁까지 걸린 시간 (스트리밍의 체감 지연시간)
+                    metrics.observe_stage("llm_first_item", time.perf_counter() - started)
+                yield item
+    finally:
+        if stream is not None:
+            await stream.close()
+        sem.release()
+        metrics.observe_stage("llm", time.perf_counter() - started)
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from leftovers.core.cache.lru_cache import LRUCache
+from leftovers.core.config.config import settings
+from leftovers.domain.recommend.service.name_norm import normalize_name
+
+# 반찬별 팁 캐시 키 : 추천 매칭과 같은 이름 정규화 사용 ("감자 볶음", "감자볶음(국산)" -> 같은 키)
+def tip_key(menu: str) -> str:
+    return normalize_name(menu) or str(menu).strip()
+
+
+# 프로세스 메모리 LRU 저장소
+class MemoryTipStore:
+    def __init__(self, maxsize: int, ttl_s: Optional[float] = None):
+        self._cache = LRUCache(maxsize, ttl_s)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._cache.get(key)
+
+    def put(self, key: str, item: dict) -> None:
+        self._cache.put(key, item)
+
+
+# SQLite 디스크 저장소 : 프로세스 재시작/워커 간에도 유지
+class SqliteTipStore:
+    def __init__(self, path: str, ttl_s: Optional[float] = None):
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tips (key TEXT PRIMARY KEY, item TEXT NOT NULL, expires REAL NOT NULL)")
+        self._conn.commit()
+
+    # 키 목록 -> {키: 팁} (블로킹 I/O라 TipCache가 asyncio.to_thread로 호출)
+    def get_many(self, keys: list) -> dict:
+        now = time.time()
+        found, expired = {}, []
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute("SELECT item, expires FROM tips WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    continue
+                if row[1] and row[1] < now: # 만료된 항목은 지우고 미스 처리
+                    expired.append((key,))
+                else:
+                    found[key] = row[0]
+            if expired:
+                self._conn.executemany("DELETE FROM tips WHERE key = ?", expired)
+                self._conn.commit()
+        return {k: json.loads(v) for k, v in found.items()}
+
+    # 여러 항목을 커밋 한 번으로 저장
+    def put_many(self, items: dict) -> None:
+        expires = time.time() + self.ttl_s if self.ttl_s else 0.0
+        rows = [(key, json.dumps(item, ensure_ascii=False), expires) for key, item in items.items()]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO tips (key, item, expires) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+
+# 메모리 -> 디스크 순서로 조회하는 계층형 캐시 (디스크 적중 시 메모리로 올림) + 반찬 단위 적중률 집계
+# 메모리 계층은 이벤트 루프에서 바로, 디스크 계층(SQLite 조회/커밋)은 asyncio.to_thread로 루프 밖에서 요청당 한 번씩 처리
+class TipCache:
+    def __init__(self, memory: MemoryTipStore, disk: Optional[SqliteTipStore] = None):
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # 키 목록 -> {키: 팁} (없는 키는 빠짐) : 메모리에서 못 찾은 키만 모아 디스크 조회 한 번
+    async def get_many(self, keys: list) -> dict:
+        found, missing = {}, []
+        for key in keys:
+            item = self.memory.get(key)
+            if item is None:
+                missing.append(key)
+            else:
+                found[key] = item
+        if missing and self.disk is not None:
+            stored = await asyncio.to_thread(self.disk.get_many, missing)
+            for key, item in stored.items():
+                self.memory.put(key, item)
+            found.update(stored)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    # 메모리에 바로 저장 (같은 반찬의 다음 요청부터 적중)
+    def put(self, key: str, item: dict) -> None:
+        self.memory.put(key, item)
+
+    # 디스크 계층에 모아서 저장 (커밋 한 번, 루프 밖에서)
+    async def persist(self, items: dict) -> None:
+        if items and self.disk is not None:
+            await asyncio.to_thread(self.disk.put_many, items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "tiers": [type(t).__name__ for t in (self.memory, self.disk) if t is not None],
+            }
+
+
+# 설정값으로 캐시 구성 : TIP_CACHE_SIZE(메모리), TIP_CACHE_PATH(비어 있으면 디스크 계층 없음), TIP_CACHE_TTL_S
+def build_tip_cache() -> TipCache:
+    cfg = settings()
+    memory = MemoryTipStore(cfg["tip_cache_size"], cfg["tip_cache_ttl_s"])
+    disk = SqliteTipStore(cfg["tip_cache_path"], cfg["tip_cache_ttl_s"]) if cfg["tip_cache_path"] else None
+    return TipCache(memory, disk)
@@ -0,0 +1,49 @@
+import json
+
+# {"items":[{...}, {...}, ...]} 형태 JSON을 조각 단위로 받으면서 완성된 항목 객체를 바로 꺼내는 파서
+# 루트 객체(깊이 1) -> items 배열(깊이 2) -> 항목 객체(깊이 3) : 항목의 닫는 괄호가 오면 그 항목만 json.loads
+# 문자열 안의 괄호/따옴표(이스케이프 포함)는 무시, 한 번 본 글자는 다시 훑지 않음
+_ITEM_DEPTH = 3
+
+
+class ItemStreamParser:
+    def __init__(self):
+        self.depth = 0
+        self.in_str = False
+        self.esc = False
+        self.item = None # 읽는 중인 항목 글자들 (항목 밖이면 None)
+        self.count = 0 # 지금까지 꺼낸 항목 수
+
+    # 텍스트 조각 -> 이번 조각에서 완성된 항목 dict 목록 (JSON으로 읽을 수 없는 항목은 건너뜀)
+    def feed(self, text: str) -> list:
+        out = []
+        for ch in text:
+            if self.item is not None:
+                self.item.append(ch)
+            if self.in_str:
+                if self.esc:
+                    self.esc = False
+                elif ch == "\\":
+                    self.esc = True
+                elif ch == '"':
+                    self.in_str = False
+                continue
+
+            if ch == '"':
+                self.in_str = True
+            elif ch == "{" or ch == "[":
+                self.depth += 1
+                if ch == "{" and self.depth == _ITEM_DEPTH and self.item is None:
+                    self.item = ["{"]
+            elif ch == "}" or ch == "]":
+                self.depth -= 1
+                if ch == "}" and self.depth == _ITEM_DEPTH - 1 and self.item is not None:
+                    try:
+                        obj = json.loads("".join(self.item))
+                    except ValueError:
+                        obj = None
+                    self.item = None
+                    if isinstance(obj, dict):
+                        self.count += 1
+                        out.append(obj)
+        return out
@@ -1,10 +1,16 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import ValidationError
 from contextlib import asynccontextmanager
 
-from leftovers.domain.recommend.service import loader
+from leftovers.core.config.config import settings
+from leftovers.core.external import open_ai_client
+from leftovers.core.metrics import metrics
+from leftovers.core.metrics.middleware import MetricsMiddleware
+from leftovers.domain.recommend.service import loader, batcher
 from leftovers.domain.tip.api import tip_api
 from leftovers.domain.recommend.api import recommend_api
+from leftovers.domain.admin.api import admin_api
 from leftovers.core.exception.global_error_handler import (
     validation_error_handler,
     http_exception_handler,
@@ -15,26 +21,38 @@ import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("loop 진입")
     loop = asyncio.get_event_loop()
     await loop.run_in_executor(None, loader.load_all)  
     print("모델/DB 로딩 완료")
+    loader.start_watcher(settings()["model_watch_interval_s"]) # model_store 변경 시 무중단 재로딩
 
     yield # 여기까지 오면 서버 실행
 
+    await open_ai_client.aclose() # LLM 커넥션 풀 정리
+    await batcher.aclose() # 추천 배치 디스패처 정리
+
 app = FastAPI(
     title="LeftOversFlirting AI",
     lifespan=lifespan
 )
 
+# 요청 지연시간 히스토그램 + 샘플링 프로파일러 (X-Profile 헤더 / PROFILE_SAMPLE_RATE)
+app.add_middleware(MetricsMiddleware)
+
 # 라우터 등록
 app.include_router(tip_api.router)
 app.include_router(recommend_api.router)
+app.include_router(admin_api.router)
 
 @app.get("/healthz")
 def healthz():
     return {"ok": True}
 
+# Prometheus 텍스트 포맷 지표 (단계별 히스토그램, 캐시/인덱스 카운터)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 
 # 전역 핸들러 등록
 app.add_exception_handler(ValidationError, validation_error_handler)
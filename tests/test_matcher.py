@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from leftovers.domain.recommend.service import bundle, matcher
+from leftovers.domain.recommend.service.name_norm import build_norm_index
+
+NAMES = ["김치찌개", "된장찌개", "감자볶음", "멸치볶음", "시금치나물"]
+
+
+# 이름 몇 개로 만든 최소 스냅샷 : TF-IDF 행을 그대로 dense 벡터로 (투영 = 단위 행렬), 정확 검색 인덱스
+@pytest.fixture
+def snap():
+    vec = TfidfVectorizer(analyzer="char", ngram_range=(2, 3)).fit(NAMES)
+    proj = np.eye(len(vec.vocabulary_), dtype=np.float32)
+    dense = vec.transform(NAMES).toarray().astype(np.float32)
+    return SimpleNamespace(
+        generation=1, name_list=NAMES, name_vec=vec, name_proj=proj, name_mat=vec.transform(NAMES),
+        name_lookup={n: i for i, n in enumerate(NAMES)}, norm_lookup=build_norm_index(NAMES),
+        hnsw_index=bundle.ExactIndex(dense),
+    )
+
+
+def test_exact_and_ann_matches(snap):
+    labels, names, sims = matcher.match_many(["감자볶음", "감자 볶음", "김치찌게"], snap=snap)
+    assert labels[:, 0].tolist() == [2, 2, 0]
+    assert names[2][0] == "김치찌개" and 0 < sims[2, 0] < 1
+
+
+# 어휘와 겹치는 n-gram이 없는 쿼리는 0 벡터 -> 임의의 행이 아니라 매칭 실패
+@pytest.mark.parametrize("query", ["zzzz", "", "ㅋㅋ"])
+def test_no_shared_ngrams_is_a_miss(snap, query):
+    labels, names, sims = matcher.match_many([query], k=3, snap=snap)
+    assert (labels == -1).all() and names[0][0] == "" and (sims == 0).all()
+
+    best, best_names, best_sims, margins, rerank = matcher.match_best([query], k=3, reranker="tfidf", snap=snap)
+    assert best[0] == -1 and best_names[0] == ""
+
+
+# 같은 이름 중복 행은 마진 비교에서 제외 / similarity는 재정렬 방식과 관계없이 ANN 코사인, 재정렬 점수는 따로
+def test_margin_skips_duplicate_names_and_keeps_cosine(snap):
+    names = NAMES + ["김치찌개"] # 4번째 행과 같은 이름 (KFDA 중복 행)
+    vec = snap.name_vec
+    dense = vec.transform(names).toarray().astype(np.float32)
+    snap.name_list = names
+    snap.name_mat = vec.transform(names)
+    snap.hnsw_index = bundle.ExactIndex(dense)
+    snap.generation = 2
+
+    _, _, cos = matcher.match_many(["김치찌게"], k=3, snap=snap)
+    best, best_names, sims, margins, rerank = matcher.match_best(["김치찌게"], k=3, reranker="rapidfuzz", snap=snap)
+    assert best_names[0] == "김치찌개"
+    assert sims[0] == pytest.approx(cos[0, 0])
+    assert 0 < rerank[0] < 1 and rerank[0] != pytest.approx(sims[0])
+    assert margins[0] > 0.2 # 중복 "김치찌개"(마진 0)가 아니라 "된장찌개"와의 차이
+
+
+# ANN 결과 캐시는 정규화 쿼리 기준 : 띄어쓰기/대소문자만 다른 쿼리는 캐시 적중
+def test_ann_cache_is_keyed_by_normalized_query(snap):
+    snap.generation = 3
+    before = matcher.stats()["cached"]
+    first = matcher.match_many(["김치 찌게"], snap=snap)
+    again = matcher.match_many(["김치찌게 ", "김치  찌게"], snap=snap)
+    assert matcher.stats()["cached"] - before == 2
+    assert again[0][:, 0].tolist() == [first[0][0, 0]] * 2
@@ -0,0 +1,20 @@
+import numpy as np
+
+from leftovers.domain.recommend.service.name_hash import HashedNgramVectorizer
+
+NAMES = ["김치찌개", "된장찌개", "감자볶음", "멸치볶음", "시금치나물"]
+
+
+# 학습에 나온 해시 열만 남김 : 출력 폭 = 사용된 열 수, 학습에 없던 n-gram만 있는 쿼리는 0 벡터
+def test_output_width_is_used_columns_only():
+    vec = HashedNgramVectorizer(n_features=1 << 13)
+    X = vec.fit_transform(NAMES)
+    assert X.shape[1] < 1 << 13
+    assert X.shape[1] == len(vec.idf) == int(vec.columns.max()) + 1
+    assert np.all(np.diff(X.indptr) > 0)
+
+    Q = vec.transform(["김치찌게", "zzzz"])
+    assert Q.shape[1] == X.shape[1]
+    assert (Q[0] @ X.T).toarray().argmax() == 0
+    assert Q[1].nnz == 0
+    assert np.allclose((X.multiply(X)).sum(axis=1), 1.0)
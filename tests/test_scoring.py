@@ -0,0 +1,59 @@
+from pathlib import Path
+import numpy as np
+import pytest
+
+from leftovers.domain.recommend.service.concepts import load_concepts
+from leftovers.domain.recommend.service.scoring import Calib, compute_scores
+
+SPEC = load_concepts(Path(__file__).resolve().parents[1] / "leftovers/domain/recommend/config/concepts.json")
+
+# (이름, kcal, protein, fat, carbs, sugar, fiber, sodium, sat_fat) : 규칙 경계값(kcal 80/120/150, 나트륨 60/180/240)과 결측치 포함
+NAN = float("nan")
+ROWS = [
+    ("닭가슴살", 110, 23, 1.5, 0, 0, 0, 60, 0.4),
+    ("김치찌개", 80, 6, 4, 5, 2, 1, 700, 1.2),
+    ("미역국", 30, 2, 1, 3, 0.5, 1, 240, 0.2),
+    ("된장국", 45, 3, 1.2, 4, 1, 1.5, 241, 0.3),
+    ("초콜릿케이크", 420, 5, 22, 50, 35, 2, 300, 13),
+    ("삼겹살구이", 900, 17.5, 75, 0.5, 0, 0, 2100, 16),
+    ("두부조림", 120, 9, 6, 6, 2, 1, 180, 1),
+    ("현미밥", 150, 3, 1, 32, 0.3, 2, 5, 0.2),
+    ("샐러드", 20, 1, 0.2, 4, 2, 4, 60.5, 0),
+    ("알수없음", NAN, 12, NAN, 8, NAN, NAN, 90, NAN),
+]
+
+# 컨셉 규칙을 concepts.json으로 옮기기 전 행 단위 compute_score(if 분기)로 계산한 값 ("other"는 정의에 없는 컨셉 = 기본 규칙)
+EXPECTED = {
+    None: {
+        "diet": [100.000000, 81.988389, 90.480743, 91.548636, 0.000000, 0.000000, 81.836329, 51.598188, 93.932987, 100.000000],
+        "keto": [83.530872, 61.247063, 62.873592, 63.190258, 0.000000, 37.478261, 68.817491, 26.412281, 64.139465, 68.602063],
+        "low_sodium": [91.405721, 0.000000, 0.000000, 0.000000, 0.000000, 0.000000, 16.344732, 85.079478, 86.669623, 77.191304],
+        "glycemic": [88.305665, 53.316762, 58.443069, 58.965580, 0.000000, 17.108696, 74.403822, 35.716195, 78.896550, 52.021371],
+        "bulking": [100.000000, 21.391521, 0.000000, 0.000000, 0.000000, 100.000000, 30.740078, 0.000000, 0.000000, 100.000000],
+        "other": [87.356669, 57.784408, 62.454835, 63.390787, 14.375558, 23.847826, 66.726191, 55.208277, 67.393408, 72.381724],
+    },
+    "calib": {
+        "diet": [100.000000, 81.236902, 90.948707, 91.938416, 0.000000, 0.000000, 82.760273, 51.538068, 93.564064, 100.000000],
+        "keto": [84.902414, 60.956862, 63.078398, 63.575462, 0.096505, 41.368421, 70.463840, 27.647978, 63.770542, 71.037730],
+        "low_sodium": [89.378844, 0.000000, 0.000000, 0.000000, 0.000000, 0.000000, 12.592205, 84.886010, 84.456086, 75.658852],
+        "glycemic": [89.242424, 52.580336, 58.384717, 59.041860, 0.000000, 20.026316, 75.466648, 36.642968, 78.527627, 53.736214],
+        "bulking": [100.000000, 25.717400, 0.000000, 2.666305, 0.000000, 100.000000, 37.068599, 0.000000, 0.000000, 100.000000],
+        "other": [88.979199, 56.902881, 62.498885, 63.659668, 14.865988, 28.710526, 68.612191, 56.752899, 66.840023, 75.314401],
+    },
+}
+
+# 일부 성분만 분위수가 있는 보정값 (나머지는 기본 범위)
+CALIB = Calib(q={"kcal": {"p10": 40.0, "p90": 500.0}, "sodium": {"p10": 20.0, "p90": 900.0}, "protein": {"p10": 1.0, "p90": 20.0}})
+
+
+def _feats():
+    F = np.array([r[1:] for r in ROWS], dtype=np.float64)
+    netcarb = np.maximum(np.nan_to_num(F[:, 3]) - np.nan_to_num(F[:, 5]), 0.0)
+    return np.column_stack([F, netcarb])
+
+
+@pytest.mark.parametrize("calib", [None, "calib"])
+@pytest.mark.parametrize("concept", ["diet", "keto", "low_sodium", "glycemic", "bulking", "other"])
+def test_compute_scores_matches_original_rules(concept, calib):
+    got = compute_scores(concept, _feats(), CALIB if calib else None, names=[r[0] for r in ROWS], spec=SPEC)
+    assert got == pytest.approx(EXPECTED[calib][concept], abs=1e-4)
@@ -0,0 +1,17 @@
+import numpy as np
+
+from leftovers.domain.recommend.service.substitute import build_nutrient_index, find_substitutes
+
+
+# 후보 조건은 응답에 보이는 정수 적합도 기준 : 49.8 -> 50인 쿼리에 50.3(50)은 후보가 아니고 51.2(51)는 후보
+def test_min_gain_uses_rounded_suitability():
+    X = np.array([[0.0, 0.0], [0.1, 0.0], [0.2, 0.0], [5.0, 0.0]], dtype=np.float32)
+    index = build_nutrient_index(X, ["a", "b", "c", "d"])
+    scores = np.array([49.8, 50.3, 51.2, 60.0], dtype=np.float32)
+
+    (rows, dists), = find_substitutes(index, scores, [0], k=3)
+    assert rows.tolist() == [2, 3]
+    assert np.allclose(dists, [0.2, 5.0])
+
+    (rows, _), = find_substitutes(index, scores, [0], k=3, min_gain=5)
+    assert rows.tolist() == [3]
@@ -0,0 +1,25 @@
+import asyncio
+import json
+
+from leftovers.domain.tip.api import tip_api
+from leftovers.domain.tip.service.tip_cache import MemoryTipStore, TipCache, tip_key
+
+
+# LLM이 요청과 다른 반찬 이름으로 답한 항목 : 응답에는 순서대로 넣되 캐시에는 저장하지 않음
+def test_unmatched_menu_is_returned_but_not_cached(monkeypatch):
+    cache = TipCache(MemoryTipStore(100))
+    monkeypatch.setattr(tip_api, "_TIP_CACHE", cache)
+
+    async def fake_chat(messages, **kwargs):
+        return json.dumps({"items": [
+            {"menu": "감자 볶음", "title": "감자", "content": "감자 팁"},
+            {"menu": "오징어채", "title": "엉뚱한", "content": "다른 반찬 팁"},
+        ]})
+    monkeypatch.setattr(tip_api, "chatForTip", fake_chat)
+
+    found = asyncio.run(tip_api._fetch_tips(["감자볶음", "멸치볶음"]))
+    assert found[tip_key("감자볶음")]["title"] == "감자"
+    assert found[tip_key("멸치볶음")]["title"] == "엉뚱한"
+
+    cached = asyncio.run(cache.get_many([tip_key("감자볶음"), tip_key("멸치볶음")]))
+    assert list(cached) == [tip_key("감자볶음")]